@@ -0,0 +1,156 @@
+import re
+import math
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding, stereo: 417-byte frames of 1152 samples
+MP3_FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+MP3_FRAME_LENGTH = 417
+
+# Bytes of 128 kbps audio per character of text, at roughly 15 spoken characters per second
+TTS_BYTES_PER_CHAR = 1070
+
+def make_mp3(frames, info_frame=True):
+    """
+    Builds MP3 bytes the way Text-to-Speech returns them: an ID3 tag, an Info frame and audio frames.
+
+    :param frames: Number of audio frames (about 26 ms each)
+    :param info_frame: Whether to start with an Info frame (default: True)
+    :return: The MP3 bytes
+    """
+    body = bytearray(MP3_FRAME_LENGTH - 4)
+    audio_frame = MP3_FRAME_HEADER + bytes(body)
+    body[32:36] = b'Info'
+    id3 = b'ID3\x04\x00\x00\x00\x00\x00\x0a' + b'\x00' * 10
+    return id3 + (MP3_FRAME_HEADER + bytes(body) if info_frame else b'') + audio_frame * frames
+
+class FakeApiError(Exception):
+    """
+    Error raised by the fake backends, carrying an HTTP status like the real SDK errors.
+    """
+
+    def __init__(self, status_code, message="Fake backend error"):
+        super().__init__(f"{message} ({status_code})")
+        self.status_code = status_code
+        self.headers = {}
+
+class FakeBackend:
+    """
+    Base of the local stand-ins for the OpenAI and Google clients: every call sleeps for a configurable
+    latency and fails with a configurable probability. Calls, failures and payload bytes are recorded.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.2, error_rate=0.0, throttle_share=0.5, seed=0):
+        """
+        :param latency: Mean latency of a call in seconds
+        :param jitter: Relative spread of the latency, e.g. 0.2 for +/-20%
+        :param error_rate: Probability that a call fails
+        :param throttle_share: Share of the failures answered with 429 instead of 503
+        :param seed: Seed of the latency and failure draws, so runs are comparable
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_share = throttle_share
+        self.calls = 0
+        self.failures = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self, bytes_in):
+        """
+        Records a call, sleeps for its latency and raises FakeApiError for a failed call.
+
+        :param bytes_in: Size of the request payload
+        """
+        with self._lock:
+            self.calls += 1
+            self.bytes_in += bytes_in
+            delay = self.latency * self._random.uniform(1 - self.jitter, 1 + self.jitter)
+            failed = self._random.random() < self.error_rate
+            throttled = self._random.random() < self.throttle_share
+            if failed:
+                self.failures += 1
+        time.sleep(max(0.0, delay))
+        if failed:
+            raise FakeApiError(429 if throttled else 503)
+
+    def _sent(self, bytes_out):
+        with self._lock:
+            self.bytes_out += bytes_out
+
+    def stats(self):
+        """
+        Returns the recorded calls, failures and payload bytes.
+        """
+        with self._lock:
+            return {'calls': self.calls, 'failures': self.failures, 'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out}
+
+class FakeOpenAI(FakeBackend):
+    """
+    Stand-in for the OpenAI client: chat.completions.create answers with the user text repeated to
+    `output_ratio` times its length, e.g. a translation of the same size. With stream=True the answer
+    arrives word by word, `token_delay` seconds apart, after the call latency.
+    """
+
+    def __init__(self, output_ratio=1.0, token_delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.output_ratio = output_ratio
+        self.token_delay = token_delay
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False, **kwargs):
+        text = messages[-1]['content']
+        self._call(len(text.encode('utf-8')))
+        length = max(1, int(len(text) * self.output_ratio))
+        content = (text * math.ceil(length / max(1, len(text))))[:length]
+        self._sent(len(content.encode('utf-8')))
+        if stream:
+            return self._stream(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason='stop')])
+
+    def _stream(self, content):
+        for i, piece in enumerate(re.findall(r'\s*\S+', content)):
+            if i and self.token_delay:
+                time.sleep(self.token_delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece), finish_reason=None)])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason='stop')])
+
+class FakeTextToSpeech(FakeBackend):
+    """
+    Stand-in for the Text-to-Speech client: synthesize_speech answers with valid MP3 frames,
+    `bytes_per_char` bytes of audio per character of input.
+    """
+
+    def __init__(self, bytes_per_char=TTS_BYTES_PER_CHAR, **kwargs):
+        super().__init__(**kwargs)
+        self.bytes_per_char = bytes_per_char
+
+    def synthesize_speech(self, input, voice=None, audio_config=None, **kwargs):
+        self._call(len(input.text.encode('utf-8')))
+        audio_content = make_mp3(math.ceil(len(input.text) * self.bytes_per_char / MP3_FRAME_LENGTH))
+        self._sent(len(audio_content))
+        return SimpleNamespace(audio_content=audio_content)
+
+class FakeSpeech(FakeBackend):
+    """
+    Stand-in for the Speech client: recognize answers with `words_per_second` words per second
+    of 128 kbps audio.
+    """
+
+    def __init__(self, words_per_second=2.5, **kwargs):
+        super().__init__(**kwargs)
+        self.words_per_second = words_per_second
+
+    def recognize(self, config=None, audio=None, **kwargs):
+        self._call(len(audio.content))
+        seconds = len(audio.content) / (128000 / 8)
+        transcript = " ".join(["palabra"] * max(1, int(seconds * self.words_per_second)))
+        self._sent(len(transcript))
+        alternative = SimpleNamespace(transcript=transcript, confidence=0.9)
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Repository root and the source directory the application runs from
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+
+# Modules imported by every job type
+MODULES = ('config.settings', 'utils.common', 'text.text_processor', 'speech.speech_processor')
+
+# Heavy dependencies that should only be loaded when they are first used
+HEAVY_MODULES = (
+    'openai', 'google.cloud.speech', 'google.cloud.texttospeech', 'pygame',
+    'pyaudio', 'pydub', 'reportlab', 'PyPDF2', 'docx'
+)
+
+def measure_import(module_name):
+    """
+    Imports a module in a fresh interpreter and measures its cumulative import time.
+
+    :param module_name: Dotted module name
+    :return: Dictionary with the module, import time in milliseconds and heavy modules loaded by the import
+    """
+    script = (
+        "import sys, json, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"heavy = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(json.dumps({'milliseconds': round(elapsed, 2), 'heavy_modules': heavy}))\n"
+    )
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([SRC_DIR, ROOT_DIR])
+    env.setdefault('OPENAI_API_KEY', 'benchmark')
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['module'] = module_name
+    return result
+
+def run_benchmark(modules=MODULES, repeat=3):
+    """
+    Measures the import time of each module, keeping the fastest of several runs.
+
+    :param modules: Module names to measure
+    :param repeat: Number of fresh-interpreter runs per module (default: 3)
+    :return: List of result dictionaries
+    """
+    results = []
+    for module_name in modules:
+        runs = [measure_import(module_name) for _ in range(repeat)]
+        results.append(min(runs, key=lambda run: run['milliseconds']))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the application modules.")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per module (default: 3)")
+    parser.add_argument('--output', default=None, help="Optional path of a JSON results file")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(repeat=max(1, args.repeat))
+    report = json.dumps({'benchmark': 'import_time', 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(report)
+    print(report)
+    return 1 if any(result['heavy_modules'] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
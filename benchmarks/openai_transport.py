@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+from contextlib import ExitStack
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'src'), ROOT_DIR]
+
+from benchmarks.pdf_writer import PARAGRAPH
+from text import text_processor
+from utils import clients, throttling
+from utils.throughput import throughput_report
+
+# Client policies compared by default: a new client per request (no connection reuse), one shared
+# pooled client, and one pooled client per worker thread
+POLICIES = ('per_request', 'shared', 'thread')
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """
+    Local OpenAI-compatible server: POST /v1/chat/completions answers with the user text after a fixed
+    latency, over HTTP/1.1 keep-alive connections. New connections wait `connect_latency` first, the
+    cost of the TCP and TLS handshakes with the real API. Connections and requests are counted.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency=0.05, connect_latency=0.03, host='127.0.0.1', port=0):
+        """
+        :param latency: Seconds before each completion is answered
+        :param connect_latency: Seconds added to the first request of every new connection
+        :param host: Interface to listen on (default: localhost only)
+        :param port: Port to listen on (default: a free port)
+        """
+        super().__init__((host, port), MockOpenAIHandler)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        """
+        Serves requests from a daemon thread.
+
+        :return: The base URL of the OpenAI API, e.g. http://127.0.0.1:8080/v1
+        """
+        threading.Thread(target=self.serve_forever, name='mock-openai', daemon=True).start()
+        return self.base_url
+
+    def count(self, connection=False):
+        with self._lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+
+    def stats(self):
+        """
+        Returns the connections opened and requests answered so far.
+        """
+        with self._lock:
+            return {'connections': self.connections, 'requests': self.requests}
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.count(connection=True)
+        time.sleep(self.server.connect_latency)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if self.path.split('?')[0] != '/v1/chat/completions':
+            self.send_error(404)
+            return
+        time.sleep(self.server.latency)
+        content = request.get('messages', [{}])[-1].get('content', '')
+        body = json.dumps({
+            'id': 'chatcmpl-mock',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                         'finish_reason': 'stop', 'logprobs': None}],
+            'usage': {'prompt_tokens': len(content) // 4, 'completion_tokens': len(content) // 4,
+                      'total_tokens': len(content) // 2},
+        }).encode('utf-8')
+        self.server.count()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class PerRequestOpenAI:
+    """
+    OpenAI client that opens a new client, and so a new connection, for every request: the cost
+    of running without a connection pool.
+    """
+
+    def __init__(self):
+        self.chat = self
+        self.completions = self
+
+    def create(self, **request):
+        from openai import OpenAI
+        with OpenAI(**clients.openai_client_options()) as client:
+            return client.chat.completions.create(**request)
+
+def make_chunks(count):
+    """
+    Builds translation chunks of about one paragraph each.
+
+    :param count: Number of chunks
+    :return: List of chunk dictionaries
+    """
+    return [{'text': f"{i}. {PARAGRAPH}", 'separator': "\n\n"} for i in range(count)]
+
+def run_policy(policy, server, chunks, concurrency, args):
+    """
+    Translates the chunks through translate_chunks against the mock server with one client policy.
+
+    :param policy: 'per_request', 'shared' or 'thread'
+    :param server: The running MockOpenAIServer
+    :param chunks: Chunk dictionaries to translate
+    :param concurrency: Concurrent translation requests
+    :param args: Parsed command-line arguments with the transport settings
+    :return: Result dictionary with the throughput and the connections opened
+    """
+    transport = {
+        'OPENAI_BASE_URL': server.base_url,
+        'OPENAI_API_KEY': clients.OPENAI_API_KEY or 'benchmark',
+        'OPENAI_CLIENT_POLICY': 'shared' if policy == 'per_request' else policy,
+        'OPENAI_CLIENT_POOL_SIZE': args.pool_size,
+        'OPENAI_HTTP2': args.http2,
+        'OPENAI_MAX_CONNECTIONS': args.max_connections,
+        'OPENAI_MAX_KEEPALIVE_CONNECTIONS': args.max_keepalive,
+    }
+    unlimited = {provider: (0, 0, concurrency) for provider in throttling.PROVIDER_LIMITS}
+    with ExitStack() as stack:
+        for name, value in transport.items():
+            stack.enter_context(patch.object(clients, name, value))
+        stack.enter_context(patch.object(throttling, 'PROVIDER_LIMITS', unlimited))
+        stack.enter_context(patch.object(throttling, 'OPENAI_MODEL_RATE_LIMITS', {}))
+        stack.enter_context(patch.object(text_processor, 'TRANSLATION_CACHE_ENABLED', False))
+        throttling.reset_provider_limiters()
+        stack.callback(throttling.reset_provider_limiters)
+        clients.register_openai_clients()
+        stack.callback(clients.register_openai_clients)
+        if policy == 'per_request':
+            clients.set_client('openai', PerRequestOpenAI())
+
+        before = server.stats()
+        start = time.perf_counter()
+        translated = text_processor.translate_chunks(chunks, 'es', 'en', max_in_flight=concurrency)
+        elapsed = time.perf_counter() - start
+        after = server.stats()
+    if translated is None:
+        raise RuntimeError(f"Translation with the {policy} policy failed")
+    return {'policy': policy, 'concurrency': concurrency,
+            **throughput_report({'chunks': len(chunks), 'chars': len(translated)}, elapsed),
+            'connections': after['connections'] - before['connections'],
+            'requests': after['requests'] - before['requests']}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OpenAI client policies and connection pooling against a local mock server.")
+    parser.add_argument('--policies', nargs='+', choices=POLICIES, default=list(POLICIES), help="Client policies to compare (default: all)")
+    parser.add_argument('--chunks', type=int, default=256, help="Chunks translated per run (default: 256)")
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[64], help="Concurrent requests (default: 64)")
+    parser.add_argument('--latency', type=float, default=0.05, help="Mock completion latency in seconds (default: 0.05)")
+    parser.add_argument('--connect-latency', type=float, default=0.03, help="Mock cost of opening a connection in seconds (default: 0.03)")
+    parser.add_argument('--pool-size', type=int, default=4, help="Clients shared by the threads with the thread policy (default: 4)")
+    parser.add_argument('--max-connections', type=int, default=100, help="Connection pool size per client (default: 100)")
+    parser.add_argument('--max-keepalive', type=int, default=64, help="Idle connections kept alive per client (default: 64)")
+    parser.add_argument('--http2', action='store_true', help="Enable HTTP/2 (the mock server speaks HTTP/1.1, so this only checks the fallback)")
+    parser.add_argument('--output', default=None, help="Optional path of a JSON results file")
+    args = parser.parse_args(argv)
+
+    server = MockOpenAIServer(args.latency, args.connect_latency)
+    server.start()
+    try:
+        chunks = make_chunks(args.chunks)
+        results = [run_policy(policy, server, chunks, concurrency, args)
+                   for concurrency in args.concurrency for policy in args.policies]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    report = {
+        'benchmark': 'openai_transport',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'server': {'latency': args.latency, 'connect_latency': args.connect_latency},
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output)
+    print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
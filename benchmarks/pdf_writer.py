@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from io import BytesIO
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'src'), ROOT_DIR]
+
+from utils.common import write_pdf
+
+# A translated paragraph of typical sentence and line lengths
+PARAGRAPH = ("El informe anual describe el progreso del proyecto, los riesgos identificados durante el trimestre "
+             "y las medidas que el equipo adoptará para reducir los retrasos en la entrega. ")
+
+def make_content(pages):
+    """
+    Builds translation output that fills roughly the requested number of letter pages.
+
+    :param pages: Target page count
+    :return: The content
+    """
+    # Each block wraps to about nine lines, so roughly five blocks fill a page
+    paragraphs = [PARAGRAPH * 5 for _ in range(pages * 26 // 5)]
+    return "\n".join(paragraphs)
+
+def legacy_write_pdf(content, output_file):
+    """
+    The previous write_pdf: render into memory without wrapping, parse it again and copy the first page.
+    Kept for comparison only; its output is truncated to one page.
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
+    packet = BytesIO()
+    can = canvas.Canvas(packet, pagesize=letter)
+    width, height = letter
+    y = height - 50
+    for line in content.split('\n'):
+        if y < 50:
+            can.showPage()
+            y = height - 50
+        can.drawString(50, y, line)
+        y -= 15
+    can.save()
+    packet.seek(0)
+    writer = PdfWriter()
+    writer.add_page(PdfReader(packet).pages[0])
+    with open(output_file, 'wb') as output_file_handle:
+        writer.write(output_file_handle)
+
+def measure(write, content, output_file):
+    """
+    Times one write and reads back the page count of the result.
+
+    :return: Dictionary with seconds, pages and bytes
+    """
+    from PyPDF2 import PdfReader
+
+    start = time.perf_counter()
+    write(content, output_file)
+    elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 3), 'pages': len(PdfReader(output_file).pages),
+            'bytes': os.path.getsize(output_file)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark write_pdf on a long translation output.")
+    parser.add_argument('--pages', type=int, default=500, help="Approximate number of output pages (default: 500)")
+    parser.add_argument('--output', default=None, help="Optional path of a JSON results file")
+    args = parser.parse_args(argv)
+
+    content = make_content(args.pages)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results = {
+            'benchmark': 'pdf_writer',
+            'content_chars': len(content),
+            'write_pdf': measure(write_pdf, content, os.path.join(temp_dir, 'streamed.pdf')),
+            'legacy_round_trip': measure(legacy_write_pdf, content, os.path.join(temp_dir, 'legacy.pdf')),
+        }
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(report)
+    print(report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime
+from unittest.mock import patch
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT_DIR, 'src'), ROOT_DIR]
+
+from benchmarks.fake_backends import FakeOpenAI, FakeSpeech, FakeTextToSpeech, make_mp3
+from benchmarks.pdf_writer import PARAGRAPH
+from text import text_processor
+from speech import speech_processor
+from utils import throttling
+from utils.clients import set_client, reset_clients
+from utils.common import split_content, write_pdf, read_pdf_file, check_audio_duration
+from utils.throughput import throughput_report
+
+# Input size multipliers run by default
+SIZES = (1, 4, 16)
+
+def make_text(chars):
+    """
+    Builds translation-like text of about the given length, in paragraphs of a few sentences.
+
+    :param chars: Target length in characters
+    :return: The text
+    """
+    paragraph = PARAGRAPH * 4
+    return "\n\n".join([paragraph] * max(1, chars // (len(paragraph) + 2)))
+
+def bench_split_content(size, temp_dir):
+    text = make_text(200000 * size)
+    return lambda: {'chars': len(text), 'chunks': len(split_content(text))}
+
+def bench_translate_large_text(size, temp_dir):
+    text = make_text(50000 * size)
+
+    def run():
+        before = text_processor.translation_meter.snapshot()
+        if text_processor.translate_large_text(text, 'es', 'en', resume=False) is None:
+            raise RuntimeError("translate_large_text failed")
+        after = text_processor.translation_meter.snapshot()
+        return {'chars': len(text), 'chunks': after.get('chunks', 0) - before.get('chunks', 0),
+                'tokens': after.get('tokens', 0) - before.get('tokens', 0)}
+    return run
+
+def bench_text_to_speech_large(size, temp_dir):
+    from google.cloud import texttospeech
+
+    text = make_text(10000 * size)
+
+    def run():
+        audio_contents = speech_processor.text_to_speech_large(text, 'es-ES', texttospeech.SsmlVoiceGender.FEMALE, resume=False)
+        if audio_contents is None:
+            raise RuntimeError("text_to_speech_large failed")
+        return {'chars': len(text), 'chunks': len(audio_contents), 'bytes': sum(len(audio) for audio in audio_contents)}
+    return run
+
+def bench_save_large_audio(size, temp_dir):
+    # Ten 30-second chunks per size unit
+    audio_contents = [make_mp3(1150)] * (10 * size)
+
+    def run():
+        path = speech_processor.save_large_audio(iter(audio_contents), f"benchmark_{size}", use_unique_name=False)
+        if path is None:
+            raise RuntimeError("save_large_audio failed")
+        return {'chunks': len(audio_contents), 'bytes': os.path.getsize(path)}
+    return run
+
+def bench_check_audio_duration(size, temp_dir):
+    # Fresh files every run, so the memoized probe results of earlier runs are not reused
+    paths = []
+    for i in range(50 * size):
+        path = os.path.join(temp_dir, f"probe_{size}_{i}.mp3")
+        with open(path, 'wb') as audio_file:
+            audio_file.write(make_mp3(200))
+        paths.append(path)
+    return lambda: {'files': sum(1 for path in paths if check_audio_duration(path) is not None)}
+
+def bench_read_pdf_file(size, temp_dir):
+    path = os.path.join(temp_dir, f"read_{size}.pdf")
+    write_pdf(make_text(3000 * 20 * size), path)
+
+    def run():
+        return {'bytes': os.path.getsize(path), 'chars': len(read_pdf_file(path))}
+    return run
+
+def bench_write_pdf(size, temp_dir):
+    text = make_text(3000 * 20 * size)
+    path = os.path.join(temp_dir, f"write_{size}.pdf")
+
+    def run():
+        write_pdf(text, path)
+        return {'chars': len(text), 'bytes': os.path.getsize(path)}
+    return run
+
+def bench_transcribe_audio(size, temp_dir):
+    # One minute of audio per size unit, sent in a single recognize request
+    audio_content = make_mp3(2300 * size)
+
+    def run():
+        transcript = speech_processor.transcribe_audio(audio_content, 'es-ES')
+        if not transcript:
+            raise RuntimeError("transcribe_audio failed")
+        return {'bytes': len(audio_content), 'words': len(transcript.split())}
+    return run
+
+def bench_translate_audio(size, temp_dir):
+    from google.cloud import texttospeech
+    from main import translate_audio_file
+
+    # Four 30-second segments of 16 kHz PCM per size unit, already cut at silences: silence detection
+    # decodes the audio with ffmpeg, which the fake backends do not replace
+    segments = [{'start': i * 30.0, 'end': (i + 1) * 30.0, 'content': bytes(30 * 32000)} for i in range(4 * size)]
+
+    def run():
+        with patch.object(speech_processor, 'check_audio_duration', return_value=True), \
+                patch.object(speech_processor, 'split_audio_on_silence', return_value=segments):
+            path = translate_audio_file(b'audio', 'translated_audio', 'es', 'es-ES', 'en', 'en-US',
+                                        texttospeech.SsmlVoiceGender.FEMALE)
+        return {'segments': len(segments), 'bytes': os.path.getsize(path)}
+    return run
+
+# Benchmarks by name: each builds its input for a size multiplier and returns the timed callable,
+# which returns the counts (chars, chunks, bytes, ...) processed
+BENCHMARKS = {
+    'split_content': bench_split_content,
+    'translate_large_text': bench_translate_large_text,
+    'text_to_speech_large': bench_text_to_speech_large,
+    'save_large_audio': bench_save_large_audio,
+    'check_audio_duration': bench_check_audio_duration,
+    'read_pdf_file': bench_read_pdf_file,
+    'write_pdf': bench_write_pdf,
+    'transcribe_audio': bench_transcribe_audio,
+    'translate_audio': bench_translate_audio,
+}
+
+def install_fake_backends(args, temp_dir, stack):
+    """
+    Replaces the API clients with fake backends and isolates the run from the caches, checkpoints,
+    rate-limit budgets and output folders of the real configuration. Concurrency limits are kept.
+
+    :param args: Parsed command-line arguments
+    :param temp_dir: Directory for the audio output
+    :param stack: ExitStack undoing the changes
+    :return: Dictionary of the fake backends by client name
+    """
+    latency = {'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate, 'seed': args.seed}
+    backends = {
+        'openai': FakeOpenAI(output_ratio=args.output_ratio, **latency),
+        'speech': FakeSpeech(**latency),
+        'tts': FakeTextToSpeech(bytes_per_char=args.tts_bytes_per_char, **latency),
+    }
+    reset_clients()
+    stack.callback(reset_clients)
+    for name, backend in backends.items():
+        set_client(name, backend)
+
+    unlimited = {provider: (0, 0, max_concurrency) for provider, (_, _, max_concurrency) in throttling.PROVIDER_LIMITS.items()}
+    stack.enter_context(patch.object(throttling, 'PROVIDER_LIMITS', unlimited))
+    stack.enter_context(patch.object(throttling, 'OPENAI_MODEL_RATE_LIMITS', {}))
+    stack.enter_context(patch.object(text_processor, 'TRANSLATION_CACHE_ENABLED', False))
+    stack.enter_context(patch.object(speech_processor, 'TTS_CACHE_ENABLED', False))
+    stack.enter_context(patch.object(speech_processor, 'AUDIO_OUTPUT_DIR', temp_dir))
+    throttling.reset_provider_limiters()
+    stack.callback(throttling.reset_provider_limiters)
+    for limiter in (text_processor.get_openai_limiter(), speech_processor.get_speech_limiter(), speech_processor.get_tts_limiter()):
+        limiter.backoff = limiter.max_backoff = args.backoff
+    return backends
+
+def run_benchmark(name, size, backends, temp_dir, repeat=3):
+    """
+    Runs one benchmark at one size, keeping the fastest of several runs.
+
+    :param name: Benchmark name, a key of BENCHMARKS
+    :param size: Input size multiplier
+    :param backends: Fake backends, whose calls are reported per run
+    :param temp_dir: Directory for inputs and outputs
+    :param repeat: Number of runs (default: 3)
+    :return: Result dictionary with the counts, per-second rates and backend calls of the fastest run
+    """
+    best = None
+    for _ in range(repeat):
+        run = BENCHMARKS[name](size, temp_dir)
+        before = {client: backend.stats() for client, backend in backends.items()}
+        start = time.perf_counter()
+        counts = run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best['elapsed_seconds']:
+            best = throughput_report(counts, elapsed)
+            for client, backend in backends.items():
+                stats = backend.stats()
+                calls = stats['calls'] - before[client]['calls']
+                if calls:
+                    best[f"{client}_calls"] = calls
+                    best[f"{client}_failures"] = stats['failures'] - before[client]['failures']
+    return {'name': name, 'size': size, **best}
+
+def compare_results(results, baseline, tolerance):
+    """
+    Finds the rates that dropped by more than the tolerance compared with a baseline run.
+
+    :param results: Result dictionaries of this run
+    :param baseline: Result dictionaries of the baseline run
+    :param tolerance: Allowed relative drop, e.g. 0.2 for 20%
+    :return: List of regressions with the benchmark, size, rate and both values
+    """
+    previous = {(result['name'], result['size']): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result['name'], result['size']))
+        if old is None:
+            continue
+        for key, value in result.items():
+            if key.endswith('_per_second') and old.get(key) and value < old[key] * (1 - tolerance):
+                regressions.append({'name': result['name'], 'size': result['size'], 'rate': key,
+                                    'baseline': old[key], 'current': value})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the text and speech pipelines against fake API backends.")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES), help="Input size multipliers (default: 1 4 16)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per benchmark and size, the fastest is kept (default: 3)")
+    parser.add_argument('--latency', type=float, default=0.05, help="Mean fake API latency in seconds (default: 0.05)")
+    parser.add_argument('--jitter', type=float, default=0.2, help="Relative spread of the latency (default: 0.2)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probability that a fake API call fails (default: 0)")
+    parser.add_argument('--backoff', type=float, default=0.01, help="Retry backoff in seconds while benchmarking (default: 0.01)")
+    parser.add_argument('--output-ratio', type=float, default=1.0, help="Completion length per input character (default: 1.0)")
+    parser.add_argument('--tts-bytes-per-char', type=int, default=1070, help="Synthesized MP3 bytes per character (default: 1070)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the fake latencies and failures (default: 0)")
+    parser.add_argument('--output', default=None, help="Optional path of a JSON results file")
+    parser.add_argument('--baseline', default=None, help="Optional JSON results of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative throughput drop against the baseline (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as stack:
+        backends = install_fake_backends(args, temp_dir, stack)
+        for name in args.only or BENCHMARKS:
+            for size in args.sizes:
+                results.append(run_benchmark(name, size, backends, temp_dir, max(1, args.repeat)))
+
+    report = {
+        'benchmark': 'pipelines',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'backends': {'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+                     'output_ratio': args.output_ratio, 'tts_bytes_per_char': args.tts_bytes_per_char, 'seed': args.seed},
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            report['regressions'] = compare_results(results, json.load(baseline_file)['results'], args.tolerance)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(output)
+    print(output)
+    return 1 if report.get('regressions') else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,4 @@
 import os
-from google.cloud import speech, texttospeech
 import configparser
 
 # Load external configuration
@@ -16,16 +15,34 @@ LANGUAGES = {
     "4": ("German", "de-DE"),
     "5": ("Italian", "it-IT")
 }
-# Voice options
+# Voice options (names of texttospeech.SsmlVoiceGender values, accepted by VoiceSelectionParams)
 VOICES = {
-    "1": ("Male", texttospeech.SsmlVoiceGender.MALE),
-    "2": ("Female", texttospeech.SsmlVoiceGender.FEMALE),
-    "3": ("Neutral", texttospeech.SsmlVoiceGender.NEUTRAL)
+    "1": ("Male", "MALE"),
+    "2": ("Female", "FEMALE"),
+    "3": ("Neutral", "NEUTRAL")
 }
 
 # API settings
 OPENAI_MODEL = config.get('API', 'OPENAI_MODEL', fallback='gpt-3.5-turbo')
 OPENAI_API_KEY = config.get('API', 'OPENAI_API_KEY', fallback=os.getenv('OPENAI_API_KEY'))
+OPENAI_CONTEXT_TOKENS = config.getint('API', 'OPENAI_CONTEXT_TOKENS', fallback=0)  # 0 = known limit of OPENAI_MODEL
+OPENAI_MAX_OUTPUT_TOKENS = config.getint('API', 'OPENAI_MAX_OUTPUT_TOKENS', fallback=0)  # 0 = known limit of OPENAI_MODEL
+TRANSLATION_OUTPUT_RATIO = max(0.0, config.getfloat('API', 'TRANSLATION_OUTPUT_RATIO', fallback=1.5))  # completion tokens reserved per input token, 0 = none
+TRANSLATION_MAX_CHUNK_TOKENS = config.getint('API', 'TRANSLATION_MAX_CHUNK_TOKENS', fallback=0)  # 0 = largest chunk the model allows
+STREAM_RESPONSES = config.getboolean('API', 'STREAM_RESPONSES', fallback=True)  # show interactive output as it is generated
+
+# OpenAI HTTP transport settings
+OPENAI_BASE_URL = config.get('OpenAITransport', 'OPENAI_BASE_URL', fallback='')  # '' = the OpenAI API
+OPENAI_CLIENT_POLICY = config.get('OpenAITransport', 'OPENAI_CLIENT_POLICY', fallback='shared').strip().lower()  # shared or thread
+OPENAI_CLIENT_POOL_SIZE = config.getint('OpenAITransport', 'OPENAI_CLIENT_POOL_SIZE', fallback=4)  # clients shared by the threads with the thread policy
+OPENAI_HTTP2 = config.getboolean('OpenAITransport', 'OPENAI_HTTP2', fallback=False)  # needs the h2 package (httpx[http2])
+OPENAI_MAX_CONNECTIONS = config.getint('OpenAITransport', 'OPENAI_MAX_CONNECTIONS', fallback=100)  # per client, 0 = unlimited
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = config.getint('OpenAITransport', 'OPENAI_MAX_KEEPALIVE_CONNECTIONS', fallback=64)
+OPENAI_KEEPALIVE_EXPIRY = config.getfloat('OpenAITransport', 'OPENAI_KEEPALIVE_EXPIRY', fallback=30.0)  # seconds
+OPENAI_CONNECT_TIMEOUT = config.getfloat('OpenAITransport', 'OPENAI_CONNECT_TIMEOUT', fallback=5.0)  # seconds
+OPENAI_READ_TIMEOUT = config.getfloat('OpenAITransport', 'OPENAI_READ_TIMEOUT', fallback=600.0)  # seconds
+OPENAI_WRITE_TIMEOUT = config.getfloat('OpenAITransport', 'OPENAI_WRITE_TIMEOUT', fallback=600.0)  # seconds
+OPENAI_POOL_TIMEOUT = config.getfloat('OpenAITransport', 'OPENAI_POOL_TIMEOUT', fallback=600.0)  # seconds waiting for a free connection
 
 # Google Cloud settings
 GOOGLE_APPLICATION_CREDENTIALS = config.get('Google', 'GOOGLE_APPLICATION_CREDENTIALS', 
@@ -34,6 +51,57 @@ GOOGLE_APPLICATION_CREDENTIALS = config.get('Google', 'GOOGLE_APPLICATION_CREDEN
 # Audio settings
 DEFAULT_AUDIO_DURATION = config.getint('Audio', 'DEFAULT_AUDIO_DURATION', fallback=5)  # seconds
 AUDIO_SAMPLE_RATE = config.getint('Audio', 'AUDIO_SAMPLE_RATE', fallback=16000)
+TRANSCRIPTION_SEGMENT_SECONDS = config.getint('Audio', 'TRANSCRIPTION_SEGMENT_SECONDS', fallback=55)  # synchronous recognize accepts up to 60 seconds
+MIN_SILENCE_MS = config.getint('Audio', 'MIN_SILENCE_MS', fallback=500)
+
+# Concurrency settings
+TRANSLATION_MAX_IN_FLIGHT = config.getint('Concurrency', 'TRANSLATION_MAX_IN_FLIGHT', fallback=8)
+TTS_MAX_IN_FLIGHT = config.getint('Concurrency', 'TTS_MAX_IN_FLIGHT', fallback=4)
+TRANSCRIPTION_MAX_IN_FLIGHT = config.getint('Concurrency', 'TRANSCRIPTION_MAX_IN_FLIGHT', fallback=4)
+PDF_EXTRACT_WORKERS = config.getint('Concurrency', 'PDF_EXTRACT_WORKERS', fallback=0)  # 0 = one per CPU, 1 = no worker processes
+PDF_PAGES_PER_TASK = config.getint('Concurrency', 'PDF_PAGES_PER_TASK', fallback=16)
+ASYNC_SPEECH_MAX_IN_FLIGHT = config.getint('Concurrency', 'ASYNC_SPEECH_MAX_IN_FLIGHT', fallback=16)
+ASYNC_TTS_MAX_IN_FLIGHT = config.getint('Concurrency', 'ASYNC_TTS_MAX_IN_FLIGHT', fallback=16)
+BATCH_FILE_WORKERS = config.getint('Concurrency', 'BATCH_FILE_WORKERS', fallback=8)
+BATCH_PROGRESS_INTERVAL = config.getfloat('Concurrency', 'BATCH_PROGRESS_INTERVAL', fallback=10.0)  # seconds
+PIPELINE_QUEUE_SIZE = config.getint('Concurrency', 'PIPELINE_QUEUE_SIZE', fallback=16)  # items waiting between pipeline stages
+
+# Rate limit settings, shared by every call to a provider (0 = unlimited)
+# The deprecated [Concurrency] TRANSLATION_REQUESTS_PER_MINUTE is used when OPENAI_REQUESTS_PER_MINUTE is not set
+OPENAI_REQUESTS_PER_MINUTE = config.getint('RateLimits', 'OPENAI_REQUESTS_PER_MINUTE',
+                                           fallback=config.getint('Concurrency', 'TRANSLATION_REQUESTS_PER_MINUTE', fallback=0))
+OPENAI_TOKENS_PER_MINUTE = config.getint('RateLimits', 'OPENAI_TOKENS_PER_MINUTE', fallback=0)
+OPENAI_MAX_CONCURRENCY = config.getint('RateLimits', 'OPENAI_MAX_CONCURRENCY', fallback=32)
+SPEECH_REQUESTS_PER_MINUTE = config.getint('RateLimits', 'SPEECH_REQUESTS_PER_MINUTE', fallback=0)
+SPEECH_MAX_CONCURRENCY = config.getint('RateLimits', 'SPEECH_MAX_CONCURRENCY', fallback=16)
+TTS_REQUESTS_PER_MINUTE = config.getint('RateLimits', 'TTS_REQUESTS_PER_MINUTE', fallback=0)
+TTS_CHARACTERS_PER_MINUTE = config.getint('RateLimits', 'TTS_CHARACTERS_PER_MINUTE', fallback=0)
+TTS_MAX_CONCURRENCY = config.getint('RateLimits', 'TTS_MAX_CONCURRENCY', fallback=16)
+RATE_LIMIT_MAX_RETRIES = config.getint('RateLimits', 'RATE_LIMIT_MAX_RETRIES', fallback=5)
+RATE_LIMIT_BACKOFF = config.getfloat('RateLimits', 'RATE_LIMIT_BACKOFF', fallback=1.0)  # seconds
+RATE_LIMIT_MAX_BACKOFF = config.getfloat('RateLimits', 'RATE_LIMIT_MAX_BACKOFF', fallback=60.0)  # seconds
+# Per-model OpenAI budgets from [RateLimits:<model>] sections: model -> (requests per minute, tokens per minute)
+OPENAI_MODEL_RATE_LIMITS = {
+    section.split(':', 1)[1].strip(): (
+        config.getint(section, 'REQUESTS_PER_MINUTE', fallback=OPENAI_REQUESTS_PER_MINUTE),
+        config.getint(section, 'TOKENS_PER_MINUTE', fallback=OPENAI_TOKENS_PER_MINUTE),
+    )
+    for section in config.sections() if section.startswith('RateLimits:')
+}
+# Deprecated settings found in config.ini, mapped to the provider they applied to and the
+# [RateLimits] setting that replaces them
+DEPRECATED_SETTINGS = {
+    name: (provider, replacement)
+    for section, name, provider, replacement in (
+        ('Concurrency', 'TRANSLATION_REQUESTS_PER_MINUTE', 'openai', 'OPENAI_REQUESTS_PER_MINUTE'),
+        ('Concurrency', 'ASYNC_OPENAI_MAX_IN_FLIGHT', 'openai', 'OPENAI_MAX_CONCURRENCY'),
+        ('Concurrency', 'TTS_MAX_RETRIES', 'tts', 'RATE_LIMIT_MAX_RETRIES'),
+        ('Concurrency', 'TTS_RETRY_BACKOFF', 'tts', 'RATE_LIMIT_BACKOFF'),
+        ('Concurrency', 'TRANSCRIPTION_MAX_RETRIES', 'speech', 'RATE_LIMIT_MAX_RETRIES'),
+        ('Concurrency', 'TRANSCRIPTION_RETRY_BACKOFF', 'speech', 'RATE_LIMIT_BACKOFF'),
+    )
+    if config.has_option(section, name)
+}
 
 # File paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -48,9 +116,31 @@ AUDIO_TO_TEXT_OUTPUT_DIR = os.path.join(DATA_DIR, config.get('Paths', 'AUDIO_TO_
 AUDIO_TRANSLATION_INPUT_DIR = os.path.join(DATA_DIR, config.get('Paths', 'AUDIO_TRANSLATION_INPUT_DIR', fallback='audio_translation/input'))
 AUDIO_TRANSLATION_OUTPUT_DIR = os.path.join(DATA_DIR, config.get('Paths', 'AUDIO_TRANSLATION_OUTPUT_DIR', fallback='audio_translation/output'))
 
+# Cache settings
+CACHE_DIR = os.path.join(DATA_DIR, config.get('Cache', 'CACHE_DIR', fallback='cache'))
+TRANSLATION_CACHE_ENABLED = config.getboolean('Cache', 'TRANSLATION_CACHE_ENABLED', fallback=True)
+TRANSLATION_CACHE_PATH = os.path.join(CACHE_DIR, 'translations.sqlite3')
+TRANSLATION_CACHE_MAX_BYTES = config.getint('Cache', 'TRANSLATION_CACHE_MAX_BYTES', fallback=256 * 1024 * 1024)  # 256 MB
+TTS_CACHE_ENABLED = config.getboolean('Cache', 'TTS_CACHE_ENABLED', fallback=True)
+TTS_CACHE_PATH = os.path.join(CACHE_DIR, 'tts_audio.sqlite3')
+TTS_CACHE_MAX_BYTES = config.getint('Cache', 'TTS_CACHE_MAX_BYTES', fallback=1024 * 1024 * 1024)  # 1 GB
+CHECKPOINTS_ENABLED = config.getboolean('Cache', 'CHECKPOINTS_ENABLED', fallback=True)
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, 'checkpoints.sqlite3')
+CHECKPOINT_MAX_AGE_DAYS = config.getint('Cache', 'CHECKPOINT_MAX_AGE_DAYS', fallback=30)
+
 # Logging settings
 LOG_LEVEL = config.get('Logging', 'LOG_LEVEL', fallback='INFO')
 LOG_FORMAT = config.get('Logging', 'LOG_FORMAT', fallback='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 LOG_DIR = os.path.join(BASE_DIR, config.get('Logging', 'LOG_DIR', fallback='logs'))
 MAX_LOG_SIZE = config.getint('Logging', 'MAX_LOG_SIZE', fallback=5 * 1024 * 1024)  # 5 MB
-BACKUP_COUNT = config.getint('Logging', 'BACKUP_COUNT', fallback=5)
\ No newline at end of file
+BACKUP_COUNT = config.getint('Logging', 'BACKUP_COUNT', fallback=5)
+LOG_ASYNC = config.getboolean('Logging', 'LOG_ASYNC', fallback=True)  # write log files from a background thread
+LOG_QUEUE_SIZE = config.getint('Logging', 'LOG_QUEUE_SIZE', fallback=10000)  # records waiting to be written, 0 = unbounded
+LOG_JSON = config.getboolean('Logging', 'LOG_JSON', fallback=False)  # one JSON object per line in the log files
+LOG_SAMPLE_EVERY = config.getint('Logging', 'LOG_SAMPLE_EVERY', fallback=10)  # log 1 in N per-chunk events, 1 = all
+
+# Metrics settings
+METRICS_ENABLED = config.getboolean('Metrics', 'METRICS_ENABLED', fallback=True)
+METRICS_DIR = os.path.join(BASE_DIR, config.get('Metrics', 'METRICS_DIR', fallback='logs/metrics'))  # per-job JSON summaries
+METRICS_PROMETHEUS_FILE = config.get('Metrics', 'METRICS_PROMETHEUS_FILE', fallback='')  # '' = no Prometheus text file
+METRICS_PORT = config.getint('Metrics', 'METRICS_PORT', fallback=0)  # 0 = no /metrics endpoint
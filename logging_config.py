@@ -1,15 +1,201 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
-from config.settings import LOG_LEVEL, LOG_FORMAT, LOG_DIR, MAX_LOG_SIZE, BACKUP_COUNT
+import json
+import queue
+import atexit
+import threading
+from config.settings import (
+    LOG_LEVEL, LOG_FORMAT, LOG_DIR, MAX_LOG_SIZE, BACKUP_COUNT,
+    LOG_ASYNC, LOG_QUEUE_SIZE, LOG_JSON, LOG_SAMPLE_EVERY
+)
 
 # Dictionary to store created loggers
 logger_cache = {}
 
+# Pass as extra= on per-chunk messages in hot loops; LOG_SAMPLE_EVERY decides how many of them are kept
+SAMPLED = {'sampled': True}
+
+# Record attributes that are not user-supplied extras, left out of the JSON output
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sampled'}
+
+def log_file_name(module_name):
+    """
+    Returns the name of the log file of a module: the last two parts of a submodule name, e.g.
+    text.text_processor.log, or the module name of a top-level module.
+
+    :param module_name: Full module name (__name__)
+    :return: The log file name
+    """
+    parts = module_name.split('.')
+    if len(parts) > 1:
+        return f"{parts[-2]}.{parts[-1]}.log"
+    return f"{module_name}.log"
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line: time, level, logger, message, any extra fields
+    and the formatted exception.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def create_formatter():
+    """
+    Returns the formatter of the log files: JsonFormatter when LOG_JSON is set, otherwise LOG_FORMAT.
+    """
+    return JsonFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT)
+
+class SampleFilter(logging.Filter):
+    """
+    Keeps the first and then every Nth record of each sampled message (records logged with
+    extra=SAMPLED), counted per logger and message template. Warnings and errors always pass.
+    """
+
+    def __init__(self, every=LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(1, every)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.every == 1 or record.levelno >= logging.WARNING or not getattr(record, 'sampled', False):
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread and never blocks the caller:
+    when the queue is full, DEBUG and INFO records are dropped and counted, while warnings
+    and errors wait for room. Once the listener is stopped, records are written directly.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.direct_handlers = None
+
+    def prepare(self, record):
+        # Records stay in this process, so the message is formatted by the listener instead of the caller
+        return record
+
+    def enqueue(self, record):
+        if self.direct_handlers is not None:
+            for handler in self.direct_handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record)
+            else:
+                self.dropped += 1
+
+class ModuleFileHandler(logging.Handler):
+    """
+    Writes each record to the rotating log file of the module that logged it, used by the
+    queue listener so that every module keeps its own log file.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._handlers = {}
+
+    def _handler(self, module_name):
+        handler = self._handlers.get(module_name)
+        if handler is None:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            handler = RotatingFileHandler(
+                os.path.join(LOG_DIR, log_file_name(module_name)),
+                maxBytes=MAX_LOG_SIZE,
+                backupCount=BACKUP_COUNT
+            )
+            handler.setFormatter(create_formatter())
+            self._handlers[module_name] = handler
+        return handler
+
+    def emit(self, record):
+        self._handler(record.name).handle(record)
+
+    def close(self):
+        for handler in self._handlers.values():
+            handler.close()
+        super().close()
+
+def create_console_handler():
+    """
+    Returns the console handler, showing only warnings and errors.
+    """
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    console_handler.setLevel(logging.WARNING)  # Only show warnings and errors in console
+    return console_handler
+
+# Queue handler shared by every logger and the listener writing its records, started on first use
+_queue_handler = None
+_listener = None
+_listener_lock = threading.Lock()
+
+def get_queue_handler():
+    """
+    Returns the shared queue handler, starting the listener thread that writes the log files on first use.
+
+    :return: LazyQueueHandler
+    """
+    global _queue_handler, _listener
+    with _listener_lock:
+        if _queue_handler is None:
+            log_queue = queue.Queue(max(0, LOG_QUEUE_SIZE))
+            _queue_handler = LazyQueueHandler(log_queue)
+            _listener = QueueListener(log_queue, ModuleFileHandler(), create_console_handler(), respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+        return _queue_handler
+
+def shutdown_logging():
+    """
+    Writes the queued records and stops the listener thread; records logged afterwards are
+    written directly. Called automatically at exit.
+    """
+    with _listener_lock:
+        if _listener is None or _queue_handler.direct_handlers is not None:
+            return
+        _queue_handler.direct_handlers = _listener.handlers
+        _listener.stop()
+    if _queue_handler.dropped:
+        logging.getLogger(__name__).warning(f"Dropped {_queue_handler.dropped} log records while the log queue was full")
+
+def flush_logging():
+    """
+    Waits until every record queued so far has been written.
+    """
+    if _listener is not None and _queue_handler.direct_handlers is None:
+        _listener.queue.join()
+
 def get_logger(module_name):
     """
     Create and return a logger with both file and console handlers.
     If a logger for the module already exists, return the existing logger.
+    With LOG_ASYNC, records are handed to a background thread through a queue and formatted
+    and written there, so logging does not block the calling thread on file I/O.
 
     :param module_name: Full module name (__name__)
     :return: Configured logger
@@ -18,35 +204,27 @@ def get_logger(module_name):
     if module_name in logger_cache:
         return logger_cache[module_name]
 
-    # Split the module name to get the directory and file name
-    parts = module_name.split('.')
-    if len(parts) > 1:
-        # If it's a submodule, use last two parts
-        log_file = f"{parts[-2]}.{parts[-1]}.log"
-    else:
-        # If it's a top-level module, just use the module name
-        log_file = f"{module_name}.log"
-
     logger = logging.getLogger(module_name)
     logger.setLevel(LOG_LEVEL)
 
     # Only add handlers if they don't exist
     if not logger.handlers:
-        # File Handler with rotation
-        os.makedirs(LOG_DIR, exist_ok=True)
-        file_handler = RotatingFileHandler(
-            os.path.join(LOG_DIR, log_file),
-            maxBytes=MAX_LOG_SIZE,
-            backupCount=BACKUP_COUNT
-        )
-        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-        logger.addHandler(file_handler)
-
-        # Console Handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
-        console_handler.setLevel(logging.WARNING)  # Only show warnings and errors in console
-        logger.addHandler(console_handler)
+        if LOG_ASYNC:
+            logger.addHandler(get_queue_handler())
+        else:
+            # File Handler with rotation
+            os.makedirs(LOG_DIR, exist_ok=True)
+            file_handler = RotatingFileHandler(
+                os.path.join(LOG_DIR, log_file_name(module_name)),
+                maxBytes=MAX_LOG_SIZE,
+                backupCount=BACKUP_COUNT
+            )
+            file_handler.setFormatter(create_formatter())
+            logger.addHandler(file_handler)
+
+            # Console Handler
+            logger.addHandler(create_console_handler())
+        logger.addFilter(SampleFilter())
 
     # Cache the logger
     logger_cache[module_name] = logger
@@ -60,4 +238,4 @@ def get_module_logger(module_name):
     :param module_name: Name of the module (__name__)
     :return: Logger for the specified module
     """
-    return get_logger(module_name)
\ No newline at end of file
+    return get_logger(module_name)
@@ -0,0 +1,203 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.settings import LANGUAGES, VOICES, METRICS_PROMETHEUS_FILE, METRICS_PORT
+from speech.speech_processor import process_audio_file
+from text.text_processor import process_file
+from main import generate_audio_book, translate_audio_file
+from utils.common import load_env_variables
+from utils.metrics import job_metrics, write_prometheus, start_metrics_server
+from logging_config import get_module_logger
+
+logger = get_module_logger(__name__)
+
+# Operations accepted in a job manifest
+OPERATIONS = (
+    'translate_document', 'summarize', 'analyze_sentiment', 'transcribe',
+    'translate_audio', 'text_to_speech', 'audio_book', 'audio_to_audio'
+)
+
+def resolve_language(value):
+    """
+    Resolves a language given by name ("Spanish") or code ("es-ES") to a (name, code) tuple.
+
+    :param value: Language name or code
+    :return: Tuple of (language name, language code)
+    :raises ValueError: If the language is not in LANGUAGES
+    """
+    for name, code in LANGUAGES.values():
+        if value.lower() in (name.lower(), code.lower()):
+            return name, code
+    raise ValueError(f"Unsupported language: {value}")
+
+def resolve_voice(value):
+    """
+    Resolves a voice given by name ("Female") to its voice gender.
+
+    :param value: Voice name
+    :return: The voice gender
+    :raises ValueError: If the voice is not in VOICES
+    """
+    for name, gender in VOICES.values():
+        if value.lower() == name.lower():
+            return gender
+    raise ValueError(f"Unsupported voice: {value}")
+
+def load_manifest(manifest_path):
+    """
+    Loads jobs from a JSONL manifest, one JSON object per line.
+
+    :param manifest_path: Path to the manifest file
+    :return: List of job dictionaries
+    :raises ValueError: If a line is not valid JSON or a job is missing required fields
+    """
+    jobs = []
+    with open(manifest_path, 'r', encoding='utf-8') as manifest:
+        for line_number, line in enumerate(manifest, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on manifest line {line_number}: {str(e)}")
+            for field in ('operation', 'input', 'output'):
+                if field not in job:
+                    raise ValueError(f"Manifest line {line_number} is missing '{field}'")
+            if job['operation'] not in OPERATIONS:
+                raise ValueError(f"Manifest line {line_number} has unsupported operation: {job['operation']}")
+            job.setdefault('id', str(line_number))
+            jobs.append(job)
+    logger.info(f"Loaded {len(jobs)} jobs from manifest: {manifest_path}")
+    return jobs
+
+def execute_job(job):
+    """
+    Runs one manifest job through the same processing functions as the interactive menu.
+
+    :param job: Job dictionary with operation, input, output and optional languages, voice and max_words
+    :return: Path of the produced output file
+    :raises ValueError: If the job fails
+    """
+    operation = job['operation']
+    input_file, output_file = job['input'], job['output']
+    source_lang, source_code = resolve_language(job.get('source_lang', 'English'))
+    target_lang, target_code = resolve_language(job.get('target_lang', job.get('source_lang', 'English')))
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if operation == 'translate_document':
+        result = process_file(input_file, output_file, 'translate', source_lang=source_lang, target_lang=target_lang)
+    elif operation == 'summarize':
+        result = process_file(input_file, output_file, 'summarize', max_words=job.get('max_words', 100))
+    elif operation == 'analyze_sentiment':
+        result = process_file(input_file, output_file, 'analyze_sentiment')
+    elif operation == 'transcribe':
+        result = process_audio_file(input_file, output_file, 'transcribe', language_code=source_code)
+    elif operation == 'translate_audio':
+        result = process_audio_file(input_file, output_file, 'translate', source_lang=source_code, target_lang=target_code)
+    elif operation in ('text_to_speech', 'audio_book'):
+        if operation == 'text_to_speech':
+            target_lang, target_code = source_lang, source_code
+        result = generate_audio_book(input_file, os.path.splitext(output_file)[0], source_lang, target_lang,
+                                     target_code, resolve_voice(job.get('voice', 'Neutral')))
+    else:
+        result = translate_audio_file(input_file, os.path.splitext(output_file)[0], source_lang, source_code,
+                                      target_lang, target_code, resolve_voice(job.get('voice', 'Neutral')))
+
+    if not result:
+        raise ValueError(f"Operation {operation} produced no output")
+    return result
+
+def run_job(job):
+    """
+    Runs one job and records its outcome and timing. The stage timings, API latencies and volumes
+    of the job are written to a JSON metrics summary in METRICS_DIR.
+
+    :param job: Job dictionary
+    :return: Result dictionary with id, operation, input, output, status, error, started_at, duration_seconds
+             and metrics (path of the metrics summary)
+    """
+    started_at = datetime.now().isoformat(timespec='seconds')
+    start = time.perf_counter()
+    result = {'id': job['id'], 'operation': job['operation'], 'input': job['input'], 'output': None,
+              'status': 'ok', 'error': None, 'started_at': started_at}
+    with job_metrics(job['id'], operation=job['operation'], input=job['input']) as summary:
+        try:
+            result['output'] = execute_job(job)
+        except Exception as e:
+            logger.exception(f"Job {job['id']} failed: {str(e)}")
+            result['status'] = 'failed'
+            result['error'] = str(e)
+    result['duration_seconds'] = round(time.perf_counter() - start, 3)
+    result['metrics'] = summary['path']
+    return result
+
+def run_jobs(jobs, results_path, workers=4):
+    """
+    Runs jobs through a worker pool and appends each result to a JSONL results file as it completes.
+
+    :param jobs: List of job dictionaries
+    :param results_path: Path of the JSONL results file
+    :param workers: Number of jobs run in parallel (default: 4)
+    :return: List of result dictionaries in completion order
+    """
+    logger.info(f"Running {len(jobs)} jobs with {workers} workers. Results: {results_path}")
+    results_dir = os.path.dirname(results_path)
+    if results_dir:
+        os.makedirs(results_dir, exist_ok=True)
+    lock = threading.Lock()
+    results = []
+    with open(results_path, 'a', encoding='utf-8') as results_file, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            with lock:
+                results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                results_file.flush()
+                results.append(result)
+            logger.info(f"Job {result['id']} {result['status']} in {result['duration_seconds']}s")
+            if METRICS_PROMETHEUS_FILE:
+                write_prometheus(METRICS_PROMETHEUS_FILE)
+    return results
+
+def parse_args(argv=None):
+    """
+    Parses the command-line arguments of the batch runner.
+    """
+    parser = argparse.ArgumentParser(description="Run speech and text processing jobs from a JSONL manifest without prompts.")
+    parser.add_argument('manifest', help="Path to a JSONL manifest with one job per line")
+    parser.add_argument('--workers', type=int, default=4, help="Number of jobs run in parallel (default: 4)")
+    parser.add_argument('--results', default=None, help="Path of the JSONL results file (default: <manifest>.results.jsonl)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """
+    Entry point of the headless batch runner.
+
+    :return: Process exit code (0 if every job succeeded, 1 otherwise)
+    """
+    args = parse_args(argv)
+    results_path = args.results or os.path.splitext(args.manifest)[0] + ".results.jsonl"
+    load_env_variables()
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    jobs = load_manifest(args.manifest)
+    start = time.perf_counter()
+    results = run_jobs(jobs, results_path, workers=max(1, args.workers))
+    failed = sum(1 for result in results if result['status'] != 'ok')
+    print(json.dumps({'jobs': len(results), 'failed': failed, 'results': results_path,
+                      'duration_seconds': round(time.perf_counter() - start, 3)}))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,14 +6,15 @@ from config.settings import (
     LANGUAGES, VOICES, AUDIO_OUTPUT_DIR, DOCUMENT_INPUT_DIR, DOCUMENT_OUTPUT_DIR,
     AUDIO_BOOK_INPUT_DIR, AUDIO_BOOK_OUTPUT_DIR, AUDIO_TO_TEXT_INPUT_DIR,
     AUDIO_TO_TEXT_OUTPUT_DIR, AUDIO_TRANSLATION_INPUT_DIR, AUDIO_TRANSLATION_OUTPUT_DIR,
-    DEFAULT_AUDIO_DURATION
+    DEFAULT_AUDIO_DURATION, METRICS_PORT, STREAM_RESPONSES
 )
 from speech.speech_processor import (
-    record_audio, process_audio, process_audio_file, play_audio, save_audio,
-    save_large_audio
+    record_audio, process_audio, process_audio_file, play_audio, save_audio, text_to_speech,
+    iter_text_to_speech_large, save_large_audio, live_transcribe, iter_live_transcripts, iter_audio_transcripts, translate_speech_pipeline
 )
-from text.text_processor import process_text, process_file
-from utils.common import get_language_choice, get_filename, load_env_variables, write_file, read_file
+from text.text_processor import process_text, process_text_stream, process_file
+from utils.common import get_language_choice, get_filename, load_env_variables, write_file, read_file, check_text_size
+from utils.metrics import start_metrics_server
 from logging_config import get_module_logger
 
 logger = get_module_logger(__name__)
@@ -24,6 +25,8 @@ def main():
     """
     logger.info("Starting Speech and Text Processing Application")
     load_env_variables()
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
 
     while True:
         logger.info("Displaying main menu")
@@ -77,6 +80,66 @@ def main():
             logger.warning(f"Invalid choice entered: {choice}")
             print("Invalid choice. Please try again.")
 
+def print_live_transcript(text, is_final):
+    """
+    Prints a live transcription update, overwriting interim hypotheses on the same line.
+    """
+    if is_final:
+        print(f"\r{text}")
+    else:
+        print(f"\r{text}", end="", flush=True)
+
+def echo_stream(pieces):
+    """
+    Prints streamed output pieces as they pass through.
+    """
+    for piece in pieces:
+        print(piece, end="", flush=True)
+        yield piece
+
+def print_stream(label, pieces):
+    """
+    Prints streamed output (e.g. from process_text_stream) as it is generated.
+
+    :param label: Label printed before the output
+    :param pieces: Iterable of output pieces
+    :return: The complete output, or None if the stream failed or was empty
+    """
+    print(f"{label}: ", end="", flush=True)
+    try:
+        text = "".join(echo_stream(pieces)).strip()
+    except Exception as e:
+        print()
+        logger.error(f"Streamed output failed: {str(e)}")
+        return None
+    print()
+    return text or None
+
+def speak_translation(transcripts, source_lang, target_lang, target_code, voice_gender):
+    """
+    Translates transcribed speech and plays every translated sentence as soon as it is synthesized,
+    while the speech is still being transcribed and the rest of the translation generated.
+
+    :param transcripts: Iterable of transcribed texts, in order
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param target_code: Target language code used for speech synthesis
+    :param voice_gender: Voice gender used for speech synthesis
+    :return: List of the audio contents played, or None if transcription, translation or synthesis failed
+    """
+    audio_contents = []
+    try:
+        for sentence, audio_content in translate_speech_pipeline(transcripts, source_lang, target_lang, target_code, voice_gender):
+            if not audio_contents:
+                logger.info("Playing the first translated sentence")
+            print(f"Translated: {sentence}")
+            play_audio(audio_content)
+            audio_contents.append(audio_content)
+    except Exception as e:
+        logger.error(f"Pipelined speech translation failed: {str(e)}")
+        return None
+    return audio_contents or None
+
 def handle_speech_to_text(languages, translate=False):
     """
     Handle speech-to-text conversion with optional translation.
@@ -85,14 +148,19 @@ def handle_speech_to_text(languages, translate=False):
     try:
         source_lang, source_code = get_language_choice("Select the language you'll speak in:", languages)
         duration = int(input(f"Enter recording duration in seconds (default: {DEFAULT_AUDIO_DURATION}): ") or DEFAULT_AUDIO_DURATION)
-        
-        audio_file = record_audio(duration)
-        if not audio_file:
-            logger.error("Failed to record audio")
-            print("Failed to record audio. Please try again.")
-            return
+        live = input("Use live transcription? (y/n): ").lower() == 'y'
 
-        text = process_audio(audio_file, 'transcribe', language_code=source_code)
+        if live:
+            print("Listening...")
+            text = live_transcribe(source_code, duration, on_update=print_live_transcript)
+        else:
+            audio_file = record_audio(duration)
+            if not audio_file:
+                logger.error("Failed to record audio")
+                print("Failed to record audio. Please try again.")
+                return
+
+            text = process_audio(audio_file, 'transcribe', language_code=source_code)
 
         if not text:
             logger.error("Speech transcription failed")
@@ -157,9 +225,12 @@ def handle_text_translation(languages):
     source_lang, _ = get_language_choice("Select the source language:", languages)
     target_lang, _ = get_language_choice("Select the target language:", languages)
     text = input("Enter the text to translate: ")
-    translated_text = process_text(text, 'translate', source_lang=source_lang, target_lang=target_lang)
+    if STREAM_RESPONSES:
+        print_stream("Translated text", process_text_stream(text, 'translate', source_lang=source_lang, target_lang=target_lang))
+    else:
+        translated_text = process_text(text, 'translate', source_lang=source_lang, target_lang=target_lang)
+        print(f"Translated text: {translated_text}")
     logger.info("Text translation completed")
-    print(f"Translated text: {translated_text}")
 
 def handle_speech_to_speech(languages, voices):
     """
@@ -168,26 +239,61 @@ def handle_speech_to_speech(languages, voices):
     logger.info("Starting speech-to-speech translation process")
     source_lang, source_code = get_language_choice("Select the language you'll speak in:", languages)
     target_lang, target_code = get_language_choice("Select the target language for translation:", languages)
+    voice_name, voice_gender = get_language_choice("Select the voice gender for the output speech:", voices)
     
     duration = int(input(f"Enter recording duration in seconds (default: {DEFAULT_AUDIO_DURATION}): ") or DEFAULT_AUDIO_DURATION)
-    logger.info(f"Recording audio for {duration} seconds")
-    audio_file = record_audio(duration)
-    
-    logger.info("Transcribing and translating audio")
-    translated_text = process_audio(audio_file, 'translate', source_lang=source_code, target_lang=target_code)
+    live = input("Use live transcription? (y/n): ").lower() == 'y'
+
+    if STREAM_RESPONSES:
+        # Each utterance or segment is translated and spoken while the next one is being transcribed
+        if live:
+            logger.info(f"Transcribing live audio for {duration} seconds")
+            print("Listening...")
+            transcripts = iter_live_transcripts(source_code, duration, on_update=print_live_transcript)
+        else:
+            logger.info(f"Recording audio for {duration} seconds")
+            audio_file = record_audio(duration)
+            if not audio_file:
+                logger.error("Audio recording failed")
+                print("Speech transcription failed. Please try again.")
+                return
+            transcripts = iter_audio_transcripts(audio_file, source_code)
+        logger.info(f"Translating and speaking each sentence with {voice_name} voice as it is transcribed")
+        audio_content = speak_translation(transcripts, source_code, target_code, target_code, voice_gender)
+    else:
+        if live:
+            logger.info(f"Transcribing live audio for {duration} seconds")
+            print("Listening...")
+            text = live_transcribe(source_code, duration, on_update=print_live_transcript)
+        else:
+            logger.info(f"Recording audio for {duration} seconds")
+            audio_file = record_audio(duration)
+
+            logger.info("Transcribing audio")
+            text = process_audio(audio_file, 'transcribe', language_code=source_code) if audio_file else None
+        if not text:
+            logger.error("Speech transcription failed")
+            print("Speech transcription failed. Please try again.")
+            return
+
+        logger.info("Translating transcription")
+        translated_text = process_text(text, 'translate', source_lang=source_code, target_lang=target_code)
+        print(f"Translated text: {translated_text}")
+        logger.info(f"Converting translated text to speech with {voice_name} voice")
+        audio_content = process_audio(translated_text, 'text_to_speech', text=translated_text, language_code=target_code, voice_gender=voice_gender) if translated_text else None
+        if audio_content:
+            logger.info("Playing translated audio")
+            play_audio(audio_content)
     logger.info("Audio transcription and translation completed")
-    print(f"Translated text: {translated_text}")
 
-    voice_name, voice_gender = get_language_choice("Select the voice gender for the output speech:", voices)
-    logger.info(f"Converting translated text to speech with {voice_name} voice")
-    audio_content = process_audio(translated_text, 'text_to_speech', text=translated_text, language_code=target_code, voice_gender=voice_gender)
     if audio_content:
-        logger.info("Playing translated audio")
-        play_audio(audio_content)
         save_option = input("Do you want to save the translated audio? (y/n): ").lower()
         if save_option == 'y':
             base_filename = input("Enter a filename (without extension, default: translated_speech): ").strip() or "translated_speech"
-            saved_path = save_audio(audio_content, base_filename)
+            if isinstance(audio_content, list):
+                saved_path = save_large_audio(audio_content, base_filename)
+            else:
+                saved_path = save_audio(audio_content, base_filename)
             if saved_path:
                 logger.info(f"Translated audio saved as: {saved_path}")
                 print(f"Translated audio saved as: {saved_path}")
@@ -237,7 +343,6 @@ def handle_audio_book_generation(languages, voices):
     input_file = os.path.join(AUDIO_BOOK_INPUT_DIR, input_filename)
     output_file = os.path.join(AUDIO_BOOK_OUTPUT_DIR, output_filename)
 
-    logger.info(f"Generating audio book from {input_file}")
     logger.info(f"Source language: {source_lang}, Target language: {target_lang}, Voice gender: {voice_name}")
     print(f"Generating audio book from {input_file}...")
     print(f"Source language: {source_lang}")
@@ -245,45 +350,69 @@ def handle_audio_book_generation(languages, voices):
     print(f"Voice gender: {voice_name}")
 
     try:
-        # Read the input file
-        content = read_file(input_file)
-        logger.info("Input file read successfully")
-
-        # Translate if necessary
-        if source_lang != target_lang:
-            logger.info("Translating content")
-            content = process_text(content, 'translate', source_lang=source_lang, target_lang=target_lang)
-            logger.info("Content translation completed")
-
-        # Convert text to speech
-        audio_content = process_audio(content, 'text_to_speech', text=content, language_code=target_code, voice_gender=voice_gender)
-        
-        if audio_content:
-            # Save the audio book
-            if isinstance(audio_content, list):
-                generated_file = save_large_audio(audio_content, output_file, use_unique_name=False)
-            else:
-                generated_file = save_audio(audio_content, output_file, use_unique_name=False)
-            
-            if generated_file:
-                logger.info(f"Audio book generated successfully: {generated_file}")
-                print(f"Audio book generated successfully!")
-                print(f"Saved as: {generated_file}")
-                
-                play_option = input("Would you like to play the generated audio? (y/n): ").lower()
-                if play_option == 'y':
-                    logger.info("Playing generated audio book")
-                    play_audio(generated_file)
-            else:
-                logger.error("Failed to save audio book")
-                print("Failed to save audio book.")
-        else:
-            logger.error("Failed to generate audio content")
-            print("Failed to generate audio book.")
+        generated_file = generate_audio_book(input_file, output_file, source_lang, target_lang, target_code, voice_gender)
+        print(f"Audio book generated successfully!")
+        print(f"Saved as: {generated_file}")
+
+        play_option = input("Would you like to play the generated audio? (y/n): ").lower()
+        if play_option == 'y':
+            logger.info("Playing generated audio book")
+            play_audio(generated_file)
     except Exception as e:
         logger.exception(f"An error occurred during audio book generation: {str(e)}")
         print(f"An error occurred during audio book generation: {str(e)}")
 
+def generate_audio_book(input_file, output_file, source_lang, target_lang, target_code, voice_gender):
+    """
+    Generate an audio book from a text file, translating it first when the languages differ.
+
+    :param input_file: Path to the input document
+    :param output_file: Path of the audio book without extension
+    :param source_lang: Source language name
+    :param target_lang: Target language name
+    :param target_code: Target language code used for speech synthesis
+    :param voice_gender: Voice gender used for speech synthesis
+    :return: Path of the generated audio book
+    :raises ValueError: If translation, synthesis or saving fails
+    """
+    logger.info(f"Generating audio book from {input_file}")
+    # Read the input file
+    content = read_file(input_file)
+    logger.info("Input file read successfully")
+
+    # Translate if necessary
+    if source_lang != target_lang:
+        logger.info("Translating content")
+        content = process_text(content, 'translate', source_lang=source_lang, target_lang=target_lang)
+        if not content:
+            raise ValueError("Content translation failed")
+        logger.info("Content translation completed")
+
+    # Convert text to speech; large texts are written to the audio book as their chunks are synthesized
+    if check_text_size(content):
+        errors = []
+
+        def audio_contents():
+            try:
+                yield from iter_text_to_speech_large(content, target_code, voice_gender)
+            except Exception as e:
+                errors.append(e)
+                raise
+
+        generated_file = save_large_audio(audio_contents(), output_file, use_unique_name=False)
+        if errors:
+            raise ValueError(str(errors[0])) from errors[0]
+    else:
+        audio_content = text_to_speech(content, target_code, voice_gender)
+        if not audio_content:
+            raise ValueError("Failed to generate audio content")
+        generated_file = save_audio(audio_content, output_file, use_unique_name=False)
+    if not generated_file:
+        raise ValueError("Failed to save audio book")
+
+    logger.info(f"Audio book generated successfully: {generated_file}")
+    return generated_file
+
 def handle_audio_to_text_translation(languages):
     """
     Handle the translation of an audio file to a text file.
@@ -332,52 +461,60 @@ def handle_audio_to_audio_translation(languages, voices):
     output_file = os.path.join(AUDIO_TRANSLATION_OUTPUT_DIR, output_filename)
 
     try:
-        # Step 1: Audio to Text (Transcription)
-        logger.info("Step 1: Transcribing audio to text")
-        transcribed_text = process_audio(input_file, 'transcribe', language_code=source_code)
-        if not transcribed_text:
-            raise ValueError("Audio transcription failed")
-        # print(f"Transcribed text: {transcribed_text}")
-
-        # Step 2: Text Translation
-        logger.info("Step 2: Translating text")
-        translated_text = process_text(transcribed_text, 'translate', source_lang=source_lang, target_lang=target_lang)
-        if not translated_text:
-            raise ValueError("Text translation failed")
-        # print(f"Translated text: {translated_text}")
-
-        # Step 3: Text to Speech
-        logger.info("Step 3: Converting translated text to speech")
-        audio_content = process_audio(translated_text, 'text_to_speech', text=translated_text, language_code=target_code, voice_gender=voice_gender)
-        if not audio_content:
-            raise ValueError("Text-to-speech conversion failed")
-
-        # Save the audio content
-        if audio_content:
-            if isinstance(audio_content, list):
-                generated_file = save_large_audio(audio_content, output_file, use_unique_name=False)
-            else:
-                generated_file = save_audio(audio_content, output_file, use_unique_name=False)
-            
-            if generated_file:
-                logger.info(f"Translated audio generated successfully: {generated_file}")
-                print(f"Translated audio generated successfully!")
-                print(f"Saved as: {generated_file}")
-                
-                play_option = input("Would you like to play the translated audio? (y/n): ").lower()
-                if play_option == 'y':
-                    logger.info("Playing translated audio")
-                    play_audio(generated_file)
-            else:
-                logger.error("Failed to save translated audio")
-                print("Failed to save translated audio.")
-        else:
-            logger.error("Failed to generate audio content")
-            print("Failed to generate translated audio.")
+        generated_file = translate_audio_file(input_file, output_file, source_lang, source_code, target_lang, target_code, voice_gender)
+        print(f"Translated audio generated successfully!")
+        print(f"Saved as: {generated_file}")
+
+        play_option = input("Would you like to play the translated audio? (y/n): ").lower()
+        if play_option == 'y':
+            logger.info("Playing translated audio")
+            play_audio(generated_file)
     except Exception as e:
         logger.exception(f"An error occurred during audio translation: {str(e)}")
         print(f"An error occurred during audio translation: {str(e)}")
 
+def translate_audio_file(input_file, output_file, source_lang, source_code, target_lang, target_code, voice_gender):
+    """
+    Translate an audio file into an audio file in another language.
+
+    :param input_file: Path to the input audio file
+    :param output_file: Path of the translated audio without extension
+    :param source_lang: Source language name
+    :param source_code: Source language code used for transcription
+    :param target_lang: Target language name
+    :param target_code: Target language code used for speech synthesis
+    :param voice_gender: Voice gender used for speech synthesis
+    :return: Path of the translated audio file
+    :raises ValueError: If transcription, translation, synthesis or saving fails
+    """
+    # Transcription, translation and speech synthesis overlap: each transcribed segment is translated
+    # and synthesized while the next ones are transcribed, and the audio is written as it arrives
+    logger.info("Transcribing, translating and converting the audio to speech")
+    transcripts = iter_audio_transcripts(input_file, source_code)
+    pipeline = translate_speech_pipeline(transcripts, source_lang, target_lang, target_code, voice_gender, by_sentence=False)
+    errors = []
+    pieces = []
+
+    def audio_contents():
+        try:
+            for _, audio_content in pipeline:
+                pieces.append(len(audio_content))
+                yield audio_content
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    generated_file = save_large_audio(audio_contents(), output_file, use_unique_name=False)
+    if errors:
+        raise ValueError(str(errors[0])) from errors[0]
+    if not pieces:
+        raise ValueError("Audio transcription failed: no speech recognized")
+    if not generated_file:
+        raise ValueError("Failed to save translated audio")
+
+    logger.info(f"Translated audio generated successfully: {generated_file}")
+    return generated_file
+
     
 def handle_sentiment_analysis():
     """
@@ -386,10 +523,14 @@ def handle_sentiment_analysis():
     logger.info("Starting sentiment analysis process")
     text = input("Enter the text for sentiment analysis: ")
     logger.info("Performing sentiment analysis")
-    sentiment = process_text(text, 'analyze_sentiment')
+    if STREAM_RESPONSES:
+        sentiment = print_stream("Sentiment", process_text_stream(text, 'analyze_sentiment'))
+    else:
+        sentiment = process_text(text, 'analyze_sentiment')
+        if sentiment:
+            print(f"Sentiment: {sentiment}")
     if sentiment:
         logger.info(f"Sentiment analysis completed. Result: {sentiment}")
-        print(f"Sentiment: {sentiment}")
     else:
         logger.error("Sentiment analysis failed")
         print("Failed to analyze sentiment.")
@@ -402,10 +543,14 @@ def handle_text_summarization():
     text = input("Enter the text to summarize: ")
     max_words = int(input("Enter the maximum number of words for the summary: "))
     logger.info(f"Summarizing text with max words: {max_words}")
-    summary = process_text(text, 'summarize', max_words=max_words)
+    if STREAM_RESPONSES:
+        summary = print_stream("Summary", process_text_stream(text, 'summarize', max_words=max_words))
+    else:
+        summary = process_text(text, 'summarize', max_words=max_words)
+        if summary:
+            print(f"Summary: {summary}")
     if summary:
         logger.info("Text summarization completed")
-        print(f"Summary: {summary}")
     else:
         logger.error("Text summarization failed")
         print("Failed to summarize text.")
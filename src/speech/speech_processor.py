@@ -1,29 +1,85 @@
 import os
 import io
 import wave
-import pyaudio
-import pygame
+import asyncio
 from datetime import datetime
-from google.cloud import speech, texttospeech
-from pydub import AudioSegment
 
-from text.text_processor import process_text, translate_large_text
-from utils.common import read_file, write_file, generate_unique_filename, split_content, check_audio_duration, check_text_size
-from logging_config import get_module_logger
+from text.text_processor import process_text, aprocess_text, translate_large_text, translate_text_chunk, translate_text_chunk_stream
+from utils.common import read_file, write_file, generate_unique_filename, check_audio_duration, check_text_size, file_size, partial_path
+from utils.chunking import chunk_text, iter_sentences
+from utils.concurrency import imap_ordered, aimap_ordered, agather_ordered, get_semaphore
+from utils.cache import get_cache, make_cache_key
+from utils.checkpoint import get_checkpoint_store, JobCheckpoint
+from utils.mp3 import Mp3StreamWriter
+from utils.audio_segments import split_audio_on_silence
+from utils.clients import get_client
+from utils.throttling import get_provider_limiter
+from utils.metrics import stage, record_bytes
+from utils.pipeline import PipelineStage, run_pipeline
+from logging_config import get_module_logger, SAMPLED
 from config.settings import (
     AUDIO_SAMPLE_RATE, DEFAULT_AUDIO_DURATION, AUDIO_OUTPUT_DIR,
-    GOOGLE_APPLICATION_CREDENTIALS
+    TTS_MAX_IN_FLIGHT,
+    TTS_CACHE_ENABLED, TTS_CACHE_PATH, TTS_CACHE_MAX_BYTES, CHECKPOINTS_ENABLED, CHECKPOINT_PATH,
+    CHECKPOINT_MAX_AGE_DAYS, TRANSCRIPTION_MAX_IN_FLIGHT,
+    TRANSCRIPTION_SEGMENT_SECONDS, MIN_SILENCE_MS, ASYNC_SPEECH_MAX_IN_FLIGHT, ASYNC_TTS_MAX_IN_FLIGHT,
+    TRANSLATION_MAX_IN_FLIGHT
 )
 
 # Get logger for this module
 logger = get_module_logger(__name__)
 
-# Initialize Google Cloud clients
-speech_client = speech.SpeechClient()
-tts_client = texttospeech.TextToSpeechClient()
+# Text-to-Speech rejects requests whose input exceeds 5000 bytes
+TTS_MAX_REQUEST_BYTES = 5000
 
-# Set Google Cloud credentials
-os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = GOOGLE_APPLICATION_CREDENTIALS
+def get_speech_client():
+    """
+    Returns the shared Google Cloud Speech-to-Text client, creating it on first use.
+
+    :return: SpeechClient
+    """
+    return get_client('speech')
+
+def get_async_speech_client():
+    """
+    Returns the shared async Speech-to-Text client, creating it on first use.
+
+    :return: SpeechAsyncClient
+    """
+    return get_client('speech_async')
+
+def get_async_tts_client():
+    """
+    Returns the shared async Text-to-Speech client, creating it on first use.
+
+    :return: TextToSpeechAsyncClient
+    """
+    return get_client('tts_async')
+
+def get_tts_client():
+    """
+    Returns the shared Google Cloud Text-to-Speech client, creating it on first use.
+
+    :return: TextToSpeechClient
+    """
+    return get_client('tts')
+
+def get_speech_limiter():
+    """
+    Returns the rate limiter shared by every Speech-to-Text request, sync and async.
+
+    :return: ProviderLimiter
+    """
+    return get_provider_limiter('speech')
+
+def get_tts_limiter():
+    """
+    Returns the rate limiter shared by every Text-to-Speech request, sync and async.
+    Its token budget counts synthesized characters.
+
+    :return: ProviderLimiter
+    """
+    return get_provider_limiter('tts')
 
 def process_audio(audio_content, operation, **kwargs):
     """
@@ -109,6 +165,8 @@ def record_audio(duration=DEFAULT_AUDIO_DURATION, sample_rate=AUDIO_SAMPLE_RATE)
     :param sample_rate: The sample rate of the audio (default: AUDIO_SAMPLE_RATE)
     :return: The path of the saved audio file or None if an error occurred
     """
+    import pyaudio
+
     CHUNK = 1024
     FORMAT = pyaudio.paInt16
     CHANNELS = 1
@@ -149,35 +207,169 @@ def record_audio(duration=DEFAULT_AUDIO_DURATION, sample_rate=AUDIO_SAMPLE_RATE)
         logger.exception(f"An error occurred during audio recording: {e}")
         return None
 
-def transcribe_audio(audio_file, language_code):
+def microphone_chunks(duration=None, sample_rate=AUDIO_SAMPLE_RATE, chunk_size=1024, audio_interface=None):
     """
-    Transcribes audio to text using Google Cloud Speech-to-Text API.
+    Captures audio from the microphone and yields raw 16-bit mono PCM chunks as they are recorded.
     
-    :param audio_file: The path to the audio file
-    :param language_code: The language code of the audio
-    :return: The transcribed text
+    :param duration: Recording duration in seconds, or None to record until the consumer stops iterating
+    :param sample_rate: The sample rate of the audio (default: AUDIO_SAMPLE_RATE)
+    :param chunk_size: Number of frames per chunk (default: 1024)
+    :param audio_interface: Optional PyAudio-compatible object (default: a new pyaudio.PyAudio())
+    :yield: Raw audio chunks (bytes)
     """
-    logger.info(f"Starting audio transcription. File: {audio_file}, Language: {language_code}")
+    import pyaudio
+
+    logger.info(f"Starting live microphone capture. Duration: {duration}s, Sample rate: {sample_rate}Hz")
+    p = audio_interface or pyaudio.PyAudio()
+    stream = p.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, input=True, frames_per_buffer=chunk_size)
     try:
-        with io.open(audio_file, "rb") as audio_file:
-            content = audio_file.read()
+        remaining = int(sample_rate / chunk_size * duration) if duration else None
+        while remaining is None or remaining > 0:
+            try:
+                yield stream.read(chunk_size, exception_on_overflow=False)
+            except IOError as e:
+                logger.warning(f"Dropped frame due to I/O error: {e}")
+            if remaining is not None:
+                remaining -= 1
+    finally:
+        stream.stop_stream()
+        stream.close()
+        p.terminate()
+        logger.info("Live microphone capture finished")
 
-        audio = speech.RecognitionAudio(content=content)
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.MP3,
-            sample_rate_hertz=AUDIO_SAMPLE_RATE,
+def stream_transcribe(audio_chunks, language_code, sample_rate=AUDIO_SAMPLE_RATE, interim_results=True, client=None):
+    """
+    Transcribes audio chunks with Google Cloud streaming recognition while they are being captured.
+    
+    :param audio_chunks: Iterable of raw 16-bit mono PCM chunks (e.g. from microphone_chunks)
+    :param language_code: The language code of the audio
+    :param sample_rate: The sample rate of the audio (default: AUDIO_SAMPLE_RATE)
+    :param interim_results: Whether to yield interim (non-final) hypotheses (default: True)
+    :param client: Optional client providing streaming_recognize (default: the shared Speech client)
+    :yield: Dictionaries with 'text', 'is_final' and 'stability'
+    """
+    from google.cloud import speech
+
+    logger.info(f"Starting streaming transcription. Language: {language_code}")
+    client = client or get_speech_client()
+    streaming_config = speech.StreamingRecognitionConfig(
+        config=speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
             language_code=language_code,
-        )
+            enable_automatic_punctuation=True,
+        ),
+        interim_results=interim_results,
+    )
+    requests = (speech.StreamingRecognizeRequest(audio_content=chunk) for chunk in audio_chunks)
+    for response in client.streaming_recognize(config=streaming_config, requests=requests):
+        for result in response.results:
+            if not result.alternatives:
+                continue
+            yield {
+                'text': result.alternatives[0].transcript.strip(),
+                'is_final': result.is_final,
+                'stability': result.stability,
+            }
+    logger.info("Streaming transcription finished")
 
-        response = speech_client.recognize(config=config, audio=audio)
+def iter_live_transcripts(language_code, duration=DEFAULT_AUDIO_DURATION, on_update=None, audio_chunks=None, client=None):
+    """
+    Records from the microphone and yields every final result of the live transcription as soon
+    as it is recognized, e.g. to translate each utterance while the speaker goes on.
 
-        transcribed_text = ""
-        for result in response.results:
-            transcribed_text += result.alternatives[0].transcript + " "
+    :param language_code: The language code of the audio
+    :param duration: Recording duration in seconds (default: DEFAULT_AUDIO_DURATION)
+    :param on_update: Optional callback called with (text, is_final) for every hypothesis
+    :param audio_chunks: Optional iterable of PCM chunks used instead of the microphone
+    :param client: Optional client providing streaming_recognize (default: the shared Speech client)
+    :yield: Final transcribed texts
+    """
+    if audio_chunks is None:
+        audio_chunks = microphone_chunks(duration)
+    for update in stream_transcribe(audio_chunks, language_code, client=client):
+        if on_update:
+            on_update(update['text'], update['is_final'])
+        if update['is_final'] and update['text']:
+            yield update['text']
+
+def live_transcribe(language_code, duration=DEFAULT_AUDIO_DURATION, on_update=None, audio_chunks=None, client=None):
+    """
+    Records from the microphone and transcribes it live, reporting interim and final text as it arrives.
+    
+    :param language_code: The language code of the audio
+    :param duration: Recording duration in seconds (default: DEFAULT_AUDIO_DURATION)
+    :param on_update: Optional callback called with (text, is_final) for every hypothesis
+    :param audio_chunks: Optional iterable of PCM chunks used instead of the microphone
+    :param client: Optional client providing streaming_recognize (default: the shared Speech client)
+    :return: The final transcribed text, or "" if transcription failed
+    """
+    try:
+        return " ".join(iter_live_transcripts(language_code, duration, on_update, audio_chunks, client))
+    except Exception as e:
+        logger.exception(f"Error during live transcription: {str(e)}")
+        return ""
+
+def recognition_request(content, language_code, encoding='MP3', sample_rate=AUDIO_SAMPLE_RATE, punctuation=False):
+    """
+    Builds the arguments of a synchronous recognize request, shared by the sync and async clients.
+
+    :param content: Audio bytes
+    :param language_code: The language code of the audio
+    :param encoding: Name of the RecognitionConfig.AudioEncoding (default: 'MP3')
+    :param sample_rate: The sample rate of the audio in Hz (default: AUDIO_SAMPLE_RATE)
+    :param punctuation: Whether to enable automatic punctuation (default: False)
+    :return: Keyword arguments for recognize
+    """
+    from google.cloud import speech
+
+    config = speech.RecognitionConfig(
+        encoding=getattr(speech.RecognitionConfig.AudioEncoding, encoding),
+        sample_rate_hertz=sample_rate,
+        language_code=language_code,
+        enable_automatic_punctuation=punctuation,
+    )
+    return {'config': config, 'audio': speech.RecognitionAudio(content=content)}
+
+def recognition_text(response):
+    """
+    Joins the best alternative of every result of a recognize response.
+
+    :param response: RecognizeResponse
+    :return: The transcribed text (empty if nothing was recognized)
+    """
+    return " ".join(result.alternatives[0].transcript.strip() for result in response.results if result.alternatives)
+
+def read_audio_content(audio_input):
+    """
+    Returns the bytes of an audio file, or the audio content itself when bytes are given.
+
+    :param audio_input: Path to the audio file or audio content as bytes
+    :return: Audio bytes
+    """
+    if isinstance(audio_input, bytes):
+        return audio_input
+    with io.open(audio_input, "rb") as audio_file:
+        return audio_file.read()
+
+def transcribe_audio(audio_file, language_code):
+    """
+    Transcribes audio to text using Google Cloud Speech-to-Text API.
+    
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :return: The transcribed text
+    """
+    logger.info(f"Starting audio transcription. Language: {language_code}")
+    try:
+        content = read_audio_content(audio_file)
+        request = recognition_request(content, language_code)
+        response = get_speech_limiter().call(lambda: get_speech_client().recognize(**request), description="Transcription")
+        transcribed_text = recognition_text(response)
 
         if transcribed_text:
             logger.info("Audio transcription completed successfully")
-            return transcribed_text.strip()
+            return transcribed_text
         else:
             logger.warning("No transcription results returned")
             return ""
@@ -186,106 +378,400 @@ def transcribe_audio(audio_file, language_code):
         logger.exception(f"Error during audio transcription: {str(e)}")
         return ""
 
-def transcribe_large_audio(audio_file, language_code):
+def transcribe_segment(content, language_code, sample_rate=AUDIO_SAMPLE_RATE):
     """
-    Transcribes a large audio file to text using Google Cloud Speech-to-Text API with long-running recognition.
+    Transcribes one LINEAR16 audio segment using the shared Speech-to-Text client.
     
-    :param audio_file: The path to the audio file
+    :param content: Mono 16-bit PCM audio bytes
     :param language_code: The language code of the audio
-    :return: The transcribed text
+    :param sample_rate: The sample rate of the audio in Hz (default: AUDIO_SAMPLE_RATE)
+    :return: The transcribed text (empty if nothing was recognized)
     """
-    logger.info(f"Starting large audio transcription. File: {audio_file}, Language: {language_code}")
-    client = speech.SpeechClient()
-    
-    with io.open(audio_file, "rb") as audio_file:
-        content = audio_file.read()
+    request = recognition_request(content, language_code, 'LINEAR16', sample_rate, punctuation=True)
+    response = get_speech_limiter().call(lambda: get_speech_client().recognize(**request), description="Transcription segment")
+    return recognition_text(response)
+
+def iter_transcript_segments(audio_file, language_code, max_in_flight=None):
+    """
+    Splits audio at silence boundaries into segments under the synchronous recognition limit and
+    transcribes the segments concurrently, yielding each one in order as soon as it is transcribed.
+
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :param max_in_flight: Maximum concurrent recognition requests (default: TRANSCRIPTION_MAX_IN_FLIGHT)
+    :yield: Tuples of (index, dictionary with 'start', 'end' (seconds) and 'text', latency in seconds);
+            'text' is None for a segment that failed
+    """
+    if max_in_flight is None:
+        max_in_flight = TRANSCRIPTION_MAX_IN_FLIGHT
+
+    def transcribe(segment):
+        # The Speech limiter already retries throttled and transient errors
+        try:
+            text = transcribe_segment(segment['content'], language_code)
+        except Exception as e:
+            logger.error(f"Transcription segment failed: {str(e)}")
+            text = None
+        return {'start': segment['start'], 'end': segment['end'], 'text': text}
+
+    segments = split_audio_on_silence(audio_file, TRANSCRIPTION_SEGMENT_SECONDS, AUDIO_SAMPLE_RATE, MIN_SILENCE_MS)
+    yield from imap_ordered(transcribe, segments, max_in_flight=max_in_flight)
+
+def transcribe_audio_segments(audio_file, language_code, max_in_flight=None):
+    """
+    Splits audio at silence boundaries into segments under the synchronous recognition limit,
+    transcribes the segments concurrently and returns them in order with their timestamps.
     
-    audio = speech.RecognitionAudio(content=content)
-    config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-        sample_rate_hertz=AUDIO_SAMPLE_RATE,
-        language_code=language_code,
-        enable_automatic_punctuation=True,
-    )
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :param max_in_flight: Maximum concurrent recognition requests (default: TRANSCRIPTION_MAX_IN_FLIGHT)
+    :return: List of dictionaries with 'start', 'end' (seconds) and 'text', or None if a segment failed
+    """
+    transcripts = []
+    failed = []
+    with stage('transcribe'):
+        for i, transcript, latency in iter_transcript_segments(audio_file, language_code, max_in_flight):
+            if transcript['text'] is None:
+                logger.error(f"Failed to transcribe segment {i+1} ({transcript['start']:.2f}s - {transcript['end']:.2f}s)")
+                failed.append(i + 1)
+            else:
+                logger.info("Transcribed segment %d (%.2fs - %.2fs) in %.2fs", i + 1, transcript['start'], transcript['end'],
+                            latency, extra=SAMPLED)
+            transcripts.append(transcript)
 
-    operation = client.long_running_recognize(config=config, audio=audio)
-    logger.info("Waiting for operation to complete...")
-    response = operation.result(timeout=None)  # Set timeout to None for very large files
+    if failed:
+        logger.error(f"Segmented transcription failed for segments: {failed}")
+        return None
+    return transcripts
 
-    transcription = ""
-    for result in response.results:
-        transcription += result.alternatives[0].transcript + " "
+def format_timestamp(seconds):
+    """
+    Formats a number of seconds as HH:MM:SS.
 
-    logger.info("Large audio transcription completed successfully")
+    :param seconds: Time in seconds
+    :return: Formatted timestamp
+    """
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def format_transcription(segments, with_timestamps=False):
+    """
+    Joins transcribed segments into one text.
+
+    :param segments: List of dictionaries with 'start', 'end' and 'text'
+    :param with_timestamps: Whether to put every segment on its own line, prefixed with its time range (default: False)
+    :return: The transcription
+    """
+    if with_timestamps:
+        transcription = "\n".join(
+            f"[{format_timestamp(segment['start'])} - {format_timestamp(segment['end'])}] {segment['text']}"
+            for segment in segments if segment['text']
+        )
+    else:
+        transcription = " ".join(segment['text'] for segment in segments if segment['text'])
     return transcription.strip()
 
-def text_to_speech(text, language_code, voice_gender):
+def transcribe_large_audio(audio_file, language_code, with_timestamps=False):
+    """
+    Transcribes a large audio file to text by splitting it at silences and transcribing the
+    segments concurrently with Google Cloud Speech-to-Text.
+    
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :param with_timestamps: Whether to prefix every segment with its time range (default: False)
+    :return: The transcribed text
+    """
+    logger.info(f"Starting large audio transcription. Language: {language_code}")
+    try:
+        segments = transcribe_audio_segments(audio_file, language_code)
+        if segments is None:
+            return ""
+        logger.info("Large audio transcription completed successfully")
+        return format_transcription(segments, with_timestamps)
+    except Exception as e:
+        logger.exception(f"Error during large audio transcription: {str(e)}")
+        return ""
+
+def iter_audio_transcripts(audio_file, language_code):
+    """
+    Transcribes an audio file piece by piece for the speech translation pipeline: audio longer than
+    the synchronous recognition limit is split at silences and each segment's transcript is yielded
+    in order as soon as it is ready, shorter audio is transcribed in one request.
+
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :yield: Transcribed texts
+    :raises ValueError: If the audio or one of its segments could not be transcribed
+    """
+    if not check_audio_duration(audio_file):
+        text = transcribe_audio(audio_file, language_code)
+        if not text:
+            raise ValueError("Audio transcription failed")
+        yield text
+        return
+    for i, transcript, latency in iter_transcript_segments(audio_file, language_code):
+        if transcript['text'] is None:
+            raise ValueError(f"Failed to transcribe segment {i+1} ({transcript['start']:.2f}s - {transcript['end']:.2f}s)")
+        logger.info("Transcribed segment %d (%.2fs - %.2fs) in %.2fs", i + 1, transcript['start'], transcript['end'],
+                    latency, extra=SAMPLED)
+        if transcript['text']:
+            yield transcript['text']
+
+def translate_speech_pipeline(transcripts, source_lang, target_lang, language_code, voice_gender, by_sentence=True):
+    """
+    Translates transcribed speech into speech with the transcription, translation and synthesis
+    running at the same time (see run_pipeline): every transcript moves on to translation as soon as
+    it is recognized, and every translated piece to Text-to-Speech as soon as it is translated.
+
+    :param transcripts: Iterable of transcribed texts, e.g. from iter_audio_transcripts or iter_live_transcripts
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param language_code: The language code of the synthesized speech
+    :param voice_gender: The gender of the voice to use
+    :param by_sentence: Whether to stream each translation and synthesize it sentence by sentence, for the
+                        earliest audio (default: True); otherwise transcripts are translated concurrently and
+                        synthesized in segments of up to one Text-to-Speech request, for the highest throughput
+    :return: Generator of (text, audio content) tuples, in order, as soon as each is synthesized
+    :raises ValueError: From the generator, if a transcript could not be translated or converted to speech
+    """
+    if by_sentence:
+        def translate(transcript):
+            return iter_sentences(translate_text_chunk_stream(transcript, source_lang, target_lang))
+        translate_workers = 1
+    else:
+        def translate(transcript):
+            translated = translate_text_chunk(transcript, source_lang, target_lang)
+            if not translated:
+                raise ValueError("Text translation failed")
+            return tts_segments(translated)
+        translate_workers = TRANSLATION_MAX_IN_FLIGHT
+
+    def synthesize(text):
+        return text_to_speech_stream([text], language_code, voice_gender)
+
+    return run_pipeline(transcripts, [
+        PipelineStage('translate', translate, translate_workers),
+        PipelineStage('synthesize', synthesize, TTS_MAX_IN_FLIGHT),
+    ])
+
+def get_tts_cache():
+    """
+    Returns the shared on-disk cache of synthesized audio.
+
+    :return: DiskCache for text-to-speech audio
+    """
+    return get_cache(TTS_CACHE_PATH, TTS_CACHE_MAX_BYTES, TTS_CACHE_ENABLED)
+
+def synthesis_request(text, language_code, voice_gender):
+    """
+    Builds the arguments of a synthesize_speech request, shared by the sync and async clients,
+    and the audio cache key of the request.
+
+    :param text: The text to convert to speech
+    :param language_code: The language code for the text
+    :param voice_gender: The gender of the voice to use
+    :return: Tuple of (keyword arguments for synthesize_speech, cache key)
+    """
+    from google.cloud import texttospeech
+
+    audio_encoding = texttospeech.AudioEncoding.MP3
+    cache_key = make_cache_key(text, language_code, getattr(voice_gender, 'name', voice_gender),
+                               getattr(audio_encoding, 'name', audio_encoding))
+    request = {
+        'input': texttospeech.SynthesisInput(text=text),
+        'voice': texttospeech.VoiceSelectionParams(language_code=language_code, ssml_gender=voice_gender),
+        'audio_config': texttospeech.AudioConfig(audio_encoding=audio_encoding),
+    }
+    return request, cache_key
+
+def text_to_speech(text, language_code, voice_gender, use_cache=True):
     """
     Converts text to speech using Google Cloud Text-to-Speech API.
+    Synthesized audio is cached on disk, keyed by the text, language, voice gender and audio encoding.
     
     :param text: The text to convert to speech
     :param language_code: The language code for the text
     :param voice_gender: The gender of the voice to use
+    :param use_cache: Whether to read from and write to the audio cache (default: True)
     :return: Audio content or None if conversion fails
     """
-    logger.info(f"Starting text-to-speech conversion. Language: {language_code}, Voice gender: {voice_gender}")
+    logger.info("Starting text-to-speech conversion. Language: %s, Voice gender: %s", language_code, voice_gender, extra=SAMPLED)
     try:
-        synthesis_input = texttospeech.SynthesisInput(text=text)
-        voice = texttospeech.VoiceSelectionParams(language_code=language_code, ssml_gender=voice_gender)
-        audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+        request, cache_key = synthesis_request(text, language_code, voice_gender)
+        cache = get_tts_cache() if use_cache else None
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Text-to-speech audio served from cache", extra=SAMPLED)
+                return cached
 
-        response = tts_client.synthesize_speech(input=synthesis_input, voice=voice, audio_config=audio_config)
-        logger.info("Text-to-speech conversion completed successfully")
+        response = get_tts_limiter().call(lambda: get_tts_client().synthesize_speech(**request),
+                                          tokens=len(text), description="Text-to-speech")
+        if cache is not None and response.audio_content:
+            cache.set(cache_key, response.audio_content)
+        logger.info("Text-to-speech conversion completed successfully", extra=SAMPLED)
         return response.audio_content
     except Exception as e:
         logger.exception(f"An error occurred during text-to-speech conversion: {str(e)}")
         return None
 
-def text_to_speech_large(text, language_code, voice_gender, chunk_size=3500):
+def tts_segments(text, chunk_size=3500):
+    """
+    Splits text into segments short enough for one Text-to-Speech request.
+
+    :param text: The text to convert to speech
+    :param chunk_size: The maximum characters per segment (default: 3500)
+    :return: List of text segments
+    """
+    with stage('chunk'):
+        return [chunk['text'] for chunk in chunk_text(text, chunk_size, max_bytes=TTS_MAX_REQUEST_BYTES)]
+
+def tts_checkpoint(text, language_code, voice_gender, chunk_size):
+    """
+    Opens the checkpoint of a large text-to-speech job, keyed by the text and the voice parameters.
+
+    :return: JobCheckpoint
+    """
+    store = get_checkpoint_store(CHECKPOINT_PATH, CHECKPOINTS_ENABLED, CHECKPOINT_MAX_AGE_DAYS)
+    return JobCheckpoint(store, 'text_to_speech', make_cache_key(text), language_code,
+                         getattr(voice_gender, 'name', voice_gender), chunk_size)
+
+def _synthesize_large(segments, language_code, voice_gender, max_in_flight, checkpoint):
+    """
+    Synthesizes text segments in parallel with a worker pool, reusing and recording checkpointed
+    chunks, and yields the results in text order as they become available.
+
+    :yield: Tuples of (index, audio content or None if the chunk failed)
+    """
+    def synthesize(item):
+        i, segment = item
+        if checkpoint is not None:
+            done = checkpoint.get(i)
+            if done is not None:
+                return done
+        # The Text-to-Speech limiter already retries throttled and transient errors
+        audio_content = text_to_speech(segment, language_code, voice_gender)
+        if checkpoint is not None and audio_content:
+            checkpoint.save(i, audio_content)
+        return audio_content
+
+    for i, audio_content, latency in imap_ordered(synthesize, enumerate(segments), max_in_flight=max_in_flight):
+        if audio_content:
+            logger.info("Converted chunk %d/%d to speech in %.2fs", i + 1, len(segments), latency, extra=SAMPLED)
+            record_bytes('synthesize', len(audio_content))
+        else:
+            logger.error(f"Failed to convert chunk {i+1} to speech")
+        yield i, audio_content
+
+def text_to_speech_large(text, language_code, voice_gender, chunk_size=3500, max_in_flight=None, resume=True):
     """
     Converts large text to speech using Google Cloud Text-to-Speech API by splitting it into chunks.
+    Chunks are synthesized in parallel by a worker pool and the audio segments are returned in
+    text order. Throttled and transient errors of a chunk are retried on its own by the shared
+    Text-to-Speech limiter instead of failing the whole conversion. Synthesized chunks are checkpointed, so converting the same text again after a failure only
+    synthesizes the chunks that were missing. To write the audio as it is synthesized instead of
+    holding every segment in memory, use iter_text_to_speech_large.
     
     :param text: The text to convert to speech
     :param language_code: The language code for the text
     :param voice_gender: The gender of the voice to use
     :param chunk_size: The maximum size of each chunk
+    :param max_in_flight: Maximum concurrent synthesis requests (default: TTS_MAX_IN_FLIGHT, 1 = serial)
+    :param resume: Whether to checkpoint synthesized chunks and resume from earlier runs (default: True)
     :return: List of audio contents or None if conversion fails
     """
     logger.info(f"Starting large text-to-speech conversion. Language: {language_code}, Voice gender: {voice_gender}")
-    chunks = split_content(text, chunk_size)
-    audio_contents = []
+    if max_in_flight is None:
+        max_in_flight = TTS_MAX_IN_FLIGHT
 
-    for i, chunk in enumerate(chunks):
-        logger.info(f"Converting chunk {i+1}/{len(chunks)} to speech")
-        if check_text_size(chunk):
-            logger.warning(f"Chunk {i+1} is still too large, splitting further")
-            sub_chunks = split_content(chunk, chunk_size // 2)
-            for j, sub_chunk in enumerate(sub_chunks):
-                audio_content = text_to_speech(sub_chunk, language_code, voice_gender)
-                if audio_content:
-                    audio_contents.append(audio_content)
-                else:
-                    logger.error(f"Failed to convert sub-chunk {j+1} of chunk {i+1} to speech")
-        else:
-            audio_content = text_to_speech(chunk, language_code, voice_gender)
+    segments = tts_segments(text, chunk_size)
+    checkpoint = tts_checkpoint(text, language_code, voice_gender, chunk_size) if resume else None
+
+    audio_contents = []
+    failed = []
+    with stage('synthesize'):
+        for i, audio_content in _synthesize_large(segments, language_code, voice_gender, max_in_flight, checkpoint):
             if audio_content:
                 audio_contents.append(audio_content)
             else:
-                logger.error(f"Failed to convert chunk {i+1} to speech")
+                failed.append(i + 1)
+
+    cache = get_tts_cache()
+    logger.info(f"Text-to-speech cache: {cache.hits} hits, {cache.misses} misses")
 
-    if len(audio_contents) == sum(len(split_content(chunk, chunk_size // 2)) if check_text_size(chunk) else 1 for chunk in chunks):
+    if not failed:
+        if checkpoint is not None:
+            checkpoint.complete()
         logger.info("Large text-to-speech conversion completed successfully")
         return audio_contents
     else:
-        logger.error("Large text-to-speech conversion failed")
+        logger.error(f"Large text-to-speech conversion failed for chunks: {failed}")
+        if checkpoint is not None and audio_contents:
+            logger.info(f"Checkpointed {len(audio_contents)} synthesized chunks, a re-run resumes from them")
         return None
 
+def iter_text_to_speech_large(text, language_code, voice_gender, chunk_size=3500, max_in_flight=None, resume=True):
+    """
+    Generator variant of text_to_speech_large: yields the audio segments in text order as soon as
+    each one and those before it are synthesized, so save_large_audio can write them while later
+    chunks are still being synthesized and only a bounded window of segments is held in memory.
+    
+    :param text: The text to convert to speech
+    :param language_code: The language code for the text
+    :param voice_gender: The gender of the voice to use
+    :param chunk_size: The maximum size of each chunk
+    :param max_in_flight: Maximum concurrent synthesis requests (default: TTS_MAX_IN_FLIGHT, 1 = serial)
+    :param resume: Whether to checkpoint synthesized chunks and resume from earlier runs (default: True)
+    :yield: Audio content of each chunk
+    :raises ValueError: If a chunk could not be converted to speech; the chunks synthesized so far
+                        stay checkpointed, so a re-run resumes from them
+    """
+    logger.info(f"Starting large text-to-speech conversion. Language: {language_code}, Voice gender: {voice_gender}")
+    if max_in_flight is None:
+        max_in_flight = TTS_MAX_IN_FLIGHT
+
+    segments = tts_segments(text, chunk_size)
+    checkpoint = tts_checkpoint(text, language_code, voice_gender, chunk_size) if resume else None
+
+    for i, audio_content in _synthesize_large(segments, language_code, voice_gender, max_in_flight, checkpoint):
+        if not audio_content:
+            raise ValueError(f"Text-to-speech conversion failed for chunk {i+1}")
+        yield audio_content
+
+    if checkpoint is not None:
+        checkpoint.complete()
+    logger.info("Large text-to-speech conversion completed successfully")
+
+def text_to_speech_stream(sentences, language_code, voice_gender):
+    """
+    Synthesizes sentences one by one as they arrive, e.g. from iter_sentences over a streamed
+    translation, so the first audio is ready before the whole text exists.
+
+    :param sentences: Iterable of sentences
+    :param language_code: The language code for the text
+    :param voice_gender: The gender of the voice to use
+    :yield: Tuples of (sentence, audio content)
+    :raises ValueError: If a sentence could not be converted to speech
+    """
+    for sentence in sentences:
+        if not sentence:
+            continue
+        segments = [sentence] if len(sentence.encode('utf-8')) <= TTS_MAX_REQUEST_BYTES else tts_segments(sentence)
+        for segment in segments:
+            audio_content = text_to_speech(segment, language_code, voice_gender)
+            if not audio_content:
+                raise ValueError("Text-to-speech conversion failed")
+            record_bytes('synthesize', len(audio_content))
+            yield segment, audio_content
+
 def play_audio(audio_input):
     """
     Plays the audio content using pygame.
     
     :param audio_input: Either a file path (str) or audio content (bytes)
     """
+    import pygame
+
     logger.info("Starting audio playback")
     try:
         pygame.mixer.init()
@@ -335,21 +821,29 @@ def save_audio(audio_content, base_filename="output", use_unique_name=True):
             filename = f"{base_filename}.mp3"
         full_path = os.path.join(AUDIO_OUTPUT_DIR, filename)
         
-        with open(full_path, 'wb') as file:
-            file.write(audio_content)
+        with stage('write'):
+            with open(full_path, 'wb') as file:
+                file.write(audio_content)
+        record_bytes('write', len(audio_content))
         logger.info(f'Audio content written to file: "{full_path}"')
         return full_path
     except Exception as e:
         logger.exception(f"An error occurred while saving the audio: {str(e)}")
         return None
 
-def save_large_audio(audio_contents, base_filename="output", use_unique_name=True):
+def save_large_audio(audio_contents, base_filename="output", use_unique_name=True, chapter_titles=None, write_chapter_index=False):
     """
     Saves large audio content (multiple chunks) to a file in the data folder.
+    MP3 frames are streamed straight to the output file as each chunk arrives, without decoding
+    or re-encoding, so memory use stays constant regardless of the audio length. The frames go to a
+    partial file that is moved into place once every chunk is written, so a failure leaves no
+    truncated MP3 behind.
     
-    :param audio_contents: List of audio contents to save
+    :param audio_contents: Iterable of MP3 audio contents to save (a list or a generator)
     :param base_filename: The base name for the file (default: "output")
     :param use_unique_name: Whether to generate a unique filename (default: True)
+    :param chapter_titles: Optional list of titles for the chunks, used in the chapter index
+    :param write_chapter_index: Whether to write a JSON chapter index next to the file (default: False)
     :return: The full path of the saved file or None if an error occurred
     """
     logger.info(f"Saving large audio content. Base filename: {base_filename}")
@@ -360,15 +854,252 @@ def save_large_audio(audio_contents, base_filename="output", use_unique_name=Tru
         else:
             filename = f"{base_filename}.mp3"
         full_path = os.path.join(AUDIO_OUTPUT_DIR, filename)
-        
-        combined = AudioSegment.empty()
-        for audio_content in audio_contents:
-            segment = AudioSegment.from_mp3(io.BytesIO(audio_content))
-            combined += segment
+        chapter_index_path = os.path.splitext(full_path)[0] + ".chapters.json" if write_chapter_index else None
 
-        combined.export(full_path, format="mp3")
-        logger.info(f'Large audio content written to file: "{full_path}"')
+        temp_path = partial_path(full_path)
+        try:
+            with stage('assemble'), Mp3StreamWriter(temp_path, chapter_index_path, file_name=filename) as writer:
+                for i, audio_content in enumerate(audio_contents):
+                    title = chapter_titles[i] if chapter_titles and i < len(chapter_titles) else None
+                    writer.append(audio_content, title)
+            os.replace(temp_path, full_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        record_bytes('write', file_size(full_path))
+
+        logger.info(f'Large audio content written to file: "{full_path}" ({writer.duration:.2f} seconds)')
         return full_path
     except Exception as e:
         logger.exception(f"An error occurred while saving the large audio: {str(e)}")
         return None
+
+async def atranscribe_audio(audio_file, language_code):
+    """
+    Async counterpart of transcribe_audio.
+    
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :return: The transcribed text
+    """
+    logger.info(f"Starting audio transcription. Language: {language_code}")
+    try:
+        content = await asyncio.to_thread(read_audio_content, audio_file)
+        async with get_semaphore('speech', ASYNC_SPEECH_MAX_IN_FLIGHT):
+            request = recognition_request(content, language_code)
+            response = await get_speech_limiter().acall(lambda: get_async_speech_client().recognize(**request),
+                                                        description="Transcription")
+        transcribed_text = recognition_text(response)
+
+        if transcribed_text:
+            logger.info("Audio transcription completed successfully")
+            return transcribed_text
+        else:
+            logger.warning("No transcription results returned")
+            return ""
+    except Exception as e:
+        logger.exception(f"Error during audio transcription: {str(e)}")
+        return ""
+
+async def atranscribe_segment(content, language_code, sample_rate=AUDIO_SAMPLE_RATE):
+    """
+    Async counterpart of transcribe_segment.
+    
+    :param content: Mono 16-bit PCM audio bytes
+    :param language_code: The language code of the audio
+    :param sample_rate: The sample rate of the audio in Hz (default: AUDIO_SAMPLE_RATE)
+    :return: The transcribed text (empty if nothing was recognized)
+    """
+    request = recognition_request(content, language_code, 'LINEAR16', sample_rate, punctuation=True)
+    async with get_semaphore('speech', ASYNC_SPEECH_MAX_IN_FLIGHT):
+        response = await get_speech_limiter().acall(lambda: get_async_speech_client().recognize(**request),
+                                                    description="Transcription segment")
+    return recognition_text(response)
+
+async def atranscribe_audio_segments(audio_file, language_code):
+    """
+    Async counterpart of transcribe_audio_segments. Segments are decoded in a worker thread one at
+    a time and each is sent for recognition as soon as it is ready; decoding pauses while a bounded
+    window of segments (twice ASYNC_SPEECH_MAX_IN_FLIGHT) is waiting for recognition.
+    
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :return: List of dictionaries with 'start', 'end' (seconds) and 'text', or None if a segment failed
+    """
+    async def transcribe(segment):
+        # The Speech limiter already retries throttled and transient errors
+        try:
+            text = await atranscribe_segment(segment['content'], language_code)
+        except Exception as e:
+            logger.error(f"Transcription segment failed: {str(e)}")
+            text = None
+        return {'start': segment['start'], 'end': segment['end'], 'text': text}
+
+    async def read_segments():
+        segments = split_audio_on_silence(audio_file, TRANSCRIPTION_SEGMENT_SECONDS, AUDIO_SAMPLE_RATE, MIN_SILENCE_MS)
+        while True:
+            segment = await asyncio.to_thread(next, segments, None)
+            if segment is None:
+                return
+            yield segment
+
+    transcripts = [transcript async for _, transcript, _ in
+                   aimap_ordered(transcribe, read_segments(), ASYNC_SPEECH_MAX_IN_FLIGHT)]
+
+    failed = [i + 1 for i, transcript in enumerate(transcripts) if transcript['text'] is None]
+    if failed:
+        logger.error(f"Segmented transcription failed for segments: {failed}")
+        return None
+    return transcripts
+
+async def atranscribe_large_audio(audio_file, language_code, with_timestamps=False):
+    """
+    Async counterpart of transcribe_large_audio.
+    
+    :param audio_file: The path to the audio file or audio content as bytes
+    :param language_code: The language code of the audio
+    :param with_timestamps: Whether to prefix every segment with its time range (default: False)
+    :return: The transcribed text
+    """
+    logger.info(f"Starting large audio transcription. Language: {language_code}")
+    try:
+        segments = await atranscribe_audio_segments(audio_file, language_code)
+        if segments is None:
+            return ""
+        logger.info("Large audio transcription completed successfully")
+        return format_transcription(segments, with_timestamps)
+    except Exception as e:
+        logger.exception(f"Error during large audio transcription: {str(e)}")
+        return ""
+
+async def atext_to_speech(text, language_code, voice_gender, use_cache=True):
+    """
+    Async counterpart of text_to_speech, sharing its audio cache.
+    
+    :param text: The text to convert to speech
+    :param language_code: The language code for the text
+    :param voice_gender: The gender of the voice to use
+    :param use_cache: Whether to read from and write to the audio cache (default: True)
+    :return: Audio content or None if conversion fails
+    """
+    logger.info("Starting text-to-speech conversion. Language: %s, Voice gender: %s", language_code, voice_gender, extra=SAMPLED)
+    try:
+        request, cache_key = synthesis_request(text, language_code, voice_gender)
+        cache = get_tts_cache() if use_cache else None
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Text-to-speech audio served from cache", extra=SAMPLED)
+                return cached
+
+        async with get_semaphore('tts', ASYNC_TTS_MAX_IN_FLIGHT):
+            response = await get_tts_limiter().acall(lambda: get_async_tts_client().synthesize_speech(**request),
+                                                     tokens=len(text), description="Text-to-speech")
+        if cache is not None and response.audio_content:
+            cache.set(cache_key, response.audio_content)
+        logger.info("Text-to-speech conversion completed successfully", extra=SAMPLED)
+        return response.audio_content
+    except Exception as e:
+        logger.exception(f"An error occurred during text-to-speech conversion: {str(e)}")
+        return None
+
+async def atext_to_speech_large(text, language_code, voice_gender, chunk_size=3500):
+    """
+    Async counterpart of text_to_speech_large. Segments are synthesized concurrently, bounded by
+    the loop-wide Text-to-Speech semaphore, and a segment's transient errors are retried on its own
+    by the shared Text-to-Speech limiter.
+    
+    :param text: The text to convert to speech
+    :param language_code: The language code for the text
+    :param voice_gender: The gender of the voice to use
+    :param chunk_size: The maximum size of each chunk
+    :return: List of audio contents or None if conversion fails
+    """
+    logger.info(f"Starting large text-to-speech conversion. Language: {language_code}, Voice gender: {voice_gender}")
+
+    async def synthesize(segment):
+        # The Text-to-Speech limiter already retries throttled and transient errors
+        return await atext_to_speech(segment, language_code, voice_gender)
+
+    segments = tts_segments(text, chunk_size)
+    with stage('synthesize'):
+        results = await agather_ordered(synthesize, segments)
+    failed = [i + 1 for i, (audio_content, _) in enumerate(results) if not audio_content]
+    if not failed:
+        record_bytes('synthesize', sum(len(audio_content) for audio_content, _ in results))
+        logger.info("Large text-to-speech conversion completed successfully")
+        return [audio_content for audio_content, _ in results]
+    else:
+        logger.error(f"Large text-to-speech conversion failed for chunks: {failed}")
+        return None
+
+async def aprocess_audio(audio_content, operation, **kwargs):
+    """
+    Async counterpart of process_audio, returning the same results.
+    
+    :param audio_content: The audio content to process (file path or bytes)
+    :param operation: The operation to perform ('transcribe', 'translate', or 'text_to_speech')
+    :param kwargs: Additional keyword arguments for specific operations
+    :return: Processed result (text or audio content) or None if processing fails
+    """
+    logger.info(f"Processing audio with operation: {operation}")
+    try:
+        if operation in ('transcribe', 'translate'):
+            language_code = kwargs['language_code'] if operation == 'transcribe' else kwargs['source_lang']
+            is_large = await asyncio.to_thread(check_audio_duration, audio_content)
+            if is_large:
+                transcribed_text = await atranscribe_large_audio(audio_content, language_code)
+            else:
+                transcribed_text = await atranscribe_audio(audio_content, language_code)
+            if operation == 'transcribe':
+                return transcribed_text
+            return await aprocess_text(transcribed_text, 'translate', source_lang=kwargs['source_lang'], target_lang=kwargs['target_lang'])
+        elif operation == 'text_to_speech':
+            text = kwargs['text']
+            if check_text_size(text):
+                return await atext_to_speech_large(text, kwargs['language_code'], kwargs['voice_gender'])
+            else:
+                return await atext_to_speech(text, kwargs['language_code'], kwargs['voice_gender'])
+        else:
+            logger.error(f"Unsupported operation: {operation}")
+            return None
+    except Exception as e:
+        logger.exception(f"An error occurred during audio processing: {str(e)}")
+        return None
+
+async def aprocess_audio_file(input_file, output_file, operation, **kwargs):
+    """
+    Async counterpart of process_audio_file. File writes run in worker threads.
+    
+    :param input_file: Path to the input audio file
+    :param output_file: Path to save the processed audio file
+    :param operation: The operation to perform ('transcribe', 'translate', or 'text_to_speech')
+    :param kwargs: Additional keyword arguments for specific operations
+    :return: Path to the processed file or None if processing fails
+    """
+    logger.info(f"Processing audio file. Input: {input_file}, Output: {output_file}, Operation: {operation}")
+    try:
+        if operation in ['transcribe', 'translate']:
+            processed_content = await aprocess_audio(input_file, operation, **kwargs)
+            if processed_content:
+                await asyncio.to_thread(write_file, processed_content, output_file)
+                logger.info(f"Processed content saved to: {output_file}")
+                return output_file
+            else:
+                logger.error("Processing failed, no content to write")
+                return None
+        elif operation == 'text_to_speech':
+            audio_content = await aprocess_audio(kwargs['text'], operation, **kwargs)
+            if audio_content:
+                await asyncio.to_thread(save_audio, audio_content, os.path.splitext(output_file)[0], use_unique_name=False)
+                logger.info(f"Processed content saved to: {output_file}")
+                return output_file
+            else:
+                logger.error("Processing failed, no content to write")
+                return None
+        else:
+            logger.error(f"Unsupported operation: {operation}")
+            return None
+    except Exception as e:
+        logger.exception(f"An error occurred during audio file processing: {str(e)}")
+        return None
@@ -1,65 +1,488 @@
 import os
-from openai import OpenAI
-from utils.common import read_file, write_file, split_content, check_text_size
-from logging_config import get_module_logger
-from config.settings import OPENAI_API_KEY, OPENAI_MODEL, DOCUMENT_INPUT_DIR, DOCUMENT_OUTPUT_DIR
+import time
+import asyncio
+import contextvars
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.common import read_file, write_file, write_stream, is_large_file, discover_documents, partial_path
+from utils.chunking import chunk_text, iter_chunks, join_chunks
+from utils.concurrency import imap_ordered, aimap_ordered
+from utils.cache import get_cache, make_cache_key
+from utils.checkpoint import get_checkpoint_store, JobCheckpoint, file_digest
+from utils.clients import get_client
+from utils.tokens import count_tokens, chunk_token_budget, MESSAGE_OVERHEAD_TOKENS
+from utils.throttling import get_provider_limiter
+from utils.throughput import ThroughputMeter, throughput_report, format_throughput
+from utils.metrics import stage, inc
+from logging_config import get_module_logger, SAMPLED
+from config.settings import (
+    OPENAI_MODEL, DOCUMENT_INPUT_DIR, DOCUMENT_OUTPUT_DIR,
+    TRANSLATION_OUTPUT_RATIO, TRANSLATION_MAX_CHUNK_TOKENS,
+    TRANSLATION_MAX_IN_FLIGHT, BATCH_FILE_WORKERS, BATCH_PROGRESS_INTERVAL,
+    TRANSLATION_CACHE_ENABLED, TRANSLATION_CACHE_PATH, TRANSLATION_CACHE_MAX_BYTES,
+    CHECKPOINTS_ENABLED, CHECKPOINT_PATH, CHECKPOINT_MAX_AGE_DAYS, OPENAI_MAX_CONCURRENCY
+)
 
 # Get logger for this module
 logger = get_module_logger(__name__)
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Chunks and source tokens translated by this process, read by batch progress reports
+translation_meter = ThroughputMeter()
 
-def translate_text_chunk(chunk, source_lang, target_lang):
+def get_openai_client():
+    """
+    Returns the OpenAI client, creating it on first use: shared by all threads, or the calling
+    thread's client of a fixed pool with OPENAI_CLIENT_POLICY = thread.
+
+    :return: OpenAI client
+    """
+    return get_client('openai')
+
+def get_async_openai_client():
+    """
+    Returns the shared AsyncOpenAI client, creating it on first use.
+
+    :return: AsyncOpenAI client
+    """
+    return get_client('openai_async')
+
+def get_openai_limiter():
+    """
+    Returns the rate limiter shared by every OpenAI request for OPENAI_MODEL, sync and async.
+
+    :return: ProviderLimiter
+    """
+    return get_provider_limiter('openai', OPENAI_MODEL)
+
+def get_translation_cache():
+    """
+    Returns the shared on-disk translation cache.
+
+    :return: DiskCache for translated chunks
+    """
+    return get_cache(TRANSLATION_CACHE_PATH, TRANSLATION_CACHE_MAX_BYTES, TRANSLATION_CACHE_ENABLED)
+
+def translation_checkpoint(input_digest, source_lang, target_lang, chunk_size=None):
+    """
+    Opens the checkpoint of a translation job, keyed by the input and every parameter that
+    changes the chunks or their translations.
+
+    :param input_digest: Digest of the input text or file
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param chunk_size: Optional maximum characters per chunk (default: None)
+    :return: JobCheckpoint
+    """
+    store = get_checkpoint_store(CHECKPOINT_PATH, CHECKPOINTS_ENABLED, CHECKPOINT_MAX_AGE_DAYS)
+    return JobCheckpoint(store, 'translate', input_digest, source_lang, target_lang, OPENAI_MODEL,
+                         translation_prompt(source_lang, target_lang), chunk_size,
+                         translation_chunk_tokens(source_lang, target_lang))
+
+def file_translation_checkpoint(input_file, source_lang, target_lang):
+    """
+    Opens the checkpoint of a file translation, keyed by the file contents.
+
+    :param input_file: Path to the input file
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :return: JobCheckpoint, or None if the file cannot be read
+    """
+    try:
+        return translation_checkpoint(file_digest(input_file), source_lang, target_lang)
+    except OSError as e:
+        logger.warning(f"Could not checkpoint {input_file}, translating without resume: {str(e)}")
+        return None
+
+def file_job_key(input_file, output_file, source_lang, target_lang):
+    """
+    Returns the checkpoint key of a whole file translation in a batch, used to skip files
+    that were already translated into the same output.
+
+    :param input_file: Path to the input file
+    :param output_file: Path to the translated file
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :return: The job key
+    """
+    return make_cache_key('translate_file', file_digest(input_file), os.path.abspath(output_file),
+                          source_lang, target_lang, OPENAI_MODEL)
+
+def translation_prompt(source_lang, target_lang):
+    """
+    Builds the system prompt used for translation.
+
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :return: The system prompt
+    """
+    return f"You are a translator. Translate the following text from {source_lang} to {target_lang}."
+
+def summary_prompt(max_words):
+    """
+    Builds the system prompt used for summarization.
+
+    :param max_words: The maximum number of words for the summary
+    :return: The system prompt
+    """
+    return f"You are a text summarizer. Summarize the following text in no more than {max_words} words."
+
+# System prompt used for sentiment analysis
+SENTIMENT_PROMPT = "You are a sentiment analyzer. Analyze the sentiment of the following text and respond with 'Positive', 'Negative', or 'Neutral'."
+
+def chat_request(system_prompt, text):
+    """
+    Builds the arguments of a chat completion request, shared by the sync and async clients.
+
+    :param system_prompt: The system prompt
+    :param text: The user text
+    :return: Keyword arguments for chat.completions.create
+    """
+    return {
+        'model': OPENAI_MODEL,
+        'messages': [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": text}
+        ]
+    }
+
+def request_tokens(system_prompt, text, output_ratio=0.0):
+    """
+    Estimates the tokens a chat request uses against the tokens-per-minute budget.
+
+    :param system_prompt: The system prompt
+    :param text: The user text
+    :param output_ratio: Expected completion tokens per input token of the text (default: 0.0)
+    :return: Estimated prompt and completion tokens
+    """
+    text_tokens = count_tokens(text)
+    return count_tokens(system_prompt) + text_tokens + 2 * MESSAGE_OVERHEAD_TOKENS + int(text_tokens * output_ratio)
+
+def completion_text(response):
+    """
+    Extracts the stripped completion text, warning when the completion was cut at the token limit.
+
+    :param response: Chat completion response
+    :return: The completion text
+    """
+    if response.choices[0].finish_reason == 'length':
+        logger.warning("Completion stopped at the completion token limit and may be incomplete")
+    return response.choices[0].message.content.strip()
+
+def complete(system_prompt, text, output_ratio=0.0, description="Chat completion"):
+    """
+    Sends one chat completion through the shared OpenAI limiter, which retries throttled requests.
+
+    :param system_prompt: The system prompt
+    :param text: The user text
+    :param output_ratio: Expected completion tokens per input token, for the token budget (default: 0.0)
+    :param description: Short description of the request used in log messages
+    :return: The completion text
+    """
+    request = chat_request(system_prompt, text)
+    response = get_openai_limiter().call(lambda: get_openai_client().chat.completions.create(**request),
+                                         tokens=request_tokens(system_prompt, text, output_ratio), description=description)
+    return completion_text(response)
+
+def stream_complete(system_prompt, text, output_ratio=0.0, description="Chat completion"):
+    """
+    Sends one chat completion in streaming mode and yields its text as the tokens arrive.
+    The shared OpenAI limiter holds a concurrency slot until the stream ends and retries throttled
+    requests until the first event; errors after that are reported to the limiter and raised.
+
+    :param system_prompt: The system prompt
+    :param text: The user text
+    :param output_ratio: Expected completion tokens per input token, for the token budget (default: 0.0)
+    :param description: Short description of the request used in log messages
+    :yield: Pieces of the completion text, without leading whitespace
+    """
+    request = chat_request(system_prompt, text)
+    stream = get_openai_limiter().stream(lambda: get_openai_client().chat.completions.create(stream=True, **request),
+                                         tokens=request_tokens(system_prompt, text, output_ratio), description=description)
+    started = False
+    finish_reason = None
+    # Closing the limiter's stream when the consumer stops early gives back its concurrency slot at once
+    with closing(stream):
+        for event in stream:
+            if not event.choices:
+                continue
+            choice = event.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            piece = choice.delta.content
+            if not started and piece:
+                piece = piece.lstrip()
+                started = bool(piece)
+            if piece:
+                yield piece
+    if finish_reason == 'length':
+        logger.warning("Completion stopped at the completion token limit and may be incomplete")
+
+def translation_chunk_tokens(source_lang, target_lang):
+    """
+    Returns the token budget of one translation request: as much input as OPENAI_MODEL can take
+    while leaving room for the translated output (capped by TRANSLATION_MAX_CHUNK_TOKENS).
+
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :return: Maximum input tokens per chunk
+    """
+    budget = chunk_token_budget(translation_prompt(source_lang, target_lang), TRANSLATION_OUTPUT_RATIO)
+    if TRANSLATION_MAX_CHUNK_TOKENS:
+        budget = min(budget, TRANSLATION_MAX_CHUNK_TOKENS)
+    return budget
+
+def record_translation(chunk):
+    """
+    Counts a translated chunk and its tokens in the throughput meter and the metrics.
+
+    :param chunk: The source text of the chunk
+    """
+    tokens = count_tokens(chunk)
+    translation_meter.add(chunks=1, tokens=tokens)
+    inc('tokens_processed_total', tokens, stage='translate')
+
+def translate_text_chunk(chunk, source_lang, target_lang, use_cache=True):
     """
     Translates a chunk of text from source language to target language using OpenAI's API.
+    Translations are cached on disk, keyed by the chunk, languages, model and prompt.
     
     :param chunk: The chunk of text to translate
     :param source_lang: The source language
     :param target_lang: The target language
+    :param use_cache: Whether to read from and write to the translation cache (default: True)
     :return: Translated text chunk or None if translation fails
     """
-    logger.info(f"Translating text chunk from {source_lang} to {target_lang}")
-    try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": f"You are a translator. Translate the following text from {source_lang} to {target_lang}."},
-                {"role": "user", "content": chunk}
-            ]
-        )
-        translated_chunk = response.choices[0].message.content.strip()
-        logger.info("Text chunk translation completed successfully")
+    logger.info("Translating text chunk from %s to %s", source_lang, target_lang, extra=SAMPLED)
+    try:
+        prompt = translation_prompt(source_lang, target_lang)
+        cache = get_translation_cache() if use_cache else None
+        cache_key = make_cache_key(chunk, source_lang, target_lang, OPENAI_MODEL, prompt)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Text chunk translation served from cache", extra=SAMPLED)
+                record_translation(chunk)
+                return cached.decode('utf-8')
+
+        translated_chunk = complete(prompt, chunk, TRANSLATION_OUTPUT_RATIO, "Chunk translation")
+        if cache is not None and translated_chunk:
+            cache.set(cache_key, translated_chunk.encode('utf-8'))
+        record_translation(chunk)
+        logger.info("Text chunk translation completed successfully", extra=SAMPLED)
         return translated_chunk
     except Exception as e:
         logger.exception(f"An error occurred during chunk translation: {str(e)}")
         return None
 
-def translate_large_text(text, source_lang, target_lang, chunk_size=4000):
+def translate_text_chunk_stream(chunk, source_lang, target_lang, use_cache=True):
     """
-    Translates large text by splitting it into chunks and translating each chunk.
-    
-    :param text: The text to translate
+    Streaming counterpart of translate_text_chunk: yields the translation as the tokens arrive.
+    A cached translation is yielded at once, and a completed translation is added to the cache.
+
+    :param chunk: The chunk of text to translate
     :param source_lang: The source language
     :param target_lang: The target language
-    :param chunk_size: The maximum size of each chunk
-    :return: Translated text or None if translation fails
+    :param use_cache: Whether to read from and write to the translation cache (default: True)
+    :yield: Pieces of the translated text
+    :raises Exception: The error of the request, after it was logged
     """
-    logger.info(f"Starting large text translation from {source_lang} to {target_lang}")
+    logger.info("Streaming translation of text chunk from %s to %s", source_lang, target_lang, extra=SAMPLED)
     try:
-        chunks = split_content(text, chunk_size)
-        translated_chunks = []
+        prompt = translation_prompt(source_lang, target_lang)
+        cache = get_translation_cache() if use_cache else None
+        cache_key = make_cache_key(chunk, source_lang, target_lang, OPENAI_MODEL, prompt)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Text chunk translation served from cache", extra=SAMPLED)
+                record_translation(chunk)
+                yield cached.decode('utf-8')
+                return
+
+        pieces = []
+        for piece in stream_complete(prompt, chunk, TRANSLATION_OUTPUT_RATIO, "Chunk translation"):
+            pieces.append(piece)
+            yield piece
+        translated_chunk = "".join(pieces).strip()
+        if cache is not None and translated_chunk:
+            cache.set(cache_key, translated_chunk.encode('utf-8'))
+        record_translation(chunk)
+        logger.info("Streamed text chunk translation completed successfully", extra=SAMPLED)
+    except Exception as e:
+        logger.exception(f"An error occurred during streamed chunk translation: {str(e)}")
+        raise
+
+def translation_chunks(content, source_lang, target_lang, chunk_size=None, stream=False):
+    """
+    Splits text, or streamed text pieces, into chunks that fit the translation token budget.
+
+    :param content: The text, or an iterable of text pieces when stream is True
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param chunk_size: Optional maximum characters per chunk, on top of the token budget (default: None)
+    :param stream: Whether content is an iterable of pieces to chunk lazily (default: False)
+    :return: List of chunk dictionaries, or a generator of them when streaming
+    """
+    max_tokens = translation_chunk_tokens(source_lang, target_lang)
+    if stream:
+        return iter_chunks(content, chunk_size, max_tokens=max_tokens, count_tokens=count_tokens)
+    with stage('chunk'):
+        return chunk_text(content, chunk_size, max_tokens=max_tokens, count_tokens=count_tokens)
+
+def iter_chunk_translations(chunks, source_lang, target_lang, max_in_flight=None, checkpoint=None):
+    """
+    Translates chunks concurrently and yields the results in their original order.
+    Chunks are consumed lazily, so a generator (e.g. chunks of a PDF still being extracted)
+    starts translating as soon as its first chunk is available.
+    With a checkpoint, every translated chunk is recorded as it completes and chunks recorded
+    by an earlier, interrupted run are reused, so a failed job only pays for the missing chunks.
+
+    :param chunks: Iterable of chunk dictionaries from chunk_text or iter_chunks
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param max_in_flight: Maximum concurrent requests (default: TRANSLATION_MAX_IN_FLIGHT)
+    :param checkpoint: Optional JobCheckpoint of the job (default: None)
+    :yield: Tuples of (index, chunk, translated text or None, latency in seconds)
+    """
+    if max_in_flight is None:
+        max_in_flight = TRANSLATION_MAX_IN_FLIGHT
+
+    def translate(item):
+        i, chunk = item
+        if checkpoint is not None:
+            done = checkpoint.get(i)
+            if done is not None:
+                return chunk, done.decode('utf-8')
+        translated_chunk = translate_text_chunk(chunk['text'], source_lang, target_lang)
+        if checkpoint is not None and translated_chunk:
+            checkpoint.save(i, translated_chunk.encode('utf-8'))
+        return chunk, translated_chunk
+
+    for i, (chunk, translated_chunk), latency in imap_ordered(
+        translate, enumerate(chunks), max_in_flight=max_in_flight
+    ):
+        if translated_chunk:
+            logger.info("Translated chunk %d in %.2fs", i + 1, latency, extra=SAMPLED)
+        else:
+            logger.error(f"Failed to translate chunk {i+1}")
+        yield i, chunk, translated_chunk, latency
+
+def log_translation_stats(latencies, elapsed):
+    """
+    Logs the chunk latencies and translation cache counters of a finished translation.
+
+    :param latencies: Latency in seconds of every chunk
+    :param elapsed: Wall-clock time of the translation in seconds
+    """
+    if latencies:
+        logger.info(f"Chunk latency: avg {sum(latencies) / len(latencies):.2f}s, max {max(latencies):.2f}s, "
+                    f"wall-clock {elapsed:.2f}s for {len(latencies)} chunks")
+    cache = get_translation_cache()
+    logger.info(f"Translation cache: {cache.hits} hits, {cache.misses} misses")
 
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Translating chunk {i+1}/{len(chunks)}")
-            translated_chunk = translate_text_chunk(chunk, source_lang, target_lang)
+def translate_chunks(chunks, source_lang, target_lang, max_in_flight=None, checkpoint=None):
+    """
+    Translates chunks concurrently (see iter_chunk_translations) and reassembles the translations
+    in their original order, separated by the original whitespace so paragraphs are kept.
+
+    :param chunks: Iterable of chunk dictionaries from chunk_text or iter_chunks
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param max_in_flight: Maximum concurrent requests (default: TRANSLATION_MAX_IN_FLIGHT)
+    :param checkpoint: Optional JobCheckpoint of the job (default: None)
+    :return: Translated text or None if any chunk fails
+    """
+    start = time.perf_counter()
+    source_chunks = []
+    translated_chunks = []
+    latencies = []
+    failed = 0
+
+    with stage('translate'):
+        for i, chunk, translated_chunk, latency in iter_chunk_translations(
+            chunks, source_lang, target_lang, max_in_flight, checkpoint
+        ):
+            # Keeps the source chunks, in order, to restore their separators when joining
+            source_chunks.append(chunk)
+            latencies.append(latency)
             if translated_chunk:
                 translated_chunks.append(translated_chunk)
             else:
-                logger.error(f"Failed to translate chunk {i+1}")
+                failed += 1
+    log_translation_stats(latencies, time.perf_counter() - start)
+
+    if failed or not translated_chunks:
+        if checkpoint is not None and translated_chunks:
+            logger.info(f"Checkpointed {len(translated_chunks)} translated chunks, a re-run resumes from them")
+        return None
+    if checkpoint is not None:
+        checkpoint.complete()
+    with stage('assemble'):
+        return join_chunks(translated_chunks, source_chunks)
+
+def iter_translated_text(chunks, source_lang, target_lang, max_in_flight=None, checkpoint=None):
+    """
+    Translates chunks like translate_chunks, but yields the translated text piece by piece in its
+    original order (each chunk followed by the original separator) instead of joining it, so that
+    neither the source nor the translation is ever held in memory as a whole.
+    After a chunk fails nothing more is yielded, but the remaining chunks are still translated so
+    the checkpoint holds them for the next run.
 
-        if len(translated_chunks) == len(chunks):
-            translated_text = " ".join(translated_chunks)
+    :param chunks: Iterable of chunk dictionaries from chunk_text or iter_chunks
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param max_in_flight: Maximum concurrent requests (default: TRANSLATION_MAX_IN_FLIGHT)
+    :param checkpoint: Optional JobCheckpoint of the job (default: None)
+    :yield: Pieces of the translated text
+    :raises ValueError: Once all chunks were processed, if any chunk failed or there was nothing to translate
+    """
+    start = time.perf_counter()
+    latencies = []
+    failed = []
+    separator = None
+
+    for i, chunk, translated_chunk, latency in iter_chunk_translations(
+        chunks, source_lang, target_lang, max_in_flight, checkpoint=checkpoint
+    ):
+        latencies.append(latency)
+        if not translated_chunk:
+            failed.append(i + 1)
+        if failed:
+            continue
+        if separator is not None:
+            yield separator
+        yield translated_chunk
+        separator = chunk.get('separator') or " "
+    log_translation_stats(latencies, time.perf_counter() - start)
+
+    if failed:
+        raise ValueError(f"Failed to translate chunks: {failed}")
+    if not latencies:
+        raise ValueError("No text to translate")
+    if checkpoint is not None:
+        checkpoint.complete()
+
+def translate_large_text(text, source_lang, target_lang, chunk_size=None, max_in_flight=None, resume=True):
+    """
+    Translates large text by splitting it into chunks and translating the chunks concurrently.
+    Chunks are packed up to the model's token budget (see translation_chunk_tokens), sent in
+    parallel (bounded by max_in_flight and the shared OpenAI limiter) and the translations
+    are reassembled in their original order. Completed chunks are checkpointed, so translating
+    the same text again after a failure only translates the chunks that were missing.
+    
+    :param text: The text to translate
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param chunk_size: Optional maximum characters per chunk, on top of the token budget (default: None)
+    :param max_in_flight: Maximum concurrent requests (default: TRANSLATION_MAX_IN_FLIGHT)
+    :param resume: Whether to checkpoint completed chunks and resume from earlier runs (default: True)
+    :return: Translated text or None if translation fails
+    """
+    logger.info(f"Starting large text translation from {source_lang} to {target_lang}")
+    try:
+        chunks = translation_chunks(text, source_lang, target_lang, chunk_size)
+        checkpoint = translation_checkpoint(make_cache_key(text), source_lang, target_lang, chunk_size) if resume else None
+        translated_text = translate_chunks(chunks, source_lang, target_lang, max_in_flight, checkpoint)
+        if translated_text:
             logger.info("Large text translation completed successfully")
             return translated_text
         else:
@@ -69,9 +492,36 @@ def translate_large_text(text, source_lang, target_lang, chunk_size=4000):
         logger.exception(f"An error occurred during large text translation: {str(e)}")
         return None
 
+def translate_stream(pieces, source_lang, target_lang, chunk_size=None, max_in_flight=None, checkpoint=None):
+    """
+    Translates streamed content (e.g. PDF pages) while it is still being read.
+
+    :param pieces: Iterable of text pieces
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param chunk_size: Optional maximum characters per chunk, on top of the token budget (default: None)
+    :param max_in_flight: Maximum concurrent requests (default: TRANSLATION_MAX_IN_FLIGHT)
+    :param checkpoint: Optional JobCheckpoint, e.g. from file_translation_checkpoint (default: None)
+    :return: Translated text or None if translation fails
+    """
+    logger.info(f"Starting streamed translation from {source_lang} to {target_lang}")
+    try:
+        chunks = translation_chunks(pieces, source_lang, target_lang, chunk_size, stream=True)
+        translated_text = translate_chunks(chunks, source_lang, target_lang, max_in_flight, checkpoint=checkpoint)
+        if translated_text:
+            logger.info("Streamed translation completed successfully")
+            return translated_text
+        else:
+            logger.error("Streamed translation failed")
+            return None
+    except Exception as e:
+        logger.exception(f"An error occurred during streamed translation: {str(e)}")
+        return None
+
 def translate_text(text, source_lang, target_lang):
     """
     Translates text from source language to target language using OpenAI's API.
+    Text that fits the token budget of one request is sent as is, longer text is chunked.
     
     :param text: The text to translate
     :param source_lang: The source language
@@ -80,16 +530,38 @@ def translate_text(text, source_lang, target_lang):
     """
     logger.info(f"Starting text translation from {source_lang} to {target_lang}")
     try:
-        if check_text_size(text):
+        tokens = count_tokens(text)
+        budget = translation_chunk_tokens(source_lang, target_lang)
+        logger.info(f"Text has {tokens} tokens, request budget is {budget} tokens")
+        if tokens > budget:
             logger.info("Text is large, using large text translation")
             return translate_large_text(text, source_lang, target_lang)
         else:
             logger.info("Text is small, using regular text translation")
-            return translate_text_chunk(text, source_lang, target_lang)
+            with stage('translate'):
+                return translate_text_chunk(text, source_lang, target_lang)
     except Exception as e:
         logger.exception(f"An error occurred during text translation: {str(e)}")
         return None
 
+def translate_text_stream(text, source_lang, target_lang):
+    """
+    Streaming counterpart of translate_text: text that fits one request is streamed token by token,
+    longer text is translated in concurrent chunks and yielded chunk by chunk in order.
+
+    :param text: The text to translate
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :yield: Pieces of the translated text
+    :raises Exception: If the translation fails
+    """
+    logger.info(f"Starting streamed text translation from {source_lang} to {target_lang}")
+    if count_tokens(text) > translation_chunk_tokens(source_lang, target_lang):
+        logger.info("Text is large, streaming the translated chunks in order")
+        yield from iter_translated_text(translation_chunks(text, source_lang, target_lang), source_lang, target_lang)
+    else:
+        yield from translate_text_chunk_stream(text, source_lang, target_lang)
+
 def analyze_sentiment(text):
     """
     Analyzes the sentiment of the given text using OpenAI's API.
@@ -99,20 +571,29 @@ def analyze_sentiment(text):
     """
     logger.info("Starting sentiment analysis")
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a sentiment analyzer. Analyze the sentiment of the following text and respond with 'Positive', 'Negative', or 'Neutral'."},
-                {"role": "user", "content": text}
-            ]
-        )
-        sentiment = response.choices[0].message.content.strip()
+        sentiment = complete(SENTIMENT_PROMPT, text, description="Sentiment analysis")
         logger.info(f"Sentiment analysis completed. Result: {sentiment}")
         return sentiment
     except Exception as e:
         logger.exception(f"An error occurred during sentiment analysis: {str(e)}")
         return None
 
+def analyze_sentiment_stream(text):
+    """
+    Streaming counterpart of analyze_sentiment: yields the result as the tokens arrive.
+
+    :param text: The text to analyze
+    :yield: Pieces of the sentiment analysis result
+    :raises Exception: The error of the request, after it was logged
+    """
+    logger.info("Starting streamed sentiment analysis")
+    try:
+        yield from stream_complete(SENTIMENT_PROMPT, text, description="Sentiment analysis")
+        logger.info("Streamed sentiment analysis completed")
+    except Exception as e:
+        logger.exception(f"An error occurred during sentiment analysis: {str(e)}")
+        raise
+
 def summarize_text(text, max_words=100):
     """
     Summarizes the given text using OpenAI's API.
@@ -123,20 +604,30 @@ def summarize_text(text, max_words=100):
     """
     logger.info(f"Starting text summarization. Max words: {max_words}")
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": f"You are a text summarizer. Summarize the following text in no more than {max_words} words."},
-                {"role": "user", "content": text}
-            ]
-        )
-        summary = response.choices[0].message.content.strip()
+        summary = complete(summary_prompt(max_words), text, description="Summarization")
         logger.info("Text summarization completed successfully")
         return summary
     except Exception as e:
         logger.exception(f"An error occurred during text summarization: {str(e)}")
         return None
 
+def summarize_text_stream(text, max_words=100):
+    """
+    Streaming counterpart of summarize_text: yields the summary as the tokens arrive.
+
+    :param text: The text to summarize
+    :param max_words: The maximum number of words for the summary
+    :yield: Pieces of the summary
+    :raises Exception: The error of the request, after it was logged
+    """
+    logger.info(f"Starting streamed text summarization. Max words: {max_words}")
+    try:
+        yield from stream_complete(summary_prompt(max_words), text, description="Summarization")
+        logger.info("Streamed text summarization completed successfully")
+    except Exception as e:
+        logger.exception(f"An error occurred during text summarization: {str(e)}")
+        raise
+
 def process_text(text, operation, **kwargs):
     """
     Processes text based on the specified operation.
@@ -157,6 +648,27 @@ def process_text(text, operation, **kwargs):
         logger.error(f"Unsupported operation: {operation}")
         return None
 
+def process_text_stream(text, operation, **kwargs):
+    """
+    Streaming counterpart of process_text, yielding the output as it is generated.
+
+    :param text: The text to process
+    :param operation: The operation to perform ('translate', 'analyze_sentiment', or 'summarize')
+    :param kwargs: Additional keyword arguments for specific operations
+    :return: Generator of output pieces
+    :raises ValueError: If the operation is not supported
+    """
+    logger.info(f"Processing text with streamed operation: {operation}")
+    if operation == 'translate':
+        return translate_text_stream(text, kwargs['source_lang'], kwargs['target_lang'])
+    elif operation == 'analyze_sentiment':
+        return analyze_sentiment_stream(text)
+    elif operation == 'summarize':
+        return summarize_text_stream(text, kwargs.get('max_words', 100))
+    else:
+        logger.error(f"Unsupported operation: {operation}")
+        raise ValueError(f"Unsupported operation: {operation}")
+
 def process_file(input_file, output_file, operation, **kwargs):
     """
     Processes a file based on the specified operation.
@@ -164,14 +676,20 @@ def process_file(input_file, output_file, operation, **kwargs):
     :param input_file: Path to the input file
     :param output_file: Path to save the processed file
     :param operation: The operation to perform ('translate', 'analyze_sentiment', or 'summarize')
-    :param kwargs: Additional keyword arguments for specific operations
+    :param kwargs: Additional keyword arguments for specific operations. Pass stream=True/False to
+                   force or disable translating while the file is read and writing the translation as
+                   it arrives (default: streamed for PDF files and files over LARGE_FILE_BYTES)
     :return: Path to the processed file or None if processing fails
     """
     logger.info(f"Processing file. Input: {input_file}, Output: {output_file}, Operation: {operation}")
     try:
-        content = read_file(input_file)
-        logger.info("Input file read successfully")
-        processed_content = process_text(content, operation, **kwargs)
+        stream = kwargs.pop('stream', input_file.lower().endswith('.pdf') or is_large_file(input_file))
+        if stream and operation == 'translate':
+            return translate_file_stream(input_file, output_file, kwargs['source_lang'], kwargs['target_lang'])
+        else:
+            content = read_file(input_file)
+            logger.info("Input file read successfully")
+            processed_content = process_text(content, operation, **kwargs)
         if processed_content:
             write_file(processed_content, output_file)
             logger.info(f"Processed content written to: {output_file}")
@@ -183,6 +701,31 @@ def process_file(input_file, output_file, operation, **kwargs):
         logger.exception(f"An error occurred during file processing: {str(e)}")
         return None
 
+def translate_file_stream(input_file, output_file, source_lang, target_lang):
+    """
+    Translates a file while it is read and writes the translation while it is produced, so memory
+    use stays at a few chunks whatever the file size. The output is written to a partial file and
+    moved into place once every chunk is translated.
+
+    :param input_file: Path to the input file
+    :param output_file: Path to save the translated file
+    :param source_lang: Source language
+    :param target_lang: Target language
+    :return: Path to the translated file
+    :raises ValueError: If a chunk fails to translate
+    """
+    checkpoint = file_translation_checkpoint(input_file, source_lang, target_lang)
+    chunks = translation_chunks(read_file(input_file, stream=True), source_lang, target_lang, stream=True)
+    temp_file = partial_path(output_file)
+    try:
+        write_stream(iter_translated_text(chunks, source_lang, target_lang, checkpoint=checkpoint), temp_file)
+        os.replace(temp_file, output_file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    logger.info(f"Streamed translation written to: {output_file}")
+    return output_file
+
 def translate_file(input_file, output_file, source_lang, target_lang):
     """
     Translates the content of a file from source language to target language.
@@ -210,34 +753,350 @@ def translate_file(input_file, output_file, source_lang, target_lang):
         logger.exception(f"An error occurred during file translation: {str(e)}")
         return None
     
-def batch_translate_files(input_dir=DOCUMENT_INPUT_DIR, output_dir=DOCUMENT_OUTPUT_DIR, source_lang='en', target_lang='es'):
+def translate_document(input_file, output_file, source_lang, target_lang, store):
+    """
+    Translates one document of a batch. The translation is written next to output_file first and
+    moved into place when complete, so output_file never holds a partial translation.
+
+    :param input_file: Path to the input file
+    :param output_file: Path to save the translated file
+    :param source_lang: Source language
+    :param target_lang: Target language
+    :param store: CheckpointStore recording completed files
+    :return: 'translated', 'skipped' or 'failed'
+    """
+    job_key = file_job_key(input_file, output_file, source_lang, target_lang)
+    if os.path.exists(output_file) and store.is_complete(job_key):
+        logger.info(f"Skipping already translated file: {input_file}")
+        return 'skipped'
+
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    temp_file = partial_path(output_file)
+    try:
+        result = process_file(input_file, temp_file, 'translate', source_lang=source_lang, target_lang=target_lang)
+        if not result:
+            logger.error(f"Failed to translate: {input_file}")
+            return 'failed'
+        os.replace(temp_file, output_file)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+    store.complete(job_key, output_file)
+    logger.info(f"Successfully translated: {input_file}")
+    return 'translated'
+
+def batch_translate_files(input_dir=DOCUMENT_INPUT_DIR, output_dir=DOCUMENT_OUTPUT_DIR, source_lang='en', target_lang='es',
+                          workers=None, progress_interval=None):
     """
-    Translates all text files in the input directory and saves the translated files in the output directory.
+    Translates every supported document (.txt, .pdf, .docx) under the input directory, recursively,
+    and saves the translations under the output directory with the same relative paths.
+    Files are translated concurrently; the number of OpenAI requests in flight stays bounded across
+    all files by the shared OpenAI limiter (OPENAI_MAX_CONCURRENCY). Outputs are written atomically,
+    files translated by an earlier run (same contents, languages and output file) are skipped, and
+    files/sec, chunks/sec and tokens/sec are logged while the batch runs.
     
     :param input_dir: Directory containing files to translate (default: DOCUMENT_INPUT_DIR)
     :param output_dir: Directory to save translated files (default: DOCUMENT_OUTPUT_DIR)
     :param source_lang: Source language (default: 'en')
     :param target_lang: Target language (default: 'es')
+    :param workers: Number of files translated at the same time (default: BATCH_FILE_WORKERS)
+    :param progress_interval: Seconds between progress reports (default: BATCH_PROGRESS_INTERVAL)
+    :return: Throughput report with files, translated, skipped and failed counts and per-second rates, or None on error
     """
     logger.info(f"Starting batch translation. Input dir: {input_dir}, Output dir: {output_dir}")
     logger.info(f"Source language: {source_lang}, Target language: {target_lang}")
-    
+    workers = max(1, int(workers or BATCH_FILE_WORKERS))
+    progress_interval = progress_interval or BATCH_PROGRESS_INTERVAL
+
     try:
         os.makedirs(output_dir, exist_ok=True)
-        
-        for filename in os.listdir(input_dir):
-            if filename.endswith('.txt'):  # Assuming we're only translating .txt files
-                input_file = os.path.join(input_dir, filename)
-                output_file = os.path.join(output_dir, f"translated_{filename}")
-                
-                logger.info(f"Translating file: {filename}")
-                result = translate_file(input_file, output_file, source_lang, target_lang)
-                
-                if result:
-                    logger.info(f"Successfully translated: {filename}")
-                else:
-                    logger.error(f"Failed to translate: {filename}")
-        
-        logger.info("Batch translation completed")
+        store = get_checkpoint_store(CHECKPOINT_PATH, CHECKPOINTS_ENABLED, CHECKPOINT_MAX_AGE_DAYS)
+        files = discover_documents(input_dir)
+        logger.info(f"Found {len(files)} documents to translate with {workers} workers")
+
+        start = time.perf_counter()
+        baseline = translation_meter.snapshot()
+        outcomes = {'files': 0, 'translated': 0, 'skipped': 0, 'failed': 0}
+
+        def report():
+            counts = dict(translation_meter.snapshot(), **outcomes)
+            counts.setdefault('chunks', 0)
+            counts.setdefault('tokens', 0)
+            return throughput_report(counts, time.perf_counter() - start, baseline)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for relative_path in files:
+                directory, filename = os.path.split(relative_path)
+                input_file = os.path.join(input_dir, relative_path)
+                output_file = os.path.join(output_dir, directory, f"translated_{filename}")
+                context = contextvars.copy_context()
+                future = executor.submit(context.run, translate_document, input_file, output_file, source_lang, target_lang, store)
+                futures[future] = input_file
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=progress_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        logger.exception(f"An error occurred while translating {futures[future]}: {str(e)}")
+                        outcome = 'failed'
+                    outcomes['files'] += 1
+                    outcomes[outcome] += 1
+                logger.info(f"Batch progress: {outcomes['files']}/{len(files)} files, "
+                            f"{format_throughput(report(), ('files', 'chunks', 'tokens'))}")
+
+        summary = report()
+        logger.info(f"Batch translation completed: {summary['translated']} translated, {summary['skipped']} skipped, "
+                    f"{summary['failed']} failed in {summary['elapsed_seconds']:.2f}s "
+                    f"({format_throughput(summary, ('files', 'chunks', 'tokens'))})")
+        return summary
     except Exception as e:
         logger.exception(f"An error occurred during batch translation: {str(e)}")
+        return None
+
+async def atranslate_text_chunk(chunk, source_lang, target_lang, use_cache=True):
+    """
+    Async counterpart of translate_text_chunk, using the AsyncOpenAI client and the shared translation cache.
+    
+    :param chunk: The chunk of text to translate
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param use_cache: Whether to read from and write to the translation cache (default: True)
+    :return: Translated text chunk or None if translation fails
+    """
+    logger.info("Translating text chunk from %s to %s", source_lang, target_lang, extra=SAMPLED)
+    try:
+        prompt = translation_prompt(source_lang, target_lang)
+        cache = get_translation_cache() if use_cache else None
+        cache_key = make_cache_key(chunk, source_lang, target_lang, OPENAI_MODEL, prompt)
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("Text chunk translation served from cache", extra=SAMPLED)
+                record_translation(chunk)
+                return cached.decode('utf-8')
+
+        translated_chunk = await acomplete(prompt, chunk, TRANSLATION_OUTPUT_RATIO, "Chunk translation")
+        if cache is not None and translated_chunk:
+            cache.set(cache_key, translated_chunk.encode('utf-8'))
+        record_translation(chunk)
+        logger.info("Text chunk translation completed successfully", extra=SAMPLED)
+        return translated_chunk
+    except Exception as e:
+        logger.exception(f"An error occurred during chunk translation: {str(e)}")
+        return None
+
+async def atranslate_chunks(chunks, source_lang, target_lang, checkpoint=None):
+    """
+    Async counterpart of translate_chunks. Chunks are translated concurrently, bounded by the
+    shared OpenAI limiter, and joined in their original order with their original separators.
+    A generator of chunks (e.g. of a PDF still being extracted) is read in a worker thread, and
+    only a bounded window of chunks is read ahead of the oldest unfinished translation. With a
+    checkpoint, chunks recorded by an earlier run, sync or async, are reused and new translations
+    are recorded as they complete.
+
+    :param chunks: Iterable of chunk dictionaries from chunk_text or iter_chunks
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param checkpoint: Optional JobCheckpoint of the job (default: None)
+    :return: Translated text or None if any chunk fails
+    """
+    async def translate(indexed_chunk):
+        i, chunk = indexed_chunk
+        if checkpoint is not None:
+            done = await asyncio.to_thread(checkpoint.get, i)
+            if done is not None:
+                return done.decode('utf-8')
+        translated_chunk = await atranslate_text_chunk(chunk['text'], source_lang, target_lang)
+        if checkpoint is not None and translated_chunk:
+            await asyncio.to_thread(checkpoint.save, i, translated_chunk.encode('utf-8'))
+        return translated_chunk
+
+    source_chunks = []
+
+    async def read_chunks():
+        iterator = iter(chunks)
+        in_memory = isinstance(chunks, (list, tuple))
+        while True:
+            chunk = next(iterator, None) if in_memory else await asyncio.to_thread(next, iterator, None)
+            if chunk is None:
+                return
+            source_chunks.append(chunk)
+            yield len(source_chunks) - 1, chunk
+
+    translated_chunks = []
+    with stage('translate'):
+        async for i, translated_chunk, latency in aimap_ordered(translate, read_chunks(), OPENAI_MAX_CONCURRENCY):
+            if translated_chunk:
+                logger.info("Translated chunk %d in %.2fs", i + 1, latency, extra=SAMPLED)
+                translated_chunks.append(translated_chunk)
+            else:
+                logger.error(f"Failed to translate chunk {i+1}")
+    if not source_chunks or len(translated_chunks) != len(source_chunks):
+        if checkpoint is not None and translated_chunks:
+            logger.info(f"Checkpointed {len(translated_chunks)} translated chunks, a re-run resumes from them")
+        return None
+    if checkpoint is not None:
+        await asyncio.to_thread(checkpoint.complete)
+    with stage('assemble'):
+        return join_chunks(translated_chunks, source_chunks)
+
+async def atranslate_large_text(text, source_lang, target_lang, chunk_size=None, resume=True):
+    """
+    Async counterpart of translate_large_text. It shares the checkpoint of translate_large_text,
+    so either one resumes a job the other left unfinished.
+    
+    :param text: The text to translate
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :param chunk_size: Optional maximum characters per chunk, on top of the token budget (default: None)
+    :param resume: Whether to checkpoint completed chunks and resume from earlier runs (default: True)
+    :return: Translated text or None if translation fails
+    """
+    logger.info(f"Starting large text translation from {source_lang} to {target_lang}")
+    try:
+        chunks = translation_chunks(text, source_lang, target_lang, chunk_size)
+        checkpoint = translation_checkpoint(make_cache_key(text), source_lang, target_lang, chunk_size) if resume else None
+        translated_text = await atranslate_chunks(chunks, source_lang, target_lang, checkpoint)
+        if translated_text:
+            logger.info("Large text translation completed successfully")
+            return translated_text
+        else:
+            logger.error("Large text translation failed")
+            return None
+    except Exception as e:
+        logger.exception(f"An error occurred during large text translation: {str(e)}")
+        return None
+
+async def atranslate_text(text, source_lang, target_lang):
+    """
+    Async counterpart of translate_text.
+    
+    :param text: The text to translate
+    :param source_lang: The source language
+    :param target_lang: The target language
+    :return: Translated text or None if translation fails
+    """
+    logger.info(f"Starting text translation from {source_lang} to {target_lang}")
+    try:
+        if count_tokens(text) > translation_chunk_tokens(source_lang, target_lang):
+            logger.info("Text is large, using large text translation")
+            return await atranslate_large_text(text, source_lang, target_lang)
+        else:
+            logger.info("Text is small, using regular text translation")
+            with stage('translate'):
+                return await atranslate_text_chunk(text, source_lang, target_lang)
+    except Exception as e:
+        logger.exception(f"An error occurred during text translation: {str(e)}")
+        return None
+
+async def acomplete(system_prompt, text, output_ratio=0.0, description="Chat completion"):
+    """
+    Sends one chat completion through the AsyncOpenAI client and the shared OpenAI limiter, which
+    alone bounds the requests per minute, the tokens per minute and the requests in flight.
+
+    :param system_prompt: The system prompt
+    :param text: The user text
+    :param output_ratio: Expected completion tokens per input token, for the token budget (default: 0.0)
+    :param description: Short description of the request used in log messages
+    :return: The completion text
+    """
+    request = chat_request(system_prompt, text)
+    response = await get_openai_limiter().acall(
+        lambda: get_async_openai_client().chat.completions.create(**request),
+        tokens=request_tokens(system_prompt, text, output_ratio), description=description
+    )
+    return completion_text(response)
+
+async def aanalyze_sentiment(text):
+    """
+    Async counterpart of analyze_sentiment.
+    
+    :param text: The text to analyze
+    :return: Sentiment analysis result or None if analysis fails
+    """
+    logger.info("Starting sentiment analysis")
+    try:
+        sentiment = await acomplete(SENTIMENT_PROMPT, text)
+        logger.info(f"Sentiment analysis completed. Result: {sentiment}")
+        return sentiment
+    except Exception as e:
+        logger.exception(f"An error occurred during sentiment analysis: {str(e)}")
+        return None
+
+async def asummarize_text(text, max_words=100):
+    """
+    Async counterpart of summarize_text.
+    
+    :param text: The text to summarize
+    :param max_words: The maximum number of words for the summary
+    :return: Summarized text or None if summarization fails
+    """
+    logger.info(f"Starting text summarization. Max words: {max_words}")
+    try:
+        summary = await acomplete(summary_prompt(max_words), text)
+        logger.info("Text summarization completed successfully")
+        return summary
+    except Exception as e:
+        logger.exception(f"An error occurred during text summarization: {str(e)}")
+        return None
+
+async def aprocess_text(text, operation, **kwargs):
+    """
+    Async counterpart of process_text, returning the same results.
+    
+    :param text: The text to process
+    :param operation: The operation to perform ('translate', 'analyze_sentiment', or 'summarize')
+    :param kwargs: Additional keyword arguments for specific operations
+    :return: Processed text or None if processing fails
+    """
+    logger.info(f"Processing text with operation: {operation}")
+    if operation == 'translate':
+        return await atranslate_text(text, kwargs['source_lang'], kwargs['target_lang'])
+    elif operation == 'analyze_sentiment':
+        return await aanalyze_sentiment(text)
+    elif operation == 'summarize':
+        return await asummarize_text(text, kwargs.get('max_words', 100))
+    else:
+        logger.error(f"Unsupported operation: {operation}")
+        return None
+
+async def aprocess_file(input_file, output_file, operation, **kwargs):
+    """
+    Async counterpart of process_file. Reading, chunking and writing run in worker threads so the
+    event loop stays free for other jobs. Streamed translations are checkpointed like
+    translate_file_stream, so a re-run only translates the chunks that were missing.
+    
+    :param input_file: Path to the input file
+    :param output_file: Path to save the processed file
+    :param operation: The operation to perform ('translate', 'analyze_sentiment', or 'summarize')
+    :param kwargs: Additional keyword arguments for specific operations (see process_file)
+    :return: Path to the processed file or None if processing fails
+    """
+    logger.info(f"Processing file. Input: {input_file}, Output: {output_file}, Operation: {operation}")
+    try:
+        stream = kwargs.pop('stream', input_file.lower().endswith('.pdf') or is_large_file(input_file))
+        if stream and operation == 'translate':
+            source_lang, target_lang = kwargs['source_lang'], kwargs['target_lang']
+            checkpoint = await asyncio.to_thread(file_translation_checkpoint, input_file, source_lang, target_lang)
+            chunks = await asyncio.to_thread(
+                lambda: translation_chunks(read_file(input_file, stream=True), source_lang, target_lang, stream=True)
+            )
+            processed_content = await atranslate_chunks(chunks, source_lang, target_lang, checkpoint)
+        else:
+            content = await asyncio.to_thread(read_file, input_file)
+            logger.info("Input file read successfully")
+            processed_content = await aprocess_text(content, operation, **kwargs)
+        if processed_content:
+            await asyncio.to_thread(write_file, processed_content, output_file)
+            logger.info(f"Processed content written to: {output_file}")
+            return output_file
+        else:
+            logger.error("Processing failed, no content to write")
+            return None
+    except Exception as e:
+        logger.exception(f"An error occurred during file processing: {str(e)}")
+        return None
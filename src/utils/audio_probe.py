@@ -0,0 +1,156 @@
+import os
+import io
+import struct
+from functools import lru_cache
+from utils.mp3 import id3v2_size, parse_frame_header, side_info_size
+from logging_config import get_module_logger
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Number of bytes read from the start (or end) of a file when looking for headers
+PROBE_WINDOW = 64 * 1024
+
+def _read_at(file, offset, size):
+    """
+    Reads up to size bytes from the given offset of a binary file object.
+
+    :param file: Binary file object
+    :param offset: Offset to read from
+    :param size: Number of bytes to read
+    :return: The bytes read
+    """
+    file.seek(offset)
+    return file.read(size)
+
+def probe_mp3(file, file_size):
+    """
+    Reads the duration of an MP3 stream from its first frame: the Xing/Info or VBRI frame count
+    when present, otherwise a constant-bitrate estimate from the stream size.
+
+    :param file: Binary file object positioned anywhere
+    :param file_size: Total size of the stream in bytes
+    :return: Duration in seconds, or None if no frame header was found
+    """
+    head = _read_at(file, 0, 10)
+    start = id3v2_size(head) if head[:3] == b'ID3' else 0
+    window = _read_at(file, start, PROBE_WINDOW)
+
+    offset = 0
+    frame = None
+    while offset + 4 <= len(window):
+        frame = parse_frame_header(window[offset:offset + 4])
+        if frame is not None:
+            break
+        offset += 1
+    if frame is None:
+        return None
+
+    samples_per_second = frame['sample_rate']
+    xing = offset + 4 + side_info_size(frame)
+    if window[xing:xing + 4] in (b'Xing', b'Info') and len(window) >= xing + 12:
+        flags = struct.unpack('>I', window[xing + 4:xing + 8])[0]
+        if flags & 0x01:
+            frames = struct.unpack('>I', window[xing + 8:xing + 12])[0]
+            return frames * frame['samples'] / samples_per_second
+    vbri = offset + 36
+    if window[vbri:vbri + 4] == b'VBRI' and len(window) >= vbri + 18:
+        frames = struct.unpack('>I', window[vbri + 14:vbri + 18])[0]
+        return frames * frame['samples'] / samples_per_second
+
+    audio_bytes = file_size - start - offset
+    tail = _read_at(file, max(file_size - 128, 0), 128)
+    if tail[:3] == b'TAG':
+        audio_bytes -= 128
+    return audio_bytes * 8 / frame['bitrate']
+
+def probe_flac(file):
+    """
+    Reads the duration of a FLAC stream from its STREAMINFO block.
+
+    :param file: Binary file object
+    :return: Duration in seconds, or None if the header is missing or has no sample count
+    """
+    header = _read_at(file, 0, 4 + 4 + 34)
+    if header[:4] != b'fLaC' or len(header) < 42 or (header[4] & 0x7F) != 0:
+        return None
+    info = header[8:42]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    total_samples = ((info[13] & 0x0F) << 32) | struct.unpack('>I', info[14:18])[0]
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+def probe_ogg(file, file_size):
+    """
+    Reads the duration of an Ogg Vorbis or Opus stream from the granule position of its last page.
+
+    :param file: Binary file object
+    :param file_size: Total size of the stream in bytes
+    :return: Duration in seconds, or None if the codec or last page cannot be found
+    """
+    head = _read_at(file, 0, 4096)
+    if head[:4] != b'OggS':
+        return None
+    pre_skip = 0
+    vorbis = head.find(b'\x01vorbis')
+    opus = head.find(b'OpusHead')
+    if vorbis != -1 and len(head) >= vorbis + 16:
+        sample_rate = struct.unpack('<I', head[vorbis + 12:vorbis + 16])[0]
+    elif opus != -1 and len(head) >= opus + 12:
+        sample_rate = 48000  # Opus granule positions always count 48 kHz samples
+        pre_skip = struct.unpack('<H', head[opus + 10:opus + 12])[0]
+    else:
+        return None
+
+    tail_start = max(file_size - PROBE_WINDOW, 0)
+    tail = _read_at(file, tail_start, PROBE_WINDOW)
+    last_page = tail.rfind(b'OggS')
+    if last_page == -1 or len(tail) < last_page + 14 or not sample_rate:
+        return None
+    granule = struct.unpack('<q', tail[last_page + 6:last_page + 14])[0]
+    if granule <= 0:
+        return None
+    return max(granule - pre_skip, 0) / sample_rate
+
+def probe_stream(file, file_size, file_extension):
+    """
+    Reads the duration of an audio stream from its container headers, without decoding audio.
+
+    :param file: Binary file object
+    :param file_size: Total size of the stream in bytes
+    :param file_extension: The audio format extension ('.mp3', '.flac' or '.ogg')
+    :return: Duration in seconds, or None if the headers do not give the duration
+    """
+    if file_extension in ('.mp3', ''):
+        return probe_mp3(file, file_size)
+    elif file_extension == '.flac':
+        return probe_flac(file)
+    elif file_extension == '.ogg':
+        return probe_ogg(file, file_size)
+    return None
+
+@lru_cache(maxsize=512)
+def _probe_file(file_path, mtime_ns, file_size, file_extension):
+    """
+    Probes a file's duration, memoized per (path, mtime, size) so repeated checks are free.
+    """
+    with open(file_path, 'rb') as file:
+        return probe_stream(file, file_size, file_extension)
+
+def probe_audio_duration(audio_input, file_extension):
+    """
+    Returns the duration of an audio file or audio bytes using only container headers.
+
+    :param audio_input: Path to the audio file or audio content as bytes
+    :param file_extension: The audio format extension, e.g. '.mp3'
+    :return: Duration in seconds, or None if it cannot be determined from the headers
+    """
+    try:
+        if isinstance(audio_input, bytes):
+            return probe_stream(io.BytesIO(audio_input), len(audio_input), file_extension)
+        stat = os.stat(audio_input)
+        return _probe_file(os.path.abspath(audio_input), stat.st_mtime_ns, stat.st_size, file_extension)
+    except (OSError, struct.error, ValueError) as e:
+        logger.debug(f"Header probe failed, falling back to decoding: {str(e)}")
+        return None
@@ -0,0 +1,172 @@
+import io
+import wave
+import threading
+import subprocess
+from logging_config import get_module_logger
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Seconds of audio decoded at a time by split_audio_on_silence
+READ_BLOCK_SECONDS = 5
+
+def find_cut(audio, search_from, limit, silence_thresh, min_silence_ms):
+    """
+    Returns the cut point in the middle of the last silence between search_from and limit, or limit
+    when there is none.
+
+    :param audio: pydub AudioSegment
+    :param search_from: Start of the searched range in milliseconds
+    :param limit: End of the searched range in milliseconds
+    :param silence_thresh: Loudness in dBFS below which audio counts as silence
+    :param min_silence_ms: Minimum length of a silence usable as a cut point
+    :return: Cut point in milliseconds
+    """
+    from pydub.silence import detect_silence
+
+    silences = detect_silence(audio[search_from:limit], min_silence_len=min_silence_ms, silence_thresh=silence_thresh)
+    if silences:
+        silence_start, silence_end = silences[-1]
+        return search_from + (silence_start + silence_end) // 2
+    logger.debug(f"No silence found between {search_from}ms and {limit}ms, cutting at the limit")
+    return limit
+
+def find_split_points(audio, max_segment_ms, min_silence_ms=500, silence_offset_db=16):
+    """
+    Finds segment boundaries no longer than max_segment_ms, cutting in the middle of the
+    last silence before each limit (or exactly at the limit when there is no silence).
+
+    :param audio: pydub AudioSegment
+    :param max_segment_ms: Maximum segment length in milliseconds
+    :param min_silence_ms: Minimum length of a silence usable as a cut point (default: 500)
+    :param silence_offset_db: How far below the average loudness counts as silence (default: 16 dB)
+    :return: List of (start_ms, end_ms) tuples covering the whole audio
+    """
+    total = len(audio)
+    silence_thresh = audio.dBFS - silence_offset_db
+    segments = []
+    start = 0
+    while total - start > max_segment_ms:
+        # Only search the second half of the window so segments stay reasonably long
+        search_from = start + max_segment_ms // 2
+        limit = start + max_segment_ms
+        cut = find_cut(audio, search_from, limit, silence_thresh, min_silence_ms)
+        segments.append((start, cut))
+        start = cut
+    if start < total:
+        segments.append((start, total))
+    return segments
+
+def _iter_wav_pcm(wav, sample_rate):
+    """
+    Reads an open PCM WAV file one block at a time, converted to mono 16-bit PCM at sample_rate.
+    """
+    from pydub import AudioSegment
+
+    block_frames = wav.getframerate() * READ_BLOCK_SECONDS
+    while True:
+        data = wav.readframes(block_frames)
+        if not data:
+            return
+        block = AudioSegment(data=data, sample_width=wav.getsampwidth(), frame_rate=wav.getframerate(),
+                             channels=wav.getnchannels())
+        yield block.set_channels(1).set_frame_rate(sample_rate).set_sample_width(2).raw_data
+
+def _iter_ffmpeg_pcm(audio_input, sample_rate):
+    """
+    Decodes any format ffmpeg reads into mono 16-bit PCM at sample_rate, one block at a time.
+    """
+    from pydub import AudioSegment
+    from pydub.exceptions import CouldntDecodeError
+
+    is_bytes = isinstance(audio_input, bytes)
+    command = [AudioSegment.converter, '-v', 'error', '-i', 'pipe:0' if is_bytes else audio_input,
+               '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1']
+    process = subprocess.Popen(command, stdin=subprocess.PIPE if is_bytes else subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if is_bytes:
+        def feed():
+            try:
+                process.stdin.write(audio_input)
+                process.stdin.close()
+            except (OSError, ValueError):
+                pass
+        threading.Thread(target=feed, name='ffmpeg-feed', daemon=True).start()
+    try:
+        block_size = sample_rate * 2 * READ_BLOCK_SECONDS
+        while True:
+            data = process.stdout.read(block_size)
+            if not data:
+                break
+            yield data
+        if process.wait() != 0:
+            raise CouldntDecodeError(f"ffmpeg could not decode the audio: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+def iter_pcm_blocks(audio_input, sample_rate):
+    """
+    Decodes audio into mono 16-bit PCM at sample_rate a few seconds at a time, so the decoded
+    recording is never held in memory. PCM WAV is read directly; other formats go through ffmpeg.
+
+    :param audio_input: Path to the audio file or audio content as bytes
+    :param sample_rate: Sample rate of the produced PCM in Hz
+    :yield: LINEAR16 byte blocks
+    """
+    source = io.BytesIO(audio_input) if isinstance(audio_input, bytes) else audio_input
+    try:
+        wav = wave.open(source, 'rb')
+    except (wave.Error, EOFError):
+        yield from _iter_ffmpeg_pcm(audio_input, sample_rate)
+        return
+    with wav:
+        yield from _iter_wav_pcm(wav, sample_rate)
+
+def split_audio_on_silence(audio_input, max_segment_seconds, sample_rate, min_silence_ms=500, silence_offset_db=16):
+    """
+    Splits audio into mono 16-bit PCM segments at silence boundaries.
+    Segments are produced lazily so that they can be transcribed while later ones are prepared.
+    The audio is decoded in blocks of READ_BLOCK_SECONDS and silences are searched one segment-long
+    window at a time, so memory use stays at about one segment of PCM (max_segment_seconds *
+    sample_rate * 2 bytes) whatever the recording length. The silence threshold is relative to the
+    loudness of each window rather than of the whole recording.
+
+    :param audio_input: Path to the audio file or audio content as bytes
+    :param max_segment_seconds: Maximum segment length in seconds
+    :param sample_rate: Sample rate of the produced PCM segments in Hz
+    :param min_silence_ms: Minimum length of a silence usable as a cut point (default: 500)
+    :param silence_offset_db: How far below the window's average loudness counts as silence (default: 16 dB)
+    :yield: Dictionaries with 'start' and 'end' (seconds) and 'content' (LINEAR16 bytes)
+    """
+    from pydub import AudioSegment
+
+    max_segment_ms = int(max_segment_seconds * 1000)
+    window_bytes = max_segment_ms * sample_rate // 1000 * 2
+    buffer = bytearray()
+    start_frame = 0
+    count = 0
+
+    def segment(size):
+        nonlocal start_frame, count
+        frames = size // 2
+        result = {'start': start_frame / sample_rate, 'end': (start_frame + frames) / sample_rate,
+                  'content': bytes(buffer[:size])}
+        del buffer[:size]
+        start_frame += frames
+        count += 1
+        return result
+
+    for block in iter_pcm_blocks(audio_input, sample_rate):
+        buffer += block
+        # Cuts a segment whenever more than one segment of audio is buffered
+        while len(buffer) > window_bytes:
+            window = AudioSegment(data=bytes(buffer[:window_bytes]), sample_width=2, frame_rate=sample_rate, channels=1)
+            cut = find_cut(window, max_segment_ms // 2, max_segment_ms, window.dBFS - silence_offset_db, min_silence_ms)
+            yield segment(max(2, cut * sample_rate // 1000 * 2))
+    if buffer:
+        yield segment(len(buffer))
+    logger.info(f"Split {start_frame / sample_rate:.2f}s of audio into {count} segments")
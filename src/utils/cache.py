@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from logging_config import get_module_logger
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Caches opened by get_cache, keyed by database path
+_caches = {}
+_caches_lock = threading.Lock()
+
+def make_cache_key(*parts):
+    """
+    Builds a content-addressed cache key from the given parts.
+
+    :param parts: JSON-serializable values that identify the cached content
+    :return: Hex SHA-256 digest of the parts
+    """
+    payload = json.dumps(parts, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class DiskCache:
+    """
+    Persistent key/value cache stored in SQLite, with size-bounded LRU eviction and hit/miss counters.
+    Errors from the underlying database are logged and treated as cache misses.
+    """
+
+    def __init__(self, path, max_bytes, enabled=True):
+        """
+        :param path: Path to the SQLite database file
+        :param max_bytes: Maximum total size of the cached values in bytes
+        :param enabled: Whether the cache is used (False bypasses all reads and writes)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._size = 0
+
+    def _connect(self):
+        """
+        Opens the database on first use and creates the cache table if needed.
+        """
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache (last_access)")
+            self._conn.commit()
+            self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            logger.info(f"Opened cache {self.path} ({self._size} bytes)")
+        return self._conn
+
+    def get(self, key):
+        """
+        Returns the cached value for the key and marks it as recently used.
+
+        :param key: The cache key
+        :return: The cached bytes or None on a miss (or when the cache is disabled)
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                self.hits += 1
+                return bytes(row[0])
+            except sqlite3.Error as e:
+                logger.warning(f"Cache read failed for {self.path}: {str(e)}")
+                self.misses += 1
+                return None
+
+    def set(self, key, value):
+        """
+        Stores a value and evicts the least recently used entries while the cache is over its size limit.
+
+        :param key: The cache key
+        :param value: The value to store (bytes)
+        """
+        if not self.enabled or value is None:
+            return
+        size = len(value)
+        if size > self.max_bytes:
+            logger.debug(f"Value of {size} bytes exceeds cache size limit, not caching")
+            return
+        with self._lock:
+            try:
+                conn = self._connect()
+                previous = conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, sqlite3.Binary(value), size, time.time())
+                )
+                self._size += size - (previous[0] if previous else 0)
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache write failed for {self.path}: {str(e)}")
+
+    def _evict(self, conn):
+        """
+        Deletes least recently used entries until the cache fits in max_bytes.
+
+        :param conn: Open database connection
+        """
+        while self._size > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM cache ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                self._size = 0
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._size -= size
+                self.evictions += 1
+                if self._size <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """
+        Removes every entry from the cache and resets the counters.
+        """
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM cache")
+                conn.commit()
+                self._size = 0
+            except sqlite3.Error as e:
+                logger.warning(f"Cache clear failed for {self.path}: {str(e)}")
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        :return: Dictionary with hits, misses, evictions, entries and size_bytes
+        """
+        with self._lock:
+            entries = 0
+            if self.enabled:
+                try:
+                    entries = self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+                except sqlite3.Error as e:
+                    logger.warning(f"Cache stats failed for {self.path}: {str(e)}")
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'size_bytes': self._size,
+            }
+
+def get_cache(path, max_bytes, enabled=True):
+    """
+    Returns the shared DiskCache for the given database path, creating it on first use.
+
+    :param path: Path to the SQLite database file
+    :param max_bytes: Maximum total size of the cached values in bytes
+    :param enabled: Whether the cache is used
+    :return: DiskCache instance
+    """
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = DiskCache(path, max_bytes, enabled)
+            _caches[path] = cache
+        return cache
@@ -0,0 +1,268 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from utils.cache import make_cache_key
+from logging_config import get_module_logger
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Checkpoint stores opened by get_checkpoint_store, keyed by database path
+_stores = {}
+_stores_lock = threading.Lock()
+
+def file_digest(path, block_size=1024 * 1024):
+    """
+    Returns the SHA-256 digest of a file's contents, read in blocks.
+
+    :param path: Path to the file
+    :param block_size: Bytes read at a time (default: 1 MB)
+    :return: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class CheckpointStore:
+    """
+    On-disk record of the chunks completed by long jobs (document translations, audiobooks), stored in SQLite.
+    Jobs are identified by a key derived from their input and parameters, so a re-run of the same job
+    picks up the finished chunks instead of sending them to the API again.
+    Jobs that never complete expire once they have not saved a chunk for max_age_days, and the pages
+    freed by dropped chunks are returned to the file system (auto_vacuum=INCREMENTAL).
+    Errors from the underlying database are logged and treated as missing checkpoints.
+    """
+
+    def __init__(self, path, enabled=True, max_age_days=0):
+        """
+        :param path: Path to the SQLite database file
+        :param enabled: Whether checkpoints are used (False bypasses all reads and writes)
+        :param max_age_days: Days after its last saved chunk an unfinished job expires, 0 = never (default: 0)
+        """
+        self.path = path
+        self.enabled = enabled
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        """
+        Opens the database on first use, creates or upgrades the checkpoint tables and expires stale jobs.
+        """
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            # auto_vacuum only applies to a new database when set before its first table is created
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "job TEXT NOT NULL, idx INTEGER NOT NULL, output BLOB NOT NULL, updated_at REAL NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (job, idx))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (job TEXT PRIMARY KEY, description TEXT, completed_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+            if 'updated_at' not in columns:
+                # Databases written before chunks were timestamped: their jobs count as updated now
+                conn.execute("ALTER TABLE chunks ADD COLUMN updated_at REAL NOT NULL DEFAULT 0")
+                conn.execute("UPDATE chunks SET updated_at = ?", (time.time(),))
+            conn.commit()
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # An existing database only switches to incremental auto_vacuum after a full VACUUM
+                logger.info(f"Enabling incremental vacuum for {self.path}")
+                conn.execute("VACUUM")
+            self._conn = conn
+            self._expire(self.max_age_days)
+        return self._conn
+
+    def _reclaim(self):
+        """
+        Returns the pages freed by deleted chunks to the file system. Call with _lock held.
+        """
+        # executescript steps the pragma to completion; execute would free a single page
+        self._conn.executescript("PRAGMA incremental_vacuum")
+
+    def _expire(self, max_age_days):
+        """
+        Drops the chunks of unfinished jobs that saved no chunk for max_age_days. Call with _lock held.
+
+        :return: Number of expired jobs
+        """
+        if max_age_days <= 0:
+            return 0
+        cutoff = time.time() - max_age_days * 24 * 60 * 60
+        stale = [row[0] for row in self._conn.execute(
+            "SELECT job FROM chunks GROUP BY job HAVING MAX(updated_at) < ?", (cutoff,)
+        )]
+        if stale:
+            self._conn.executemany("DELETE FROM chunks WHERE job = ?", [(job,) for job in stale])
+            self._conn.commit()
+            self._reclaim()
+            logger.info(f"Expired {len(stale)} unfinished checkpoint jobs older than {max_age_days} days")
+        return len(stale)
+
+    def load(self, job_key):
+        """
+        Returns the outputs of the chunks a job has completed so far.
+
+        :param job_key: The job key
+        :return: Dictionary of chunk index to output bytes
+        """
+        if not self.enabled:
+            return {}
+        with self._lock:
+            try:
+                rows = self._connect().execute("SELECT idx, output FROM chunks WHERE job = ?", (job_key,)).fetchall()
+                return {idx: bytes(output) for idx, output in rows}
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint read failed for {self.path}: {str(e)}")
+                return {}
+
+    def save(self, job_key, index, output):
+        """
+        Records the output of one completed chunk.
+
+        :param job_key: The job key
+        :param index: Index of the chunk in the job
+        :param output: The chunk output (bytes)
+        """
+        if not self.enabled or output is None:
+            return
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("INSERT OR REPLACE INTO chunks (job, idx, output, updated_at) VALUES (?, ?, ?, ?)",
+                             (job_key, index, sqlite3.Binary(output), time.time()))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint write failed for {self.path}: {str(e)}")
+
+    def complete(self, job_key, description=None):
+        """
+        Marks a job as complete and drops its chunk outputs, which are no longer needed.
+
+        :param job_key: The job key
+        :param description: Optional description stored with the job, e.g. the output path
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM chunks WHERE job = ?", (job_key,))
+                conn.execute("INSERT OR REPLACE INTO jobs (job, description, completed_at) VALUES (?, ?, ?)",
+                             (job_key, description, time.time()))
+                conn.commit()
+                self._reclaim()
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint write failed for {self.path}: {str(e)}")
+
+    def is_complete(self, job_key):
+        """
+        Tells whether a job was marked as complete.
+
+        :param job_key: The job key
+        :return: True if the job completed
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            try:
+                row = self._connect().execute("SELECT 1 FROM jobs WHERE job = ?", (job_key,)).fetchone()
+                return row is not None
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint read failed for {self.path}: {str(e)}")
+                return False
+
+    def expire(self, max_age_days=None):
+        """
+        Drops the chunks of unfinished jobs that saved no chunk for max_age_days and reclaims their space.
+        Runs automatically with the store's max_age_days when the database is opened.
+
+        :param max_age_days: Age in days, 0 = keep everything (default: the store's max_age_days)
+        :return: Number of expired jobs
+        """
+        if not self.enabled:
+            return 0
+        with self._lock:
+            try:
+                self._connect()
+                return self._expire(self.max_age_days if max_age_days is None else max_age_days)
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint expiry failed for {self.path}: {str(e)}")
+                return 0
+
+    def discard(self, job_key):
+        """
+        Forgets a job and its completed chunks, so the next run starts from scratch.
+
+        :param job_key: The job key
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute("DELETE FROM chunks WHERE job = ?", (job_key,))
+                conn.execute("DELETE FROM jobs WHERE job = ?", (job_key,))
+                conn.commit()
+                self._reclaim()
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint delete failed for {self.path}: {str(e)}")
+
+class JobCheckpoint:
+    """
+    Checkpoint of one job: the chunk outputs recorded by earlier runs, plus methods to record new ones.
+    """
+
+    def __init__(self, store, *parts):
+        """
+        :param store: The CheckpointStore
+        :param parts: JSON-serializable values identifying the job, e.g. operation, input digest and parameters
+        """
+        self.store = store
+        self.key = make_cache_key(*parts)
+        self._outputs = store.load(self.key)
+        self.resumed = len(self._outputs)
+        if self.resumed:
+            logger.info(f"Resuming job {self.key[:12]} with {self.resumed} completed chunks")
+
+    def get(self, index):
+        """
+        Returns the recorded output of a chunk, or None if it has not completed yet.
+        """
+        return self._outputs.get(index)
+
+    def save(self, index, output):
+        """
+        Records the output of a completed chunk.
+        """
+        self.store.save(self.key, index, output)
+
+    def complete(self, description=None):
+        """
+        Marks the job as complete.
+        """
+        self.store.complete(self.key, description)
+
+def get_checkpoint_store(path, enabled=True, max_age_days=0):
+    """
+    Returns the shared CheckpointStore for the given database path, creating it on first use.
+
+    :param path: Path to the SQLite database file
+    :param enabled: Whether checkpoints are used
+    :param max_age_days: Days after its last saved chunk an unfinished job expires, 0 = never (default: 0)
+    :return: CheckpointStore instance
+    """
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = CheckpointStore(path, enabled, max_age_days)
+            _stores[path] = store
+        return store
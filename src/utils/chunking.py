@@ -0,0 +1,319 @@
+import re
+from logging_config import get_module_logger, SAMPLED
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Paragraphs are separated by a blank line
+PARAGRAPH_BREAK = re.compile(r'[ \t\r\f\v]*\n[ \t\r\f\v]*\n\s*')
+
+# Sentence ends: Latin-style terminators must be followed by whitespace, while CJK, Arabic and
+# Indic terminators end a sentence even without a following space. Closing quotes and brackets
+# stay with the sentence they close.
+SENTENCE_END = re.compile(
+    r'([.!?…]+["\'”’»)\]]*)(\s+|$)'
+    r'|([。！？；؟۔।॥]+["\'”’»」』）)\]]*)(\s*)'
+)
+
+# Words followed by a period that usually do not end a sentence
+ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e', 'fig', 'no',
+    'vol', 'p', 'pp', 'approx', 'dept', 'inc', 'ltd', 'co', 'corp', 'jan', 'feb', 'mar', 'apr',
+    'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec', 'sra', 'srta', 'mme', 'mlle', 'hr', 'fr',
+}
+
+WORD = re.compile(r'(\S+)(\s*)')
+
+def estimate_tokens(text):
+    """
+    Estimates the number of model tokens in a text without a tokenizer. The estimate errs high:
+    about three ASCII characters per token and one token per non-ASCII character.
+
+    :param text: The text
+    :return: Estimated token count
+    """
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return (ascii_chars + 2) // 3 + (len(text) - ascii_chars)
+
+def split_paragraphs(text):
+    """
+    Splits text into paragraphs at blank lines.
+
+    :param text: The text
+    :return: List of (paragraph, separator) tuples; the separator is the whitespace that followed the paragraph
+    """
+    paragraphs = []
+    start = len(text) - len(text.lstrip())
+    for match in PARAGRAPH_BREAK.finditer(text, start):
+        if match.start() > start:
+            paragraphs.append((text[start:match.start()], match.group()))
+        start = match.end()
+    tail = text[start:]
+    if tail.strip():
+        body = tail.rstrip()
+        paragraphs.append((body, tail[len(body):]))
+    return paragraphs
+
+def _is_abbreviation(text, terminator_start, next_start):
+    """
+    Checks whether a period at terminator_start belongs to an abbreviation or initial
+    rather than ending the sentence.
+    """
+    word_start = max(text.rfind(' ', 0, terminator_start), text.rfind('\n', 0, terminator_start)) + 1
+    word = text[word_start:terminator_start].lstrip('("\'“‘¿¡').lower()
+    if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+        return True
+    # A lowercase continuation means the period was not a sentence end (e.g. "approx. two")
+    return next_start < len(text) and text[next_start].islower()
+
+def split_sentences(text):
+    """
+    Splits a paragraph into sentences, for Latin, CJK, Arabic and Indic scripts.
+
+    :param text: The paragraph
+    :return: List of (sentence, separator) tuples; the separator is the whitespace that followed the sentence
+    """
+    sentences = []
+    start = 0
+    for match in SENTENCE_END.finditer(text):
+        if match.group(1) is not None:
+            end, separator = match.end(1), match.group(2)
+            if match.group(1) == '.' and _is_abbreviation(text, match.start(1), match.end()):
+                continue
+        else:
+            end, separator = match.end(3), match.group(4)
+        if end > start:
+            sentences.append((text[start:end], separator))
+        start = match.end()
+    if start < len(text):
+        body = text[start:].rstrip()
+        if body:
+            sentences.append((body, text[start + len(body):]))
+    return sentences
+
+def _split_text_sentences(text):
+    """
+    Splits text into sentences across paragraphs; a paragraph break always ends a sentence.
+    Concatenating the sentences and their separators gives back the text without leading whitespace.
+    """
+    sentences = []
+    for paragraph, paragraph_separator in split_paragraphs(text):
+        parts = split_sentences(paragraph)
+        if parts:
+            sentence, separator = parts[-1]
+            parts[-1] = (sentence, separator + paragraph_separator)
+        sentences.extend(parts)
+    return sentences
+
+# Characters before the end of the streamed text that are searched again for a sentence end when the
+# next piece arrives, so that terminators and closing quotes split across pieces are still found
+_RESCAN_CHARS = 16
+
+def iter_sentences(pieces, max_chars=1000):
+    """
+    Groups streamed text (e.g. the tokens of a completion) into sentences, yielding each sentence as
+    soon as the text after it has started, so it can be spoken while the rest is still generated.
+    Only the text that arrived since the previous piece is searched for a sentence end, and a sentence
+    running past max_chars is cut at its last space, so the work stays linear in the text length.
+
+    :param pieces: Iterable of text pieces
+    :param max_chars: Maximum characters of a yielded sentence (default: 1000)
+    :yield: Sentences, without surrounding whitespace
+    """
+    buffer = ""
+    scan_from = 0
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) <= max_chars and not (SENTENCE_END.search(buffer, scan_from) or
+                                             PARAGRAPH_BREAK.search(buffer, scan_from)):
+            scan_from = max(0, len(buffer.rstrip()) - _RESCAN_CHARS)
+            continue
+        sentences = _split_text_sentences(buffer)
+        if len(sentences) > 1:
+            for sentence, _ in sentences[:-1]:
+                yield sentence.strip()
+            sentence, separator = sentences[-1]
+            buffer = sentence + separator
+        while len(buffer) > max_chars:
+            cut = buffer.rfind(' ', 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            head = buffer[:cut].strip()
+            if head:
+                yield head
+            buffer = buffer[cut:].lstrip()
+        scan_from = max(0, len(buffer.rstrip()) - _RESCAN_CHARS)
+    for sentence, _ in _split_text_sentences(buffer):
+        yield sentence.strip()
+
+class _Limits:
+    """
+    Character, UTF-8 byte and token limits of a chunk.
+    """
+
+    def __init__(self, max_chars, max_bytes, max_tokens, count_tokens):
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def measure(self, text):
+        """
+        :return: (characters, bytes, tokens) of the text; bytes and tokens are only counted when limited
+        """
+        return (
+            len(text),
+            len(text.encode('utf-8')) if self.max_bytes else 0,
+            self.count_tokens(text) if self.max_tokens else 0,
+        )
+
+    def measure_separator(self, separator):
+        """
+        Whitespace separators are counted as one token per character, which is never an underestimate.
+        """
+        return (len(separator), len(separator.encode('utf-8')) if self.max_bytes else 0, len(separator))
+
+    def fits(self, size):
+        chars, size_bytes, tokens = size
+        return ((not self.max_chars or chars <= self.max_chars)
+                and (not self.max_bytes or size_bytes <= self.max_bytes)
+                and (not self.max_tokens or tokens <= self.max_tokens))
+
+def _hard_split(text, limits):
+    """
+    Cuts a single word that exceeds the limits into pieces that fit.
+
+    :return: List of pieces
+    """
+    pieces = []
+    start = 0
+    while start < len(text):
+        # Binary search for the longest piece that fits, taking at least one character
+        low, high = start + 1, min(start + limits.max_chars, len(text)) if limits.max_chars else len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if limits.fits(limits.measure(text[start:middle])):
+                low = middle
+            else:
+                high = middle - 1
+        end = low
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+def _iter_units(text, limits):
+    """
+    Breaks text into the largest units that fit the limits: whole paragraphs, otherwise sentences,
+    otherwise words, otherwise pieces of words.
+
+    :yield: Tuples of (unit, separator, size, starts_block); starts_block marks the first unit of a
+            split paragraph or sentence, which always begins a new chunk
+    """
+    for paragraph, paragraph_separator in split_paragraphs(text):
+        size = limits.measure(paragraph)
+        if limits.fits(size):
+            yield paragraph, paragraph_separator, size, False
+            continue
+        sentences = split_sentences(paragraph)
+        for i, (sentence, separator) in enumerate(sentences):
+            if i == len(sentences) - 1:
+                separator = paragraph_separator
+            starts_block = i == 0
+            size = limits.measure(sentence)
+            if limits.fits(size):
+                yield sentence, separator, size, starts_block
+                continue
+            words = [(word, space) for word, space in WORD.findall(sentence)]
+            for j, (word, space) in enumerate(words):
+                if j == len(words) - 1:
+                    space = separator
+                pieces = [word] if limits.fits(limits.measure(word)) else _hard_split(word, limits)
+                for k, piece in enumerate(pieces):
+                    yield piece, space if k == len(pieces) - 1 else "", limits.measure(piece), starts_block or j == 0
+                    starts_block = False
+
+def chunk_text(text, max_chars=5000, max_bytes=None, max_tokens=None, count_tokens=None):
+    """
+    Splits text into chunks that never exceed the character, byte and token limits.
+    Whole paragraphs are kept together when they fit; longer paragraphs are split at sentence
+    boundaries, and only sentences that are still too long are split between words.
+    Each chunk records the original whitespace that followed it, so join_chunks can restore
+    the paragraph structure of the text.
+
+    :param text: The text to split
+    :param max_chars: Maximum characters per chunk (default: 5000, None = no limit)
+    :param max_bytes: Maximum UTF-8 bytes per chunk (default: no limit)
+    :param max_tokens: Maximum tokens per chunk (default: no limit)
+    :param count_tokens: Callable returning the token count of a text (default: estimate_tokens)
+    :return: List of dictionaries with 'text' and 'separator'
+    """
+    limits = _Limits(max_chars, max_bytes, max_tokens, count_tokens)
+    chunks = []
+    parts = []
+    size = (0, 0, 0)
+    pending_separator = ""
+    for unit, separator, unit_size, starts_block in _iter_units(text, limits):
+        if parts:
+            separator_size = limits.measure_separator(pending_separator)
+            combined = tuple(a + b + c for a, b, c in zip(size, separator_size, unit_size))
+            if starts_block or not limits.fits(combined):
+                chunks.append({'text': "".join(parts), 'separator': pending_separator})
+                parts = [unit]
+                size = unit_size
+            else:
+                parts.append(pending_separator)
+                parts.append(unit)
+                size = combined
+        else:
+            parts.append(unit)
+            size = unit_size
+        pending_separator = separator
+    if parts:
+        chunks.append({'text': "".join(parts), 'separator': pending_separator})
+    logger.info("Text split into %d chunks (max %s chars, %s bytes, %s tokens)", len(chunks), max_chars, max_bytes, max_tokens,
+                extra=SAMPLED)
+    return chunks
+
+def iter_chunks(pieces, max_chars=5000, max_bytes=None, max_tokens=None, count_tokens=None):
+    """
+    Chunks streamed text (e.g. PDF pages) as it arrives, with the same limits as chunk_text.
+    Only a bounded amount of text is buffered: once enough has arrived, every chunk but the last
+    is yielded and the last one is carried over to be completed by the following pieces.
+
+    :param pieces: Iterable of text pieces
+    :yield: Dictionaries with 'text' and 'separator'
+    """
+    # Characters to buffer before chunking: a few chunks' worth, taking about four characters per token
+    target = 4 * (max_chars or max_bytes or 4 * (max_tokens or 5000))
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered < target:
+            continue
+        chunks = chunk_text("".join(buffer), max_chars, max_bytes, max_tokens, count_tokens)
+        buffer, buffered = [], 0
+        if chunks:
+            last = chunks.pop()
+            yield from chunks
+            carry = last['text'] + last['separator']
+            buffer, buffered = [carry], len(carry)
+    if buffer:
+        yield from chunk_text("".join(buffer), max_chars, max_bytes, max_tokens, count_tokens)
+
+def join_chunks(texts, chunks):
+    """
+    Joins processed chunk texts (e.g. translations) with the whitespace that separated the
+    original chunks, so paragraph breaks survive.
+
+    :param texts: Processed text of each chunk, in order
+    :param chunks: The chunks the texts were produced from
+    :return: The joined text
+    """
+    parts = []
+    for i, (text, chunk) in enumerate(zip(texts, chunks)):
+        parts.append(text)
+        if i < len(chunks) - 1:
+            parts.append(chunk.get('separator') or " ")
+    return "".join(parts)
@@ -0,0 +1,239 @@
+import asyncio
+import inspect
+import itertools
+import os
+import threading
+from logging_config import get_module_logger
+from config.settings import (
+    OPENAI_API_KEY, GOOGLE_APPLICATION_CREDENTIALS, OPENAI_BASE_URL, OPENAI_CLIENT_POLICY, OPENAI_CLIENT_POOL_SIZE,
+    OPENAI_HTTP2, OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS, OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_CONNECT_TIMEOUT, OPENAI_READ_TIMEOUT, OPENAI_WRITE_TIMEOUT, OPENAI_POOL_TIMEOUT
+)
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Client factories and the clients built from them, keyed by client name
+_factories = {}
+_clients = {}
+_lock = threading.Lock()
+
+# Pooled clients: the pool size of every pooled client name and its clients, built on first use.
+# Each thread is pinned round-robin to one slot, so short-lived thread pools reuse the same
+# clients and connections instead of building new ones
+_pool_sizes = {}
+_pools = {}
+_thread_slot = threading.local()
+_slots = itertools.count()
+
+# Client policies of OPENAI_CLIENT_POLICY
+CLIENT_POLICIES = ('shared', 'thread')
+
+def register_client(name, factory, pool_size=0):
+    """
+    Registers the factory used to build a client on first use. Replaces and closes any client already built.
+
+    :param name: Client name, e.g. 'openai'
+    :param factory: Callable without arguments that returns the client
+    :param pool_size: Number of clients shared round-robin by the threads, 0 = a single client (default: 0)
+    """
+    with _lock:
+        _factories[name] = factory
+        dropped = _drop_clients(name)
+        if pool_size > 0:
+            _pool_sizes[name] = pool_size
+        else:
+            _pool_sizes.pop(name, None)
+    for client in dropped:
+        _close_client(client)
+
+def set_client(name, client):
+    """
+    Installs an already built client, e.g. a fake backend in tests or benchmarks.
+
+    :param name: Client name
+    :param client: The client instance
+    """
+    with _lock:
+        _clients[name] = client
+
+def get_client(name):
+    """
+    Returns the client with the given name, building it on first use: the shared client, or the
+    calling thread's client of the pool.
+
+    :param name: Client name
+    :return: The client instance
+    :raises KeyError: If no factory is registered under the name
+    """
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    if name in _pool_sizes:
+        return _get_pooled_client(name)
+    with _lock:
+        client = _clients.get(name)
+        if client is None:
+            logger.info(f"Creating {name} client")
+            client = _factories[name]()
+            _clients[name] = client
+        return client
+
+def _get_pooled_client(name):
+    """
+    Returns the pooled client of the calling thread's slot, building it on first use.
+    """
+    slot = getattr(_thread_slot, 'index', None)
+    if slot is None:
+        slot = _thread_slot.index = next(_slots)
+    pool = _pools.get(name)
+    if pool is not None:
+        client = pool[slot % len(pool)]
+        if client is not None:
+            return client
+    with _lock:
+        pool = _pools.setdefault(name, [None] * _pool_sizes[name])
+        index = slot % len(pool)
+        if pool[index] is None:
+            logger.info("Creating %s client %d of %d", name, index + 1, len(pool))
+            pool[index] = _factories[name]()
+        return pool[index]
+
+def _drop_clients(name=None):
+    """
+    Forgets the built clients with the given name, or all of them, and returns them. Call with _lock held.
+    """
+    names = [name] if name is not None else set(_clients) | set(_pools)
+    dropped = []
+    for key in names:
+        client = _clients.pop(key, None)
+        if client is not None:
+            dropped.append(client)
+        dropped.extend(client for client in _pools.pop(key, []) if client is not None)
+    return dropped
+
+def _close_client(client):
+    """
+    Closes a dropped client and its connection pool. Clients whose close is a coroutine are closed on
+    the running event loop, or on a temporary one outside of a loop. Errors are logged and ignored.
+    """
+    close = getattr(client, 'close', None) or getattr(getattr(client, 'transport', None), 'close', None)
+    if not callable(close):
+        return
+    try:
+        result = close()
+        if inspect.iscoroutine(result):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                asyncio.run(result)
+            else:
+                loop.create_task(result)
+    except Exception as e:
+        logger.debug("Could not close client %r: %s", client, e)
+
+def reset_clients():
+    """
+    Drops and closes every built client, shared or pooled, so the next get_client call builds a fresh
+    one. Only call it once no other thread is using the clients.
+    """
+    with _lock:
+        dropped = _drop_clients()
+    for client in dropped:
+        _close_client(client)
+
+def _set_google_credentials():
+    """
+    Exports the configured Google credentials path before a Google client is created.
+    """
+    if GOOGLE_APPLICATION_CREDENTIALS:
+        os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = GOOGLE_APPLICATION_CREDENTIALS
+
+def _http2_available():
+    """
+    Returns whether HTTP/2 can be used, warning when OPENAI_HTTP2 is set without the h2 package.
+    """
+    if not OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("OPENAI_HTTP2 is set but the h2 package is not installed (pip install httpx[http2]); using HTTP/1.1")
+        return False
+
+def openai_client_options(is_async=False):
+    """
+    Builds the transport options of an OpenAI client from the [OpenAITransport] settings: a connection
+    pool keeping idle connections alive for reuse, optional HTTP/2 and separate connect, read, write
+    and pool timeouts.
+
+    :param is_async: Whether the options are for AsyncOpenAI (default: False)
+    :return: Keyword arguments for OpenAI or AsyncOpenAI
+    """
+    import httpx
+    from openai import DefaultHttpxClient, DefaultAsyncHttpxClient
+    limits = httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS or None,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+    )
+    timeout = httpx.Timeout(connect=OPENAI_CONNECT_TIMEOUT, read=OPENAI_READ_TIMEOUT,
+                            write=OPENAI_WRITE_TIMEOUT, pool=OPENAI_POOL_TIMEOUT)
+    http_client_class = DefaultAsyncHttpxClient if is_async else DefaultHttpxClient
+    options = {
+        'api_key': OPENAI_API_KEY,
+        'timeout': timeout,
+        'http_client': http_client_class(limits=limits, timeout=timeout, http2=_http2_available()),
+    }
+    if OPENAI_BASE_URL:
+        options['base_url'] = OPENAI_BASE_URL
+    return options
+
+def _create_openai_client():
+    from openai import OpenAI
+    return OpenAI(**openai_client_options())
+
+def _create_speech_client():
+    from google.cloud import speech
+    _set_google_credentials()
+    return speech.SpeechClient()
+
+def _create_tts_client():
+    from google.cloud import texttospeech
+    _set_google_credentials()
+    return texttospeech.TextToSpeechClient()
+
+def _create_async_openai_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(**openai_client_options(is_async=True))
+
+def _create_async_speech_client():
+    from google.cloud import speech
+    _set_google_credentials()
+    return speech.SpeechAsyncClient()
+
+def _create_async_tts_client():
+    from google.cloud import texttospeech
+    _set_google_credentials()
+    return texttospeech.TextToSpeechAsyncClient()
+
+def register_openai_clients():
+    """
+    Registers the OpenAI client factories. With OPENAI_CLIENT_POLICY = thread, the threads share a pool
+    of OPENAI_CLIENT_POOL_SIZE synchronous clients, each with its own connection pool; the async client
+    is always shared by its event loop.
+    """
+    policy = OPENAI_CLIENT_POLICY
+    if policy not in CLIENT_POLICIES:
+        logger.warning("Unknown OPENAI_CLIENT_POLICY %r, using 'shared'", policy)
+        policy = 'shared'
+    register_client('openai', _create_openai_client, pool_size=max(1, OPENAI_CLIENT_POOL_SIZE) if policy == 'thread' else 0)
+    register_client('openai_async', _create_async_openai_client)
+
+register_openai_clients()
+register_client('speech', _create_speech_client)
+register_client('tts', _create_tts_client)
+# Async clients are bound to the event loop they are first used on; call reset_clients() before using another loop
+register_client('speech_async', _create_async_speech_client)
+register_client('tts_async', _create_async_tts_client)
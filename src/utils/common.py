@@ -1,22 +1,34 @@
 import os
+import mmap
+import codecs
+import functools
+import threading
+import multiprocessing
+from collections import deque
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader, PdfWriter
-from docx import Document
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from io import BytesIO
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 import wave, io
-from pydub import AudioSegment
-from logging_config import get_module_logger
+from utils.audio_probe import probe_audio_duration
+from utils.pdf_writer import PdfStreamWriter
+from utils.chunking import chunk_text
+from utils.metrics import stage, record_bytes
+from logging_config import get_module_logger, SAMPLED
 from config.settings import (
     LANGUAGES, OPENAI_API_KEY, GOOGLE_APPLICATION_CREDENTIALS,
-    AUDIO_OUTPUT_DIR, DOCUMENT_INPUT_DIR, DOCUMENT_OUTPUT_DIR
+    AUDIO_OUTPUT_DIR, DOCUMENT_INPUT_DIR, DOCUMENT_OUTPUT_DIR,
+    PDF_EXTRACT_WORKERS, PDF_PAGES_PER_TASK
 )
 
 # Get logger for this module
 logger = get_module_logger(__name__)
 
+# Document formats read_file and write_file support
+DOCUMENT_EXTENSIONS = ('.txt', '.pdf', '.docx')
+
+# Text files above this size are memory-mapped and decoded incrementally
+LARGE_FILE_BYTES = 10 * 1024 * 1024  # 10 MB
+
 def generate_unique_filename(base_name, extension):
     """
     Generates a unique filename using the current timestamp.
@@ -27,7 +39,7 @@ def generate_unique_filename(base_name, extension):
     """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     unique_filename = f"{base_name}_{timestamp}{extension}"
-    logger.info(f"Generated unique filename: {unique_filename}")
+    logger.info("Generated unique filename: %s", unique_filename, extra=SAMPLED)
     return unique_filename
 
 def get_language_choice(prompt, languages=LANGUAGES):
@@ -105,6 +117,93 @@ def read_text_file(file_path):
         logger.exception(f"Error reading text file: {str(e)}")
         raise
 
+# Extraction process pools shared by every iter_pdf_pages call, keyed by worker count, so concurrent
+# reads (e.g. batch translations) queue their pages on one set of processes instead of each starting its own
+_pdf_pools = {}
+_pdf_pools_lock = threading.Lock()
+
+def _get_pdf_pool(workers):
+    """
+    Returns the shared PDF extraction pool with the given number of processes, creating it on first use.
+    Workers are spawned rather than forked, since the pool is started from worker threads.
+    """
+    with _pdf_pools_lock:
+        pool = _pdf_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pdf_pools[workers] = pool
+        return pool
+
+@functools.lru_cache(maxsize=4)
+def _open_pdf(file_path, mtime):
+    """
+    Opens a PDF once per worker process, so that every task on the same file reuses the parsed document.
+    The modification time is part of the key so that a rewritten file is parsed again.
+    """
+    from PyPDF2 import PdfReader
+
+    return PdfReader(file_path)
+
+def _extract_pdf_pages(file_path, mtime, start, end):
+    """
+    Extracts the text of pages [start, end) in a worker process.
+
+    :return: Tuple of (page count of the document, list of page texts)
+    """
+    reader = _open_pdf(file_path, mtime)
+    page_count = len(reader.pages)
+    return page_count, [reader.pages[i].extract_text() or "" for i in range(start, min(end, page_count))]
+
+def iter_pdf_pages(file_path, workers=None, pages_per_task=None):
+    """
+    Yields the text of each PDF page in order, extracting pages lazily so that callers can start
+    working on the first pages while later ones are still being parsed.
+    With several workers, pages are extracted a batch per task by a process pool shared by all
+    callers, so concurrent reads never start more than `workers` processes. The page count comes
+    back with the first batch, so the document is not parsed in the calling process.
+
+    :param file_path: Path to the PDF file
+    :param workers: Number of extraction processes (default: PDF_EXTRACT_WORKERS, 0 = one per CPU)
+    :param pages_per_task: Pages extracted per worker task (default: PDF_PAGES_PER_TASK)
+    :yield: Text of each page
+    """
+    if workers is None:
+        workers = PDF_EXTRACT_WORKERS
+    if not workers:
+        workers = os.cpu_count() or 1
+    pages_per_task = max(1, pages_per_task or PDF_PAGES_PER_TASK)
+
+    if workers <= 1:
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(file_path)
+        logger.info(f"Extracting {len(reader.pages)} PDF pages in-process")
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    executor = _get_pdf_pool(workers)
+    mtime = os.path.getmtime(file_path)
+    page_count, pages = executor.submit(_extract_pdf_pages, file_path, mtime, 0, pages_per_task).result()
+    logger.info(f"Extracting {page_count} PDF pages with up to {workers} worker processes")
+    batches = [(start, min(start + pages_per_task, page_count)) for start in range(pages_per_task, page_count, pages_per_task)]
+    # Keep a bounded number of batches queued so extracted text does not pile up ahead of the consumer
+    window = workers * 2
+    futures = deque(executor.submit(_extract_pdf_pages, file_path, mtime, start, end) for start, end in batches[:window])
+    next_batch = len(futures)
+    try:
+        yield from pages
+        while futures:
+            _, pages = futures.popleft().result()
+            if next_batch < len(batches):
+                futures.append(executor.submit(_extract_pdf_pages, file_path, mtime, *batches[next_batch]))
+                next_batch += 1
+            yield from pages
+    finally:
+        # Drops the queued batches of a reader that stopped early
+        for future in futures:
+            future.cancel()
+
 def read_pdf_file(file_path):
     """
     Reads content from a PDF file.
@@ -114,10 +213,7 @@ def read_pdf_file(file_path):
     """
     logger.info(f"Reading PDF file: {file_path}")
     try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
+        text = "".join(iter_pdf_pages(file_path))
         logger.info("PDF file read successfully")
         return text
     except Exception as e:
@@ -131,6 +227,8 @@ def read_docx_file(file_path):
     :param file_path: Path to the DOCX file
     :return: Content of the DOCX file
     """
+    from docx import Document
+
     logger.info(f"Reading DOCX file: {file_path}")
     try:
         doc = Document(file_path)
@@ -143,30 +241,15 @@ def read_docx_file(file_path):
 
 def split_content(content, max_chars=5000):
     """
-    Splits content into chunks of maximum characters, trying to break at sentence boundaries.
+    Splits content into chunks of maximum characters, breaking at paragraph and sentence boundaries.
     
     :param content: The content to split
     :param max_chars: Maximum characters per chunk (default: 5000)
     :return: List of content chunks
     """
-    logger.info(f"Splitting content into chunks of max {max_chars} characters")
-    sentences = content.replace('\n', ' ').split('. ')
-    chunks = []
-    current_chunk = ""
-
-    for sentence in sentences:
-        if len(current_chunk) + len(sentence) + 2 <= max_chars:  # +2 for the '. ' we removed
-            current_chunk += sentence + '. '
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = sentence + '. '
-
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-
-    logger.info(f"Content split into {len(chunks)} chunks")
-    return chunks
+    logger.info("Splitting content into chunks of max %d characters", max_chars, extra=SAMPLED)
+    with stage('chunk'):
+        return [chunk['text'] for chunk in chunk_text(content, max_chars)]
 
 def read_large_file(file_path, chunk_size=1024*1024):
     """
@@ -184,63 +267,162 @@ def read_large_file(file_path, chunk_size=1024*1024):
                 break
             yield chunk
 
-def read_file(file_path):
+def iter_text_file(file_path, block_chars=1024*1024):
+    """
+    Reads a text file in blocks of characters.
+
+    :param file_path: Path to the text file
+    :param block_chars: Characters per block (default: 1M)
+    :yield: Blocks of the file content
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while True:
+            block = file.read(block_chars)
+            if not block:
+                break
+            yield block
+
+def iter_mmap_text(file_path, block_bytes=1024*1024, encoding='utf-8'):
+    """
+    Reads a text file through a memory map, decoding one block at a time. Only the block being
+    decoded is copied out of the page cache, so peak memory stays at a few blocks whatever the
+    file size. Multi-byte characters split across blocks are completed by the incremental decoder.
+
+    :param file_path: Path to the text file
+    :param block_bytes: Bytes decoded at a time (default: 1 MB)
+    :param encoding: Text encoding of the file (default: utf-8)
+    :yield: Decoded blocks of the file content
+    """
+    with open(file_path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            view = memoryview(mapped)
+            try:
+                for start in range(0, len(mapped), block_bytes):
+                    block = decoder.decode(view[start:start + block_bytes])
+                    if block:
+                        yield block
+                tail = decoder.decode(b'', final=True)
+                if tail:
+                    yield tail
+            finally:
+                view.release()
+
+def file_size(file_path):
+    """
+    Returns the size of a file in bytes.
+
+    :param file_path: Path to the file
+    :return: The size, or 0 if the file cannot be read
+    """
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+def is_large_file(file_path):
+    """
+    Tells whether a file is larger than LARGE_FILE_BYTES.
+
+    :param file_path: Path to the file
+    :return: True if the file exists and is large
+    """
+    return file_size(file_path) > LARGE_FILE_BYTES
+
+def iter_docx_paragraphs(file_path):
+    """
+    Reads the paragraphs of a DOCX file one at a time.
+
+    :param file_path: Path to the DOCX file
+    :yield: Text of each paragraph
+    """
+    from docx import Document
+
+    for paragraph in Document(file_path).paragraphs:
+        yield paragraph.text + "\n"
+
+def read_file(file_path, stream=False):
     """
     Reads content from a file based on its extension.
     
     :param file_path: Path to the file
-    :return: Content of the file
+    :param stream: Return a generator of text pieces (pages, paragraphs or blocks) instead of the whole content (default: False)
+    :return: Content of the file, or a generator of its text pieces when streaming
     """
     logger.info(f"Reading file: {file_path}")
     _, file_extension = os.path.splitext(file_path)
-    file_size = os.path.getsize(file_path)
-    
-    if file_size > 10 * 1024 * 1024:  # If file is larger than 10MB
-        logger.info(f"Large file detected ({file_size} bytes). Reading in chunks.")
-        return b''.join(read_large_file(file_path))
-    
-    if file_extension.lower() == '.txt':
-        return read_text_file(file_path)
-    elif file_extension.lower() == '.pdf':
-        return read_pdf_file(file_path)
-    elif file_extension.lower() == '.docx':
-        return read_docx_file(file_path)
-    else:
+
+    if stream:
+        if file_extension.lower() == '.txt':
+            return iter_mmap_text(file_path)
+        elif file_extension.lower() == '.pdf':
+            return (page + "\n" for page in iter_pdf_pages(file_path))
+        elif file_extension.lower() == '.docx':
+            return iter_docx_paragraphs(file_path)
         logger.error(f"Unsupported file format: {file_extension}")
         raise ValueError(f"Unsupported file format: {file_extension}")
 
+    with stage('read'):
+        if file_extension.lower() == '.txt':
+            if is_large_file(file_path):
+                logger.info(f"Large file detected ({os.path.getsize(file_path)} bytes). Decoding through a memory map.")
+                content = "".join(iter_mmap_text(file_path))
+            else:
+                content = read_text_file(file_path)
+        elif file_extension.lower() == '.pdf':
+            content = read_pdf_file(file_path)
+        elif file_extension.lower() == '.docx':
+            content = read_docx_file(file_path)
+        else:
+            logger.error(f"Unsupported file format: {file_extension}")
+            raise ValueError(f"Unsupported file format: {file_extension}")
+    record_bytes('read', file_size(file_path))
+    return content
+
+def discover_documents(input_dir, extensions=DOCUMENT_EXTENSIONS):
+    """
+    Finds every supported document under a directory, recursively. Hidden files and
+    directories (e.g. partial outputs of an interrupted run) are ignored.
+
+    :param input_dir: Directory to search
+    :param extensions: File extensions to include (default: DOCUMENT_EXTENSIONS)
+    :return: Sorted list of paths relative to input_dir
+    """
+    documents = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for filename in files:
+            if not filename.startswith('.') and os.path.splitext(filename)[1].lower() in extensions:
+                documents.append(os.path.relpath(os.path.join(root, filename), input_dir))
+    return sorted(documents)
+
+def partial_path(output_file):
+    """
+    Returns the hidden path an output is written to before it is moved into place with os.replace.
+    It is in the same directory (so the move is atomic) and keeps the extension (so write_file
+    picks the same format).
+
+    :param output_file: The final output path
+    :return: The temporary path
+    """
+    directory, filename = os.path.split(output_file)
+    name, extension = os.path.splitext(filename)
+    return os.path.join(directory, f".{name}.{os.getpid()}.partial{extension}")
+
 def write_pdf(content, output_file):
     """
-    Writes content to a PDF file.
+    Writes content to a PDF file, wrapping long lines and adding pages as needed.
     
     :param content: The content to write to the PDF
     :param output_file: The path to save the PDF file
     """
     logger.info(f"Writing content to PDF file: {output_file}")
     try:
-        packet = BytesIO()
-        can = canvas.Canvas(packet, pagesize=letter)
-        width, height = letter
-        y = height - 50  # Start 50 points down from the top
-
-        for line in content.split('\n'):
-            if y < 50:  # If we're near the bottom of the page
-                can.showPage()  # Start a new page
-                y = height - 50  # Reset y to the top of the new page
-
-            can.drawString(50, y, line)
-            y -= 15  # Move down 15 points
-
-        can.save()
-
-        packet.seek(0)
-        new_pdf = PdfReader(packet)
-        writer = PdfWriter()
-        writer.add_page(new_pdf.pages[0])
-
-        with open(output_file, 'wb') as output_file_handle:
-            writer.write(output_file_handle)
-        logger.info("Content written to PDF successfully")
+        with PdfStreamWriter(output_file) as writer:
+            writer.write(content)
+        logger.info(f"Content written to PDF successfully ({writer.pages} pages)")
     except Exception as e:
         logger.exception(f"Error writing to PDF file: {str(e)}")
         raise
@@ -252,6 +434,8 @@ def write_docx(content, output_file):
     :param content: The content to write to the DOCX
     :param output_file: The path to save the DOCX file
     """
+    from docx import Document
+
     logger.info(f"Writing content to DOCX file: {output_file}")
     try:
         doc = Document()
@@ -285,29 +469,86 @@ def write_file(content, output_file):
     logger.info(f"Writing content to file: {output_file}")
     _, file_extension = os.path.splitext(output_file)
     try:
-        if file_extension.lower() == '.mp3':
-            with open(output_file, 'wb') as file:
-                file.write(content)
-            logger.info("Content written to MP3 file successfully")
-        elif isinstance(content, str) and len(content.encode('utf-8')) > 10 * 1024 * 1024:
-            write_large_file(content.encode('utf-8'), output_file)
-        elif isinstance(content, bytes) and len(content) > 10 * 1024 * 1024:
-            write_large_file(content, output_file)
-        elif file_extension.lower() == '.txt':
-            with open(output_file, 'w', encoding='utf-8') as file:
-                file.write(content)
-            logger.info("Content written to text file successfully")
-        elif file_extension.lower() == '.pdf':
-            write_pdf(content, output_file)
-        elif file_extension.lower() == '.docx':
-            write_docx(content, output_file)
-        else:
-            logger.error(f"Unsupported output file format: {file_extension}")
-            raise ValueError(f"Unsupported output file format: {file_extension}")
+        with stage('write'):
+            if file_extension.lower() == '.mp3':
+                with open(output_file, 'wb') as file:
+                    file.write(content)
+                logger.info("Content written to MP3 file successfully")
+            elif isinstance(content, bytes) and len(content) > LARGE_FILE_BYTES:
+                write_large_file(content, output_file)
+            elif file_extension.lower() == '.txt':
+                with open(output_file, 'w', encoding='utf-8') as file:
+                    file.write(content)
+                logger.info("Content written to text file successfully")
+            elif file_extension.lower() == '.pdf':
+                write_pdf(content, output_file)
+            elif file_extension.lower() == '.docx':
+                write_docx(content, output_file)
+            else:
+                logger.error(f"Unsupported output file format: {file_extension}")
+                raise ValueError(f"Unsupported output file format: {file_extension}")
+        record_bytes('write', file_size(output_file))
     except Exception as e:
         logger.exception(f"Error writing to file: {str(e)}")
         raise
 
+def _write_complete_lines(pieces, write_lines):
+    """
+    Passes complete lines to write_lines as soon as they arrive, holding back only the unfinished last line.
+
+    :param pieces: Iterable of text pieces
+    :param write_lines: Function taking text made of whole lines
+    :return: Number of characters consumed
+    """
+    carry = ""
+    written = 0
+    for piece in pieces:
+        head, newline, carry = (carry + piece).rpartition('\n')
+        if newline:
+            write_lines(head)
+        written += len(piece)
+    write_lines(carry)
+    return written
+
+def write_stream(pieces, output_file):
+    """
+    Writes text that arrives in pieces (e.g. translated chunks, in order) as it is produced,
+    without joining it first. Only the current line is held back for PDF and DOCX output.
+
+    :param pieces: Iterable of text pieces
+    :param output_file: The path to save the file (.txt, .pdf or .docx)
+    :return: Number of characters written
+    """
+    logger.info(f"Streaming content to file: {output_file}")
+    _, file_extension = os.path.splitext(output_file)
+    file_extension = file_extension.lower()
+    if file_extension == '.txt':
+        written = 0
+        with open(output_file, 'w', encoding='utf-8') as file:
+            for piece in pieces:
+                file.write(piece)
+                written += len(piece)
+    elif file_extension == '.pdf':
+        with PdfStreamWriter(output_file) as writer:
+            written = _write_complete_lines(pieces, writer.write)
+    elif file_extension == '.docx':
+        from docx import Document
+
+        doc = Document()
+
+        def add_paragraphs(text):
+            for line in text.split('\n'):
+                doc.add_paragraph(line)
+
+        written = _write_complete_lines(pieces, add_paragraphs)
+        doc.save(output_file)
+    else:
+        logger.error(f"Unsupported output file format: {file_extension}")
+        raise ValueError(f"Unsupported output file format: {file_extension}")
+    record_bytes('write', file_size(output_file))
+    logger.info(f"Streamed {written} characters to: {output_file}")
+    return written
+
 def check_text_size(text):
     """
     Checks the size of the input text.
@@ -315,7 +556,7 @@ def check_text_size(text):
     :param text: The input text (string or bytes)
     :return: True if the text is considered large, False otherwise
     """
-    logger.info("Checking text size")
+    logger.info("Checking text size", extra=SAMPLED)
     try:
         if isinstance(text, str):
             size = len(text.encode('utf-8'))
@@ -326,7 +567,7 @@ def check_text_size(text):
         
         # Consider text large if it's more than 4000 characters (OpenAI's typical limit)
         is_large = size > 3500
-        logger.info(f"Text size: {size} bytes. Considered large: {is_large}")
+        logger.info("Text size: %d bytes. Considered large: %s", size, is_large, extra=SAMPLED)
         return is_large
     except Exception as e:
         logger.exception(f"An error occurred while checking text size: {str(e)}")
@@ -335,6 +576,8 @@ def check_text_size(text):
 def check_audio_duration(audio_input):
     """
     Checks the duration of the input audio.
+    MP3, OGG and FLAC durations are read from the container headers; the audio is only
+    decoded when the headers do not give the duration.
     
     :param audio_input: Path to the audio file or audio content as bytes
     :return: True if the audio is considered large, False otherwise
@@ -358,8 +601,12 @@ def check_audio_duration(audio_input):
                 rate = wav_file.getframerate()
                 duration = frames / float(rate)
         elif file_extension in ['.mp3', '.ogg', '.flac', '']:
-            audio = AudioSegment.from_file(file_path, format=file_extension[1:] if file_extension else 'mp3')
-            duration = len(audio) / 1000.0  # pydub works in milliseconds
+            duration = probe_audio_duration(audio_input, file_extension)
+            if duration is None:
+                logger.info("Duration not available from headers, decoding audio")
+                from pydub import AudioSegment
+                audio = AudioSegment.from_file(file_path, format=file_extension[1:] if file_extension else 'mp3')
+                duration = len(audio) / 1000.0  # pydub works in milliseconds
         else:
             raise ValueError(f"Unsupported audio format: {file_extension}")
         
@@ -0,0 +1,147 @@
+import asyncio
+import time
+import weakref
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from logging_config import get_module_logger
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+def _timed_call(func, item):
+    """
+    Calls func(item) and measures the call latency.
+
+    :param func: The function to call
+    :param item: The argument to pass to the function
+    :return: Tuple of (result, latency in seconds)
+    """
+    start = time.perf_counter()
+    result = func(item)
+    return result, time.perf_counter() - start
+
+def imap_ordered(func, items, max_in_flight=4):
+    """
+    Applies func to every item using a bounded thread pool and yields results in input order.
+    Items are consumed lazily, so at most a small window of pending results is held in memory.
+    Each call runs in a copy of the caller's context, so context variables (e.g. the metrics of
+    the running job) are seen by the worker threads.
+
+    :param func: The function to apply to each item
+    :param items: Iterable of items to process
+    :param max_in_flight: Maximum number of concurrent calls (default: 4)
+    :yield: Tuples of (index, result, latency in seconds), in the order of the input items
+    """
+    max_in_flight = max(1, int(max_in_flight or 1))
+    window = max_in_flight * 2
+    pending = deque()
+    iterator = iter(items)
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        index = 0
+        for item in iterator:
+            context = contextvars.copy_context()
+            pending.append((index, executor.submit(context.run, _timed_call, func, item)))
+            index += 1
+            if len(pending) >= window:
+                i, future = pending.popleft()
+                result, latency = future.result()
+                yield i, result, latency
+        while pending:
+            i, future = pending.popleft()
+            result, latency = future.result()
+            yield i, result, latency
+
+def run_ordered(func, items, max_in_flight=4):
+    """
+    Applies func to every item concurrently and returns the results in input order.
+
+    :param func: The function to apply to each item
+    :param items: Iterable of items to process
+    :param max_in_flight: Maximum number of concurrent calls (default: 4)
+    :return: List of (result, latency in seconds) tuples, in the order of the input items
+    """
+    return [(result, latency) for _, result, latency in imap_ordered(func, items, max_in_flight)]
+
+# Semaphores shared by all coroutines of an event loop, keyed by loop and name
+_semaphores = weakref.WeakKeyDictionary()
+
+def get_semaphore(name, limit):
+    """
+    Returns the semaphore with the given name for the running event loop, creating it on first use.
+    Every job on the loop shares it, so it bounds the total number of concurrent calls to a service.
+
+    :param name: Semaphore name, e.g. 'openai'
+    :param limit: Maximum concurrent holders, used when the semaphore is created
+    :return: asyncio.Semaphore
+    """
+    loop = asyncio.get_running_loop()
+    semaphores = _semaphores.setdefault(loop, {})
+    if name not in semaphores:
+        semaphores[name] = asyncio.Semaphore(max(1, int(limit or 1)))
+    return semaphores[name]
+
+async def agather_ordered(func, items, semaphore=None):
+    """
+    Awaits func(item) for every item concurrently and returns the results in input order.
+
+    :param func: The coroutine function to apply to each item
+    :param items: Iterable of items to process
+    :param semaphore: Optional asyncio.Semaphore bounding the calls in flight
+    :return: List of (result, latency in seconds) tuples, in the order of the input items
+    """
+    async def timed_call(item):
+        if semaphore is not None:
+            async with semaphore:
+                return await _atimed_call(func, item)
+        return await _atimed_call(func, item)
+
+    return await asyncio.gather(*(timed_call(item) for item in items))
+
+async def aimap_ordered(func, items, max_in_flight=4):
+    """
+    Async counterpart of imap_ordered: awaits func(item) for every item and yields the results in input
+    order. Items are read, and their tasks created, only while fewer than twice max_in_flight results are
+    pending, so a long input never has all of its items in memory or all of its tasks scheduled at once.
+
+    :param func: The coroutine function to apply to each item
+    :param items: Iterable or async iterable of items to process
+    :param max_in_flight: Maximum number of concurrent calls the window is sized for (default: 4)
+    :yield: Tuples of (index, result, latency in seconds), in the order of the input items
+    """
+    window = max(1, int(max_in_flight or 1)) * 2
+    pending = deque()
+
+    async def aiterate():
+        if hasattr(items, '__aiter__'):
+            async for item in items:
+                yield item
+        else:
+            for item in items:
+                yield item
+
+    try:
+        index = 0
+        async for item in aiterate():
+            pending.append((index, asyncio.ensure_future(_atimed_call(func, item))))
+            index += 1
+            if len(pending) >= window:
+                i, task = pending.popleft()
+                result, latency = await task
+                yield i, result, latency
+        while pending:
+            i, task = pending.popleft()
+            result, latency = await task
+            yield i, result, latency
+    finally:
+        # Cancels the calls still running when reading the items or a call failed, or the caller stopped early
+        for _, task in pending:
+            task.cancel()
+
+async def _atimed_call(func, item):
+    """
+    Awaits func(item) and measures the call latency.
+    """
+    start = time.perf_counter()
+    result = await func(item)
+    return result, time.perf_counter() - start
@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from logging_config import get_module_logger
+from config.settings import METRICS_ENABLED, METRICS_DIR
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets, from fast cache hits to long audio jobs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Help text of the metrics written in the Prometheus export
+METRIC_HELP = {
+    'stage_seconds': "Duration of pipeline stages (read, chunk, translate, synthesize, assemble, write)",
+    'api_request_seconds': "Latency of API requests, per attempt",
+    'api_requests_total': "API request attempts by outcome (ok, retried, error)",
+    'api_tokens_total': "Tokens (OpenAI) or characters (Text-to-Speech) sent in successful API requests",
+    'bytes_processed_total': "Bytes read, synthesized or written per stage",
+    'tokens_processed_total': "Tokens translated",
+}
+
+# Registry of the running job, set by job_metrics and copied into worker threads by imap_ordered
+_job_registry = contextvars.ContextVar('metrics_job_registry', default=None)
+
+class Histogram:
+    """
+    Fixed-bucket histogram of observed values with count, sum and maximum.
+    Quantiles are interpolated within buckets, like Prometheus' histogram_quantile.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        :param buckets: Sorted upper bounds of the buckets; values above the last go to an overflow bucket
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """
+        Records one value.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimates a quantile of the observed values.
+
+        :param q: The quantile, e.g. 0.95
+        :return: The estimate, or 0.0 when nothing was observed
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.max
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = min(self.buckets[i], self.max)
+                return lower + (upper - lower) * max(0.0, rank - seen) / count
+            seen += count
+        return self.max
+
+    def to_dict(self):
+        """
+        Summarizes the histogram for JSON output.
+
+        :return: Dictionary with count, sum, mean, p50, p95, p99 and max
+        """
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'p99': round(self.quantile(0.99), 6),
+            'max': round(self.max, 6),
+        }
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(labels, extra=None):
+    """
+    Formats labels for the Prometheus text format, e.g. {provider="tts",le="0.5"}.
+    """
+    items = list(labels) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + "}"
+
+class MetricsRegistry:
+    """
+    Thread-safe set of labelled counters and histograms.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Adds to a counter, e.g. inc('bytes_processed_total', 4096, stage='write').
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """
+        Records a value in a histogram, e.g. observe('api_request_seconds', 0.42, provider='tts').
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def summary(self):
+        """
+        Summarizes every metric for JSON output.
+
+        :return: Dictionary with lists of counters and histograms, each with its name and labels
+        """
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                          for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0])]
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self):
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        :return: The metrics text
+        """
+        lines = []
+        described = set()
+
+        def describe(name, metric_type):
+            if name not in described:
+                described.add(name)
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                describe(name, 'counter')
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                describe(name, 'histogram')
+                cumulative = 0
+                for bound, count in zip([*histogram.buckets, '+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, {'le': bound})} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """
+        Drops every recorded metric.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+# Metrics of the whole process
+registry = MetricsRegistry()
+
+def _registries():
+    """
+    Returns the registries a metric is recorded in: the process registry and the running job's, if any.
+    """
+    job = _job_registry.get()
+    return (registry, job) if job is not None else (registry,)
+
+def inc(name, amount=1, **labels):
+    """
+    Adds to a counter of the process and of the running job.
+    """
+    if METRICS_ENABLED:
+        for target in _registries():
+            target.inc(name, amount, **labels)
+
+def observe(name, value, **labels):
+    """
+    Records a value in a histogram of the process and of the running job.
+    """
+    if METRICS_ENABLED:
+        for target in _registries():
+            target.observe(name, value, **labels)
+
+@contextmanager
+def stage(name, **labels):
+    """
+    Times a pipeline stage (read, chunk, translate, synthesize, assemble, write) into stage_seconds.
+
+    :param name: The stage name
+    :param labels: Additional labels, e.g. format='pdf'
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('stage_seconds', time.perf_counter() - start, stage=name, **labels)
+
+def record_bytes(stage_name, amount):
+    """
+    Counts bytes read, synthesized or written by a stage.
+    """
+    inc('bytes_processed_total', amount, stage=stage_name)
+
+@contextmanager
+def job_metrics(job_id, **info):
+    """
+    Collects the metrics recorded while a job runs, including those of the worker threads it starts
+    through imap_ordered, and writes them as a JSON summary to METRICS_DIR when it ends.
+
+    :param job_id: Job identifier used in the summary file name
+    :param info: Additional fields stored in the summary, e.g. operation='audio_book'
+    :yield: Dictionary receiving the summary path under 'path' once the job ends
+    """
+    job = MetricsRegistry()
+    token = _job_registry.set(job)
+    result = {'path': None}
+    started_at = datetime.now()
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        _job_registry.reset(token)
+        if METRICS_ENABLED:
+            summary = {'job': str(job_id), **info, 'started_at': started_at.isoformat(timespec='seconds'),
+                       'duration_seconds': round(time.perf_counter() - start, 3), **job.summary()}
+            file_name = f"job_{job_id}_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+            result['path'] = write_json_summary(summary, os.path.join(METRICS_DIR, file_name))
+
+def write_json_summary(summary, path):
+    """
+    Writes a metrics summary as JSON.
+
+    :param summary: The summary dictionary
+    :param path: Path of the JSON file
+    :return: The path, or None if writing failed
+    """
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        return path
+    except OSError as e:
+        logger.warning(f"Could not write metrics summary {path}: {str(e)}")
+        return None
+
+def write_prometheus(path):
+    """
+    Writes the process metrics to a Prometheus text file, replacing it atomically so a scraper
+    never reads a partial file.
+
+    :param path: Path of the text file, e.g. for the node_exporter textfile collector
+    :return: The path, or None if writing failed
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(registry.to_prometheus())
+        os.replace(temp_path, path)
+        return path
+    except OSError as e:
+        logger.warning(f"Could not write Prometheus metrics {path}: {str(e)}")
+        return None
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    Serves the process metrics in the Prometheus text format at /metrics from a daemon thread.
+
+    :param port: Port to listen on (0 picks a free port)
+    :param host: Interface to listen on (default: localhost only)
+    :return: The HTTP server; its server_address holds the bound port
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Serving metrics at http://{host}:{server.server_address[1]}/metrics")
+    return server
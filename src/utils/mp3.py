@@ -0,0 +1,294 @@
+import os
+import json
+import struct
+from logging_config import get_module_logger
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Bitrates in kbps indexed by [MPEG-1?][layer][bitrate index]
+BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+
+# Size of the Xing/Info tag written by Mp3StreamWriter: tag ID, flags, frame count and byte count
+INFO_TAG_SIZE = 16
+# Xing/Info flags: the frame count and the byte count are present
+INFO_FLAGS = 0x01 | 0x02
+
+# Sample rates in Hz indexed by MPEG version ID bits
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+def id3v2_size(data, offset=0):
+    """
+    Returns the size of an ID3v2 tag starting at the given offset.
+
+    :param data: MP3 bytes
+    :param offset: Offset to check for a tag (default: 0)
+    :return: Size of the tag in bytes, including its header and footer, or 0 if there is no tag
+    """
+    if data[offset:offset + 3] != b'ID3' or len(data) < offset + 10:
+        return 0
+    flags = data[offset + 5]
+    size = 0
+    for byte in data[offset + 6:offset + 10]:
+        size = (size << 7) | (byte & 0x7F)
+    return 10 + size + (10 if flags & 0x10 else 0)
+
+def parse_frame_header(header):
+    """
+    Parses a 4-byte MPEG audio frame header.
+
+    :param header: The first four bytes of a frame
+    :return: Dictionary describing the frame, or None if the bytes are not a valid header
+    """
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version_id = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = (header[2] >> 4) & 0x0F
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version_id == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_id == 3
+    layer = 4 - layer_bits
+    bitrate = BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version_id][sample_rate_index]
+    padding = (header[2] >> 1) & 0x01
+    mono = ((header[3] >> 6) & 0x03) == 3
+    crc = not header[1] & 0x01
+
+    if layer == 1:
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2:
+        frame_length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:
+        frame_length = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+        samples = 1152 if mpeg1 else 576
+
+    return {
+        'mpeg1': mpeg1,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'mono': mono,
+        'crc': crc,
+        'frame_length': frame_length,
+        'samples': samples,
+    }
+
+def side_info_size(frame):
+    """
+    Returns the size of the Layer III side information that follows the frame header.
+
+    :param frame: Parsed frame header
+    :return: Side information size in bytes
+    """
+    if frame['mpeg1']:
+        return 17 if frame['mono'] else 32
+    return 9 if frame['mono'] else 17
+
+def main_data_begin(data, offset, frame):
+    """
+    Returns the main_data_begin field of a Layer III frame: how many bytes of its audio data are
+    stored at the end of the frames before it (the bit reservoir).
+
+    :param data: MP3 bytes
+    :param offset: Offset of the frame
+    :param frame: Parsed frame header
+    :return: Bytes borrowed from the previous frames, 0 if the frame is self-contained
+    """
+    start = offset + 4 + (2 if frame['crc'] else 0)
+    if frame['mpeg1']:
+        return (data[start] << 1) | (data[start + 1] >> 7)
+    return data[start]
+
+def main_data_size(frame):
+    """
+    Returns the bytes of a Layer III frame left for audio data after the header, CRC and side information.
+
+    :param frame: Parsed frame header
+    :return: Main data size in bytes
+    """
+    return frame['frame_length'] - 4 - (2 if frame['crc'] else 0) - side_info_size(frame)
+
+def is_info_frame(data, offset, frame):
+    """
+    Checks whether a frame is a Xing/Info or VBRI metadata frame rather than audio.
+
+    :param data: MP3 bytes
+    :param offset: Offset of the frame
+    :param frame: Parsed frame header
+    :return: True if the frame only carries metadata
+    """
+    xing_offset = offset + 4 + side_info_size(frame)
+    if data[xing_offset:xing_offset + 4] in (b'Xing', b'Info'):
+        return True
+    return data[offset + 36:offset + 40] == b'VBRI'
+
+def iter_frames(data):
+    """
+    Iterates over the MPEG audio frames in MP3 bytes, skipping ID3 tags and resynchronizing on garbage.
+
+    :param data: MP3 bytes
+    :yield: Tuples of (offset, parsed frame header)
+    """
+    offset = id3v2_size(data)
+    end = len(data)
+    if end - offset >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128
+    while offset + 4 <= end:
+        frame = parse_frame_header(data[offset:offset + 4])
+        if frame is None or frame['frame_length'] <= 0 or offset + frame['frame_length'] > end:
+            if data[offset:offset + 3] == b'ID3':
+                offset += max(id3v2_size(data, offset), 1)
+            else:
+                offset += 1
+            continue
+        yield offset, frame
+        offset += frame['frame_length']
+
+class Mp3StreamWriter:
+    """
+    Appends MP3 chunks to a single file by copying their audio frames, without decoding or re-encoding.
+    Only one chunk is held in memory at a time, so memory use does not grow with the output length.
+
+    Layer III output starts with an Info frame (Xing for mixed bitrates) holding the frame and byte
+    counts, filled in on close, so players and check_audio_duration get the exact duration. The
+    Info frames of the chunks are dropped. Each chunk is expected to come from its own encoder run:
+    frames at the start of a chunk that borrow bit reservoir bytes (main_data_begin) from frames
+    that are not part of the chunk are dropped, since joining them would decode as noise. The
+    encoder delay and padding of every chunk are kept, a few tens of milliseconds of silence at
+    each join.
+    """
+
+    def __init__(self, path, chapter_index_path=None, file_name=None):
+        """
+        :param path: Path of the MP3 file to write
+        :param chapter_index_path: Optional path of a JSON chapter index written on close
+        :param file_name: Audio file name recorded in the chapter index (default: the name of path)
+        """
+        self.path = path
+        self.chapter_index_path = chapter_index_path
+        self.file_name = file_name or os.path.basename(path)
+        self.total_samples = 0
+        self.total_frames = 0
+        self.sample_rate = None
+        self.chapters = []
+        self._bitrates = set()
+        self._info_offset = None
+        self._file = open(path, 'wb')
+
+    @property
+    def duration(self):
+        """
+        Duration of the audio written so far, in seconds.
+        """
+        return self.total_samples / self.sample_rate if self.sample_rate else 0.0
+
+    def _write_info_frame(self, data, offset, frame):
+        """
+        Writes an empty Info frame matching the first audio frame, at the lowest bitrate from the
+        frame's own that leaves room for the tag. The tag is filled in by close.
+        """
+        header = bytearray(data[offset:offset + 4])
+        header[1] |= 0x01  # no CRC
+        header[2] &= 0xFD  # no padding
+        info = parse_frame_header(header)
+        while info['frame_length'] < 4 + side_info_size(info) + INFO_TAG_SIZE:
+            bitrate_index = header[2] >> 4
+            if bitrate_index >= 14:
+                logger.warning("No room for an Info frame, writing the MP3 without one")
+                return
+            header[2] = ((bitrate_index + 1) << 4) | (header[2] & 0x0F)
+            info = parse_frame_header(header)
+        self._info_offset = self._file.tell() + 4 + side_info_size(info)
+        self._file.write(bytes(header) + bytes(info['frame_length'] - 4))
+
+    def append(self, audio_content, title=None):
+        """
+        Writes the audio frames of one MP3 chunk to the output file.
+
+        :param audio_content: MP3 bytes of the chunk
+        :param title: Optional chapter title recorded in the chapter index
+        :return: Number of frames written
+        """
+        start = self.duration
+        frames_written = 0
+        dropped = 0
+        # Main data bytes of the frames of this chunk already written, which later frames may borrow
+        reservoir = 0
+        view = memoryview(audio_content)
+        for offset, frame in iter_frames(audio_content):
+            if frame['layer'] == 3:
+                if frames_written == 0 and dropped == 0 and is_info_frame(audio_content, offset, frame):
+                    continue
+                if main_data_begin(audio_content, offset, frame) > reservoir:
+                    dropped += 1
+                    continue
+                reservoir += main_data_size(frame)
+            if self.sample_rate is None:
+                self.sample_rate = frame['sample_rate']
+                if frame['layer'] == 3:
+                    self._write_info_frame(audio_content, offset, frame)
+            elif frame['sample_rate'] != self.sample_rate:
+                logger.warning(f"Chunk sample rate {frame['sample_rate']}Hz differs from {self.sample_rate}Hz")
+            self._file.write(view[offset:offset + frame['frame_length']])
+            self._bitrates.add(frame['bitrate'])
+            self.total_samples += frame['samples']
+            self.total_frames += 1
+            frames_written += 1
+
+        if dropped:
+            logger.warning(f"Dropped {dropped} frames of chunk {len(self.chapters) + 1} referring to audio data before the chunk")
+        if frames_written == 0:
+            logger.warning(f"No MP3 frames found in chunk {len(self.chapters) + 1}")
+        self.chapters.append({
+            'index': len(self.chapters) + 1,
+            'title': title or f"Part {len(self.chapters) + 1}",
+            'start': round(start, 3),
+            'end': round(self.duration, 3),
+        })
+        return frames_written
+
+    def close(self, write_index=True):
+        """
+        Fills in the Info frame, closes the output file and writes the chapter index if one was requested.
+
+        :param write_index: Whether to write the chapter index, False when the output is discarded (default: True)
+        """
+        if self._file.closed:
+            return
+        if self._info_offset is not None:
+            size = self._file.tell()
+            tag = b'Xing' if len(self._bitrates) > 1 else b'Info'
+            self._file.seek(self._info_offset)
+            self._file.write(tag + struct.pack('>III', INFO_FLAGS, self.total_frames, size))
+        self._file.close()
+        if self.chapter_index_path and write_index:
+            with open(self.chapter_index_path, 'w', encoding='utf-8') as index_file:
+                json.dump({'file': self.file_name, 'duration': round(self.duration, 3),
+                           'chapters': self.chapters}, index_file, indent=2)
+            logger.info(f"Chapter index written to: {self.chapter_index_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(write_index=exc_type is None)
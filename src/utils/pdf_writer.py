@@ -0,0 +1,96 @@
+from logging_config import get_module_logger
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+class PdfStreamWriter:
+    """
+    Writes text to a PDF file page by page, wrapping long lines to the page width and starting
+    a new page whenever the current one is full. Pages are drawn straight into the output file,
+    so there is no render, re-parse and copy round-trip.
+    """
+
+    def __init__(self, path, font_name='Helvetica', font_size=11, leading=15, margin=50, pagesize=None):
+        """
+        :param path: Path of the PDF file to write
+        :param font_name: Name of a standard or registered reportlab font (default: Helvetica)
+        :param font_size: Font size in points (default: 11)
+        :param leading: Distance between baselines in points (default: 15)
+        :param margin: Page margin in points (default: 50)
+        :param pagesize: (width, height) in points (default: letter)
+        """
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import letter
+
+        self.path = path
+        self.font_name = font_name
+        self.font_size = font_size
+        self.leading = leading
+        self.margin = margin
+        self.width, self.height = pagesize or letter
+        self.max_width = self.width - 2 * margin
+        self.lines_per_page = max(1, int((self.height - 2 * margin) // leading) + 1)
+        self.pages = 0
+        self._canvas = canvas.Canvas(path, pagesize=(self.width, self.height), pageCompression=1)
+        self._text = None
+        self._lines_on_page = 0
+        self._closed = False
+
+    def _new_page(self):
+        """
+        Finishes the current page, if any, and starts a text object at the top of a new one.
+        """
+        if self._text is not None:
+            self._canvas.drawText(self._text)
+            self._canvas.showPage()
+        self._text = self._canvas.beginText(self.margin, self.height - self.margin)
+        self._text.setFont(self.font_name, self.font_size)
+        self._text.setLeading(self.leading)
+        self._lines_on_page = 0
+        self.pages += 1
+
+    def wrap(self, line):
+        """
+        Wraps one line of text to the printable page width.
+
+        :param line: Text without line breaks
+        :return: List of lines that each fit the page width
+        """
+        from reportlab.lib.utils import simpleSplit
+
+        if not line.strip():
+            return [""]
+        return simpleSplit(line, self.font_name, self.font_size, self.max_width) or [""]
+
+    def write(self, content):
+        """
+        Appends text to the document. May be called repeatedly, e.g. once per translated chunk.
+
+        :param content: Text to write; line breaks start new lines
+        """
+        for paragraph in content.split('\n'):
+            for line in self.wrap(paragraph):
+                if self._text is None or self._lines_on_page >= self.lines_per_page:
+                    self._new_page()
+                self._text.textLine(line)
+                self._lines_on_page += 1
+
+    def close(self):
+        """
+        Finishes the last page and writes the PDF trailer.
+        """
+        if self._closed:
+            return
+        if self._text is None:
+            self._new_page()
+        self._canvas.drawText(self._text)
+        self._canvas.showPage()
+        self._canvas.save()
+        self._closed = True
+        logger.info(f"Wrote {self.pages} PDF pages to: {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
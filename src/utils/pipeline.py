@@ -0,0 +1,215 @@
+import time
+import queue
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.metrics import observe
+from logging_config import get_module_logger
+from config.settings import PIPELINE_QUEUE_SIZE
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Seconds a blocked stage waits before checking whether the pipeline was stopped
+POLL_INTERVAL = 0.05
+
+# Marks the end of the items flowing through a queue
+_DONE = object()
+
+class _Failure:
+    """
+    Carries the error of a stage downstream, so the consumer raises it.
+    """
+
+    def __init__(self, stage_name, error):
+        self.stage_name = stage_name
+        self.error = error
+
+class PipelineStage:
+    """
+    One step of a pipeline: applies `func` to every item it receives and passes on every item of the
+    iterable it returns, so a stage can drop items, transform them or split them into several.
+    """
+
+    def __init__(self, name, func, workers=1):
+        """
+        :param name: Stage name, used in log messages and the stage_seconds metric (e.g. 'translate')
+        :param func: Function taking one item and returning an iterable of items for the next stage
+        :param workers: Items processed at the same time (default: 1). With one worker the returned
+                        iterable is consumed lazily, so its first items move on before the last exist;
+                        with more, each result is collected before it is passed on, in input order
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers or 1))
+
+def _put(target, item, stop):
+    """
+    Puts an item on a bounded queue, waiting for room until the pipeline is stopped.
+
+    :return: False if the pipeline was stopped first
+    """
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(source, stop, timeout=None):
+    """
+    Takes the next item from a queue, returning _DONE once the pipeline is stopped, or None when
+    no item arrived within the timeout.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while not stop.is_set():
+        wait = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+        if wait <= 0:
+            return None
+        try:
+            return source.get(timeout=wait)
+        except queue.Empty:
+            continue
+    return _DONE
+
+def _feed(items, target, stop):
+    """
+    Runs in the source thread: puts the source items on the first queue.
+    """
+    try:
+        for item in items:
+            if not _put(target, item, stop):
+                return
+        _put(target, _DONE, stop)
+    except Exception as e:
+        logger.exception(f"Pipeline source failed: {str(e)}")
+        _put(target, _Failure('source', e), stop)
+
+def _record(pipeline_stage, elapsed, busy):
+    """
+    Records the time a stage spent on one item, without the time spent waiting for the next stage.
+    """
+    busy[pipeline_stage.name] += elapsed
+    observe('stage_seconds', elapsed, stage=pipeline_stage.name)
+
+def _run_serial(pipeline_stage, source, target, stop, busy):
+    """
+    Processes one item at a time, passing on every result as soon as the stage yields it.
+    """
+    while True:
+        item = _get(source, stop)
+        if item is _DONE or isinstance(item, _Failure):
+            _put(target, item, stop)
+            return
+        results = iter(pipeline_stage.func(item))
+        elapsed = 0.0
+        while True:
+            start = time.perf_counter()
+            result = next(results, _DONE)
+            elapsed += time.perf_counter() - start
+            if result is _DONE:
+                break
+            if not _put(target, result, stop):
+                return
+        _record(pipeline_stage, elapsed, busy)
+
+def _run_parallel(pipeline_stage, source, target, stop, busy):
+    """
+    Processes up to `workers` items at a time, passing on their results in input order.
+    """
+    def process(item):
+        start = time.perf_counter()
+        results = list(pipeline_stage.func(item))
+        return results, time.perf_counter() - start
+
+    def emit(future):
+        results, elapsed = future.result()
+        _record(pipeline_stage, elapsed, busy)
+        return all(_put(target, result, stop) for result in results)
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=pipeline_stage.workers,
+                            thread_name_prefix=f"pipeline-{pipeline_stage.name}") as executor:
+        while True:
+            # Passes on finished results in order while waiting for the next item
+            while pending and pending[0].done():
+                if not emit(pending.popleft()):
+                    return
+            if len(pending) >= pipeline_stage.workers:
+                if not emit(pending.popleft()):
+                    return
+                continue
+            item = _get(source, stop, timeout=POLL_INTERVAL if pending else None)
+            if item is None:
+                continue
+            if item is _DONE or isinstance(item, _Failure):
+                while pending:
+                    if not emit(pending.popleft()):
+                        return
+                _put(target, item, stop)
+                return
+            pending.append(executor.submit(contextvars.copy_context().run, process, item))
+
+def _run_stage(pipeline_stage, source, target, stop, busy):
+    """
+    Runs in the thread of one stage: applies the stage to every item of the source queue and puts
+    the results on the target queue, in input order. An error is passed downstream to the consumer.
+    """
+    try:
+        if pipeline_stage.workers == 1:
+            _run_serial(pipeline_stage, source, target, stop, busy)
+        else:
+            _run_parallel(pipeline_stage, source, target, stop, busy)
+    except Exception as e:
+        logger.exception(f"Pipeline stage {pipeline_stage.name} failed: {str(e)}")
+        _put(target, _Failure(pipeline_stage.name, e), stop)
+
+def run_pipeline(items, stages, queue_size=None):
+    """
+    Runs the stages concurrently, each in its own thread, connected by bounded queues: an item
+    moves on to the next stage as soon as it is ready, so the total time approaches that of the
+    slowest stage instead of the sum of all of them. A full queue makes the stage before it wait,
+    which bounds the memory held between stages.
+    Every thread runs in a copy of the caller's context, so the metrics of the running job are kept.
+
+    :param items: Iterable feeding the first stage, consumed in its own thread
+    :param stages: List of PipelineStage
+    :param queue_size: Maximum items waiting between two stages (default: PIPELINE_QUEUE_SIZE)
+    :yield: Items produced by the last stage, in order, as soon as each is ready
+    :raises Exception: The error of the first stage (or source) that failed
+    """
+    queue_size = max(1, queue_size or PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+    queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+    busy = {pipeline_stage.name: 0.0 for pipeline_stage in stages}
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(_feed, items, queues[0], stop),
+                                name='pipeline-source', daemon=True)]
+    for i, pipeline_stage in enumerate(stages):
+        threads.append(threading.Thread(target=contextvars.copy_context().run,
+                                        args=(_run_stage, pipeline_stage, queues[i], queues[i + 1], stop, busy),
+                                        name=f"pipeline-{pipeline_stage.name}", daemon=True))
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    completed = False
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                completed = True
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # Stops the threads still running when the consumer stopped early or a stage failed; they
+        # finish the call in progress and exit without waiting for room in the queues
+        stop.set()
+        if completed:
+            for thread in threads:
+                thread.join()
+            logger.info("Pipeline finished in %.2fs; busy time per stage: %s", time.perf_counter() - start,
+                        ", ".join(f"{name} {seconds:.2f}s" for name, seconds in busy.items()))
@@ -0,0 +1,482 @@
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from utils import metrics
+from logging_config import get_module_logger
+from config.settings import (
+    OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE, OPENAI_MAX_CONCURRENCY, OPENAI_MODEL_RATE_LIMITS,
+    SPEECH_REQUESTS_PER_MINUTE, SPEECH_MAX_CONCURRENCY,
+    TTS_REQUESTS_PER_MINUTE, TTS_CHARACTERS_PER_MINUTE, TTS_MAX_CONCURRENCY,
+    RATE_LIMIT_MAX_RETRIES, RATE_LIMIT_BACKOFF, RATE_LIMIT_MAX_BACKOFF, DEPRECATED_SETTINGS
+)
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# HTTP statuses worth retrying; 429 additionally shrinks the concurrency limit
+THROTTLE_STATUS = 429
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Exception class names raised by the OpenAI and Google SDKs for throttled or overloaded requests,
+# matched by name so neither SDK has to be imported
+THROTTLE_ERRORS = {'RateLimitError', 'ResourceExhausted', 'TooManyRequests'}
+RETRYABLE_ERRORS = THROTTLE_ERRORS | {'ServiceUnavailable', 'InternalServerError', 'APIConnectionError', 'APITimeoutError'}
+
+def error_status(error):
+    """
+    Returns the HTTP status of an API error raised by the OpenAI SDK, the Google SDK or urllib.
+
+    :param error: The exception
+    :return: The status code, or None if the error carries none
+    """
+    for attr in ('status_code', 'status', 'code'):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+def is_throttled(error):
+    """
+    Tells whether an error means the provider is throttling requests (HTTP 429 / quota exhausted).
+    """
+    return error_status(error) == THROTTLE_STATUS or type(error).__name__ in THROTTLE_ERRORS
+
+def is_retryable(error):
+    """
+    Tells whether an error is transient: throttling, an overloaded server or a dropped connection.
+    """
+    return error_status(error) in RETRYABLE_STATUSES or type(error).__name__ in RETRYABLE_ERRORS
+
+def retry_after(error):
+    """
+    Reads the delay requested by the server from the Retry-After (or retry-after-ms) header of an error.
+
+    :param error: The exception
+    :return: The delay in seconds, or None if the server did not ask for one
+    """
+    headers = getattr(error, 'headers', None) or getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after-ms') or headers.get('Retry-After-Ms')
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get('retry-after') or headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        logger.debug(f"Ignoring unparsable Retry-After header: {value!r}")
+        return None
+
+def backoff_delay(attempt, base=RATE_LIMIT_BACKOFF, cap=RATE_LIMIT_MAX_BACKOFF, server_delay=None):
+    """
+    Returns how long to wait before retrying. Without a server delay this is exponential backoff
+    with full jitter; a Retry-After delay is honoured (up to cap) plus a little jitter so waiting
+    callers do not all retry at the same instant.
+
+    :param attempt: Number of failed attempts so far, starting at 0
+    :param base: Base delay in seconds, doubled after every attempt
+    :param cap: Maximum delay in seconds
+    :param server_delay: Delay requested by the server in seconds, if any
+    :return: Delay in seconds
+    """
+    if server_delay is not None:
+        return min(cap, server_delay) + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at `rate_per_minute` tokens per minute, holding at most one
+    minute of tokens. Takes are reserved immediately, so callers queue in order instead of polling.
+    A rate of 0 (or None) disables the bucket.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        """
+        :param rate_per_minute: Tokens added per minute
+        :param capacity: Maximum tokens held (default: rate_per_minute)
+        """
+        self.rate_per_minute = rate_per_minute or 0
+        self.capacity = capacity or self.rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """
+        Takes `amount` tokens, going into debt if the bucket does not hold enough.
+
+        :param amount: Number of tokens to take (clamped to the capacity)
+        :return: Seconds to wait before the reserved tokens are actually available (0 if none)
+        """
+        if self.rate_per_minute <= 0:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_minute / 60.0)
+            self._updated = now
+            self._tokens -= min(amount, self.capacity)
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens * 60.0 / self.rate_per_minute
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that adapts to throttling (additive increase, multiplicative decrease):
+    every throttled call halves the limit, and a full round of successful calls raises it by one,
+    up to `max_limit`. Usable from threads and from coroutines on any event loop.
+    """
+
+    def __init__(self, max_limit, min_limit=1):
+        """
+        :param max_limit: Maximum (and initial) number of concurrent calls
+        :param min_limit: Limit never shrunk below (default: 1)
+        """
+        self.max_limit = max(1, int(max_limit or 1))
+        self.min_limit = max(1, min(int(min_limit or 1), self.max_limit))
+        self.limit = self.max_limit
+        self.active = 0
+        self.throttles = 0
+        self._successes = 0
+        self._waiters = []
+        self._lock = threading.Lock()
+
+    def _enter_or_wait(self, wake):
+        """
+        Takes a slot if one is free, otherwise registers `wake` to be called when one may be.
+
+        :return: True if a slot was taken
+        """
+        with self._lock:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            self._waiters.append(wake)
+            return False
+
+    def _wake_all(self):
+        """
+        Wakes every waiter so they compete for the free slots again.
+        """
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for wake in waiters:
+            wake()
+
+    def acquire(self):
+        """
+        Blocks until a slot is free and takes it.
+        """
+        while True:
+            event = threading.Event()
+            if self._enter_or_wait(event.set):
+                return
+            event.wait()
+
+    async def aacquire(self):
+        """
+        Waits, without blocking the event loop, until a slot is free and takes it.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            future = loop.create_future()
+
+            def wake(future=future):
+                try:
+                    loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+                except RuntimeError:
+                    pass  # the loop is closed, nobody is waiting anymore
+
+            if self._enter_or_wait(wake):
+                return
+            await future
+
+    def release(self):
+        """
+        Gives back a slot taken with acquire or aacquire.
+        """
+        with self._lock:
+            self.active -= 1
+        self._wake_all()
+
+    def record_success(self):
+        """
+        Counts a successful call and raises the limit by one after a full round of them.
+        """
+        with self._lock:
+            self._successes += 1
+            if self._successes < self.limit or self.limit >= self.max_limit:
+                return
+            self._successes = 0
+            self.limit += 1
+            logger.debug("Concurrency limit raised to %d", self.limit)
+        self._wake_all()
+
+    def record_throttle(self):
+        """
+        Counts a throttled call and halves the limit, measured from the calls actually in flight.
+        """
+        with self._lock:
+            self.throttles += 1
+            self._successes = 0
+            self.limit = max(self.min_limit, min(self.limit, self.active + 1) // 2)
+            logger.warning(f"Throttled by the provider, concurrency limit lowered to {self.limit}")
+
+class ProviderLimiter:
+    """
+    Shared rate-limiting layer for one provider (and model): a request bucket, a token bucket
+    (OpenAI tokens, Text-to-Speech characters), an adaptive concurrency limit, and retries of
+    transient errors with jittered exponential backoff driven by Retry-After.
+    A Retry-After from one call pauses every caller of the limiter, not only the throttled one.
+    """
+
+    def __init__(self, name, requests_per_minute=0, tokens_per_minute=0, max_concurrency=8,
+                 max_retries=RATE_LIMIT_MAX_RETRIES, backoff=RATE_LIMIT_BACKOFF, max_backoff=RATE_LIMIT_MAX_BACKOFF):
+        """
+        :param name: Name used in log messages, e.g. 'openai:gpt-4o'
+        :param requests_per_minute: Request budget per minute (0 = unlimited)
+        :param tokens_per_minute: Token budget per minute (0 = unlimited)
+        :param max_concurrency: Maximum concurrent calls; lowered automatically while throttled
+        :param max_retries: Number of retries of a transient error after the first attempt
+        :param backoff: Base retry delay in seconds, doubled after every attempt
+        :param max_backoff: Maximum retry delay in seconds
+        """
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """
+        Reserves one request and `tokens` tokens.
+
+        :return: Seconds to wait before sending the request
+        """
+        with self._lock:
+            paused = self._resume_at - time.monotonic()
+        return max(paused, self.requests.reserve(1), self.tokens.reserve(tokens) if tokens else 0)
+
+    def _on_error(self, error, attempt, description, retry=True):
+        """
+        Records a failed attempt and decides whether to retry it. A throttled attempt lowers the
+        concurrency limit and a Retry-After pauses every caller even when the error is raised.
+
+        :param retry: Whether the attempt may be retried (False once a stream has yielded items)
+        :return: Seconds to wait before the retry, or None if the error must be raised
+        """
+        if not is_retryable(error):
+            return None
+        server_delay = retry_after(error)
+        if is_throttled(error):
+            self.concurrency.record_throttle()
+        delay = backoff_delay(attempt, self.backoff, self.max_backoff, server_delay)
+        if server_delay is not None:
+            with self._lock:
+                self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        if not retry or attempt >= self.max_retries:
+            return None
+        self.retries += 1
+        logger.warning(f"{description} failed on {self.name} (attempt {attempt + 1}/{self.max_retries + 1}), "
+                       f"retrying in {delay:.2f}s: {str(error)}")
+        return delay
+
+    def _record(self, description, start, outcome, tokens=0):
+        """
+        Records the latency and outcome of one attempt in the API metrics, labelled by provider and operation.
+
+        :param description: Short description of the call, used as the operation label
+        :param start: perf_counter value when the request was sent, or None if it was never sent
+        :param outcome: 'ok', 'retried', 'error' or 'cancelled' (a stream closed by its consumer or a cancelled task)
+        :param tokens: Tokens (or characters) of a successful request
+        """
+        labels = {'provider': self.name, 'operation': description}
+        if start is not None:
+            metrics.observe('api_request_seconds', time.perf_counter() - start, **labels)
+        metrics.inc('api_requests_total', outcome=outcome, **labels)
+        if tokens and outcome == 'ok':
+            metrics.inc('api_tokens_total', tokens, **labels)
+
+    def call(self, func, tokens=0, description="API call"):
+        """
+        Calls func() within the rate limits, retrying transient errors.
+
+        :param func: Function without arguments sending one request
+        :param tokens: Tokens (or characters) the request is expected to use
+        :param description: Short description of the call used in log messages
+        :return: The result of func
+        :raises Exception: The last error when it is not transient or the retries are used up
+        """
+        for attempt in range(self.max_retries + 1):
+            self.concurrency.acquire()
+            start = None
+            try:
+                try:
+                    wait = self._reserve(tokens)
+                    if wait > 0:
+                        time.sleep(wait)
+                    start = time.perf_counter()
+                    result = func()
+                finally:
+                    # Also gives the slot back on KeyboardInterrupt and other BaseExceptions
+                    self.concurrency.release()
+            except Exception as e:
+                delay = self._on_error(e, attempt, description)
+                self._record(description, start, 'error' if delay is None else 'retried')
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.concurrency.record_success()
+            self._record(description, start, 'ok', tokens)
+            return result
+
+    def stream(self, func, tokens=0, description="API call"):
+        """
+        Calls func() within the rate limits and yields the items of the stream it returns (e.g. the
+        events of a streamed completion). The concurrency slot is held until the stream is exhausted
+        or closed, so long streams count against the concurrency limit and their full duration is
+        recorded. Transient errors before the first item are retried like in call; later ones are
+        reported to the limiter (throttling, Retry-After) and raised, as the caller already has part
+        of the output.
+
+        :param func: Function without arguments opening one streamed request and returning an iterable
+        :param tokens: Tokens (or characters) the request is expected to use
+        :param description: Short description of the call used in log messages
+        :yield: The items of the stream
+        :raises Exception: The last error when it is not transient, the retries are used up or items were yielded
+        """
+        for attempt in range(self.max_retries + 1):
+            self.concurrency.acquire()
+            start = None
+            stream = None
+            started = False
+            try:
+                wait = self._reserve(tokens)
+                if wait > 0:
+                    time.sleep(wait)
+                start = time.perf_counter()
+                stream = func()
+                for item in stream:
+                    started = True
+                    yield item
+            except GeneratorExit:
+                self.concurrency.release()
+                _close(stream)
+                self._record(description, start, 'cancelled')
+                raise
+            except Exception as e:
+                self.concurrency.release()
+                _close(stream)
+                delay = self._on_error(e, attempt, description, retry=not started)
+                self._record(description, start, 'error' if delay is None else 'retried')
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.concurrency.release()
+            self.concurrency.record_success()
+            self._record(description, start, 'ok', tokens)
+            return
+
+    async def acall(self, func, tokens=0, description="API call"):
+        """
+        Async counterpart of call: awaits func() within the rate limits, retrying transient errors.
+
+        :param func: Function without arguments returning an awaitable that sends one request
+        :param tokens: Tokens (or characters) the request is expected to use
+        :param description: Short description of the call used in log messages
+        :return: The result of the awaitable
+        :raises Exception: The last error when it is not transient or the retries are used up
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.concurrency.aacquire()
+            start = None
+            try:
+                try:
+                    wait = self._reserve(tokens)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    start = time.perf_counter()
+                    result = await func()
+                finally:
+                    # Also gives the slot back when the task is cancelled (CancelledError is a BaseException)
+                    self.concurrency.release()
+            except asyncio.CancelledError:
+                self._record(description, start, 'cancelled')
+                raise
+            except Exception as e:
+                delay = self._on_error(e, attempt, description)
+                self._record(description, start, 'error' if delay is None else 'retried')
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.concurrency.record_success()
+            self._record(description, start, 'ok', tokens)
+            return result
+
+def _close(stream):
+    """
+    Closes a stream that exposes close() (SDK streams, generators), releasing its connection.
+    """
+    close = getattr(stream, 'close', None)
+    if close is not None:
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Closing the stream failed: {str(e)}")
+
+# Limits per provider: (requests per minute, tokens per minute, maximum concurrency)
+PROVIDER_LIMITS = {
+    'openai': (OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE, OPENAI_MAX_CONCURRENCY),
+    'speech': (SPEECH_REQUESTS_PER_MINUTE, 0, SPEECH_MAX_CONCURRENCY),
+    'tts': (TTS_REQUESTS_PER_MINUTE, TTS_CHARACTERS_PER_MINUTE, TTS_MAX_CONCURRENCY),
+}
+
+# Limiters shared by every caller, keyed by (provider, model)
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_provider_limiter(provider, model=None):
+    """
+    Returns the limiter shared by every call to a provider and model, creating it on first use.
+    OpenAI models listed in a [RateLimits:<model>] section of config.ini get their own budgets.
+
+    :param provider: Provider name: 'openai', 'speech' or 'tts'
+    :param model: Optional model name, e.g. OPENAI_MODEL
+    :return: ProviderLimiter
+    """
+    key = (provider, model)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute, max_concurrency = PROVIDER_LIMITS.get(provider, (0, 0, 8))
+            if provider == 'openai' and model in OPENAI_MODEL_RATE_LIMITS:
+                requests_per_minute, tokens_per_minute = OPENAI_MODEL_RATE_LIMITS[model]
+            for setting, (setting_provider, replacement) in DEPRECATED_SETTINGS.items():
+                if setting_provider == provider:
+                    logger.warning(f"{setting} in config.ini is deprecated, set {replacement} in [RateLimits] instead")
+            name = f"{provider}:{model}" if model else provider
+            limiter = ProviderLimiter(name, requests_per_minute, tokens_per_minute, max_concurrency)
+            _limiters[key] = limiter
+        return limiter
+
+def reset_provider_limiters():
+    """
+    Drops every limiter so the next get_provider_limiter call starts from the configured limits.
+    """
+    with _limiters_lock:
+        _limiters.clear()
@@ -0,0 +1,57 @@
+import threading
+from collections import defaultdict
+
+class ThroughputMeter:
+    """
+    Thread-safe counters (files, chunks, tokens, ...) shared by concurrent workers.
+    Callers take a snapshot when they start and compare later snapshots against it
+    to get their own progress and rates.
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        """
+        Adds to the named counters, e.g. add(chunks=1, tokens=350).
+        """
+        with self._lock:
+            for name, amount in counts.items():
+                self._counts[name] += amount
+
+    def snapshot(self):
+        """
+        Returns a copy of the counters.
+
+        :return: Dictionary of counter name to value
+        """
+        with self._lock:
+            return dict(self._counts)
+
+def throughput_report(counts, elapsed, baseline=None):
+    """
+    Computes counts and per-second rates over an elapsed time.
+
+    :param counts: Dictionary of counter name to value
+    :param elapsed: Elapsed time in seconds
+    :param baseline: Optional earlier snapshot subtracted from counts
+    :return: Dictionary with every count, '<name>_per_second' for each, and 'elapsed_seconds'
+    """
+    baseline = baseline or {}
+    report = {'elapsed_seconds': round(elapsed, 3)}
+    for name, value in counts.items():
+        value -= baseline.get(name, 0)
+        report[name] = value
+        report[f"{name}_per_second"] = round(value / elapsed, 2) if elapsed > 0 else 0.0
+    return report
+
+def format_throughput(report, names):
+    """
+    Formats the given counters of a throughput report for a log line.
+
+    :param report: Report from throughput_report
+    :param names: Counter names to include, in order
+    :return: E.g. "12 files (0.50/s), 340 chunks (14.17/s)"
+    """
+    return ", ".join(f"{report.get(name, 0)} {name} ({report.get(f'{name}_per_second', 0.0):.2f}/s)" for name in names)
@@ -0,0 +1,101 @@
+from functools import lru_cache
+from utils.chunking import estimate_tokens
+from logging_config import get_module_logger
+from config.settings import OPENAI_MODEL, OPENAI_CONTEXT_TOKENS, OPENAI_MAX_OUTPUT_TOKENS
+
+# Get logger for this module
+logger = get_module_logger(__name__)
+
+# Context window and maximum completion tokens per model. Prefixes match dated snapshots,
+# e.g. "gpt-4o-2024-08-06" uses the "gpt-4o" limits; the longest matching prefix wins.
+MODEL_LIMITS = {
+    'gpt-3.5-turbo': (16385, 4096),
+    'gpt-3.5-turbo-instruct': (4096, 4096),
+    'gpt-4': (8192, 8192),
+    'gpt-4-32k': (32768, 32768),
+    'gpt-4-turbo': (128000, 4096),
+    'gpt-4-1106': (128000, 4096),
+    'gpt-4-0125': (128000, 4096),
+    'gpt-4o': (128000, 16384),
+    'gpt-4o-mini': (128000, 16384),
+}
+
+# Limits assumed for models missing from MODEL_LIMITS
+DEFAULT_LIMITS = (8192, 4096)
+
+# Tokens added by the chat format around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def get_model_limits(model=OPENAI_MODEL):
+    """
+    Returns the context window and maximum completion size of a model.
+    OPENAI_CONTEXT_TOKENS and OPENAI_MAX_OUTPUT_TOKENS override the built-in values when set.
+
+    :param model: The model name (default: OPENAI_MODEL)
+    :return: Dictionary with 'context_tokens' and 'max_output_tokens'
+    """
+    matches = [name for name in MODEL_LIMITS if model == name or model.startswith(name + '-')]
+    context_tokens, max_output_tokens = MODEL_LIMITS[max(matches, key=len)] if matches else DEFAULT_LIMITS
+    if OPENAI_CONTEXT_TOKENS:
+        context_tokens = OPENAI_CONTEXT_TOKENS
+    if OPENAI_MAX_OUTPUT_TOKENS:
+        max_output_tokens = OPENAI_MAX_OUTPUT_TOKENS
+    return {'context_tokens': context_tokens, 'max_output_tokens': min(max_output_tokens, context_tokens)}
+
+@lru_cache(maxsize=8)
+def get_encoding(model=OPENAI_MODEL):
+    """
+    Returns the tiktoken encoding of a model, or None when tiktoken or its encoding files are unavailable.
+
+    :param model: The model name (default: OPENAI_MODEL)
+    :return: tiktoken Encoding or None
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed, estimating token counts")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        logger.warning(f"Could not load the tokenizer for {model}, estimating token counts: {str(e)}")
+        return None
+
+def count_tokens(text, model=OPENAI_MODEL):
+    """
+    Counts the tokens of a text with the model's tokenizer, or estimates them if it is unavailable.
+
+    :param text: The text
+    :param model: The model name (default: OPENAI_MODEL)
+    :return: Number of tokens
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def chunk_token_budget(prompt, output_ratio, model=OPENAI_MODEL):
+    """
+    Returns the largest number of input tokens a single request can carry when its completion
+    is expected to be output_ratio times the input (e.g. a translation) and must fit both the
+    completion limit and the context window together with the prompt.
+
+    :param prompt: The system prompt sent with every chunk
+    :param output_ratio: Expected completion tokens per input token; 0 or less reserves no output,
+                         so only the context window bounds the chunk
+    :param model: The model name (default: OPENAI_MODEL)
+    :return: Maximum input tokens per chunk
+    """
+    limits = get_model_limits(model)
+    overhead = count_tokens(prompt, model) + 2 * MESSAGE_OVERHEAD_TOKENS
+    output_ratio = max(0.0, output_ratio)
+    budget = (limits['context_tokens'] - overhead) / (1 + output_ratio)
+    if output_ratio > 0:
+        budget = min(budget, limits['max_output_tokens'] / output_ratio)
+    budget = max(1, int(budget))
+    logger.debug(f"Chunk budget for {model}: {budget} tokens (context {limits['context_tokens']}, "
+                 f"output {limits['max_output_tokens']}, prompt {overhead})")
+    return budget
@@ -0,0 +1,95 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from src.utils.audio_probe import probe_audio_duration, _probe_file
+
+# This section imports necessary modules and functions for testing.
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames of 1152 samples
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+FRAME_LENGTH = 417
+
+def make_mp3(frames, xing_frames=None):
+    # Builds an MP3 stream, optionally starting with a Xing frame announcing xing_frames frames
+    data = b''
+    if xing_frames is not None:
+        body = bytearray(FRAME_LENGTH - 4)
+        body[32:44] = b'Xing' + struct.pack('>II', 0x01, xing_frames)
+        data += FRAME_HEADER + bytes(body)
+    return data + (FRAME_HEADER + b'\x00' * (FRAME_LENGTH - 4)) * frames
+
+def make_flac(sample_rate, total_samples):
+    # Builds a FLAC header with a STREAMINFO block
+    info = bytearray(34)
+    info[10] = (sample_rate >> 12) & 0xFF
+    info[11] = (sample_rate >> 4) & 0xFF
+    info[12] = ((sample_rate & 0x0F) << 4) | (1 << 1)
+    info[13] = (15 << 4) | ((total_samples >> 32) & 0x0F)
+    info[14:18] = struct.pack('>I', total_samples & 0xFFFFFFFF)
+    return b'fLaC' + bytes([0x80, 0, 0, 34]) + bytes(info) + b'\x00' * 100
+
+def make_ogg_page(granule, payload):
+    # Builds a minimal Ogg page with the given granule position and payload
+    return b'OggS' + b'\x00\x00' + struct.pack('<q', granule) + b'\x00' * 12 + bytes([1, len(payload)]) + payload
+
+class TestAudioProbe(unittest.TestCase):
+    # This class defines a test case for header-only audio duration probing.
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_mp3_xing_header(self):
+        # Tests that the Xing frame count is used instead of scanning the file
+        duration = probe_audio_duration(make_mp3(5, xing_frames=100000), '.mp3')
+        self.assertAlmostEqual(duration, 100000 * 1152 / 44100)
+        # Checks the duration computed from the announced frame count
+
+    def test_mp3_constant_bitrate_estimate(self):
+        # Tests the constant bitrate estimate when no Xing header is present
+        duration = probe_audio_duration(b'ID3\x04\x00\x00\x00\x00\x00\x00' + make_mp3(100), '.mp3')
+        self.assertAlmostEqual(duration, 100 * FRAME_LENGTH * 8 / 128000)
+        # Checks the duration computed from the stream size and bitrate
+
+    def test_flac_streaminfo(self):
+        # Tests reading the total sample count from FLAC STREAMINFO
+        path = self.write('test.flac', make_flac(48000, 48000 * 700))
+        self.assertAlmostEqual(probe_audio_duration(path, '.flac'), 700.0)
+        # Checks the duration of a 700-second FLAC header
+
+    def test_ogg_vorbis_granule(self):
+        # Tests reading the last granule position of an Ogg Vorbis stream
+        ident = b'\x01vorbis' + struct.pack('<I', 0) + bytes([2]) + struct.pack('<I', 44100) + b'\x00' * 12
+        data = make_ogg_page(0, ident) + b'\x00' * 1000 + make_ogg_page(44100 * 30, b'\x00' * 10)
+        self.assertAlmostEqual(probe_audio_duration(data, '.ogg'), 30.0)
+        # Checks the duration of a 30-second Vorbis stream
+
+    def test_file_probe_is_memoized(self):
+        # Tests that repeated probes of an unchanged file reuse the cached result
+        path = self.write('test.mp3', make_mp3(10))
+        _probe_file.cache_clear()
+        first = probe_audio_duration(path, '.mp3')
+        second = probe_audio_duration(path, '.mp3')
+        self.assertEqual(first, second)
+        self.assertEqual(_probe_file.cache_info().hits, 1)
+        # Checks that the second probe was a cache hit
+
+    def test_unknown_data_returns_none(self):
+        # Tests that the probe gives up on data without headers so the caller can decode instead
+        self.assertIsNone(probe_audio_duration(b'not audio', '.mp3'))
+        self.assertIsNone(probe_audio_duration(os.path.join(self.temp_dir, 'missing.mp3'), '.mp3'))
+        # Checks that unreadable input yields None
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -0,0 +1,56 @@
+import io
+import wave
+import unittest
+from unittest.mock import patch
+from pydub import AudioSegment
+from pydub.generators import Sine
+from src.utils import audio_segments
+from src.utils.audio_segments import find_split_points, split_audio_on_silence
+
+# This section imports necessary modules and functions for testing.
+
+class TestAudioSegments(unittest.TestCase):
+    # This class defines a test case for splitting audio at silences.
+
+    def test_splits_in_silence(self):
+        # Tests that cuts fall inside the silence closest to the segment limit
+        tone = Sine(440).to_audio_segment(duration=4000)
+        audio = tone + AudioSegment.silent(duration=1000) + tone + AudioSegment.silent(duration=1000) + tone
+        points = find_split_points(audio, max_segment_ms=6000, min_silence_ms=500)
+        self.assertEqual(points[0][0], 0)
+        self.assertEqual(points[-1][1], len(audio))
+        self.assertTrue(all(end - start <= 6000 for start, end in points))
+        self.assertTrue(4000 <= points[0][1] <= 5000)
+        # Checks full coverage, the length limit and that the first cut is in the first silence
+
+    def test_hard_cut_without_silence(self):
+        # Tests that continuous audio is cut exactly at the limit
+        audio = Sine(440).to_audio_segment(duration=10000)
+        self.assertEqual(find_split_points(audio, max_segment_ms=4000), [(0, 4000), (4000, 8000), (8000, 10000)])
+        # Checks the segments of audio without any silence
+
+    def test_split_audio_streams_windows(self):
+        # Tests that a stereo WAV is split in silences and converted to mono PCM block by block
+        tone = Sine(440).to_audio_segment(duration=4000).set_channels(2)
+        silence = AudioSegment.silent(duration=1000, frame_rate=tone.frame_rate).set_channels(2)
+        audio = (tone + silence + tone + silence + tone).set_sample_width(2)
+        wav_bytes = io.BytesIO()
+        with wave.open(wav_bytes, 'wb') as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(audio.frame_rate)
+            wav.writeframes(audio.raw_data)
+
+        with patch.object(audio_segments, 'READ_BLOCK_SECONDS', 1):
+            segments = list(split_audio_on_silence(wav_bytes.getvalue(), 6, 16000))
+        self.assertEqual(segments[0]['start'], 0)
+        self.assertAlmostEqual(segments[-1]['end'], len(audio) / 1000.0, places=2)
+        self.assertEqual([s['end'] for s in segments[:-1]], [s['start'] for s in segments[1:]])
+        self.assertTrue(all(s['end'] - s['start'] <= 6 for s in segments))
+        self.assertTrue(4 <= segments[0]['end'] <= 5)
+        self.assertTrue(all(len(s['content']) == round((s['end'] - s['start']) * 16000) * 2 for s in segments))
+        # Checks contiguous segments covering the audio, the length limit, the first cut in the silence and 16 kHz mono content
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -0,0 +1,98 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.batch import load_manifest, resolve_language, run_jobs, execute_job
+from src import batch
+
+# This section imports necessary modules and functions for testing.
+
+class TestBatch(unittest.TestCase):
+    # This class defines a test case for the headless batch runner.
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        # Keeps the per-job metrics summaries out of the project's logs folder
+        patcher = patch('utils.metrics.METRICS_DIR', self.temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def write_manifest(self, lines):
+        path = os.path.join(self.temp_dir, 'jobs.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        return path
+
+    def test_load_manifest(self):
+        # Tests that jobs are loaded and numbered by line
+        path = self.write_manifest([
+            json.dumps({'operation': 'translate_document', 'input': 'a.txt', 'output': 'b.txt', 'target_lang': 'Spanish'}),
+            '',
+            json.dumps({'id': 'book', 'operation': 'audio_book', 'input': 'c.docx', 'output': 'c.mp3'}),
+        ])
+        jobs = load_manifest(path)
+        self.assertEqual([job['id'] for job in jobs], ['1', 'book'])
+        # Checks the job ids, including the default id taken from the line number
+
+    def test_load_manifest_rejects_unknown_operation(self):
+        # Tests manifest validation
+        path = self.write_manifest([json.dumps({'operation': 'dance', 'input': 'a', 'output': 'b'})])
+        with self.assertRaises(ValueError):
+            load_manifest(path)
+        # Checks that an unsupported operation is reported
+
+    def test_resolve_language(self):
+        # Tests resolving languages by name or code
+        self.assertEqual(resolve_language('spanish'), ('Spanish', 'es-ES'))
+        self.assertEqual(resolve_language('fr-FR'), ('French', 'fr-FR'))
+        with self.assertRaises(ValueError):
+            resolve_language('Klingon')
+        # Checks both lookups and the error for an unknown language
+
+    @patch.object(batch, 'process_file')
+    def test_execute_job_translate_document(self, mock_process_file):
+        # Tests that document jobs reuse process_file
+        mock_process_file.return_value = 'out.txt'
+        job = {'operation': 'translate_document', 'input': 'in.txt', 'output': 'out.txt',
+               'source_lang': 'en-US', 'target_lang': 'Spanish'}
+        self.assertEqual(execute_job(job), 'out.txt')
+        mock_process_file.assert_called_once_with('in.txt', 'out.txt', 'translate', source_lang='English', target_lang='Spanish')
+        # Checks the arguments passed to process_file
+
+    @patch.object(batch, 'execute_job')
+    def test_run_jobs_writes_results(self, mock_execute):
+        # Tests that every job gets a result line with its status and timing
+        def fake_execute(job):
+            if job['id'] == 'bad':
+                raise ValueError("boom")
+            return job['output']
+
+        mock_execute.side_effect = fake_execute
+        jobs = [{'id': str(i), 'operation': 'summarize', 'input': f'{i}.txt', 'output': f'{i}.out'} for i in range(5)]
+        jobs.append({'id': 'bad', 'operation': 'summarize', 'input': 'bad.txt', 'output': 'bad.out'})
+        results_path = os.path.join(self.temp_dir, 'results.jsonl')
+
+        run_jobs(jobs, results_path, workers=3)
+
+        with open(results_path, encoding='utf-8') as f:
+            results = {r['id']: r for r in map(json.loads, f)}
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results['bad']['status'], 'failed')
+        self.assertEqual(results['bad']['error'], 'boom')
+        self.assertEqual(results['3']['output'], '3.out')
+        self.assertIn('duration_seconds', results['0'])
+        # Checks the statuses, error message, outputs and timing in the results file
+
+        with open(results['bad']['metrics'], encoding='utf-8') as f:
+            summary = json.load(f)
+        self.assertEqual((summary['job'], summary['operation']), ('bad', 'summarize'))
+        # Checks that every job got its metrics summary
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+from src.utils.cache import DiskCache, make_cache_key
+
+# This section imports necessary modules and functions for testing.
+
+class TestDiskCache(unittest.TestCase):
+    # This class defines a test case for the on-disk cache.
+
+    def setUp(self):
+        # Creates a temporary directory for the cache database
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'cache.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_make_cache_key(self):
+        # Tests that keys depend on every part
+        key = make_cache_key("Hello", "en", "es", "gpt-3.5-turbo")
+        self.assertEqual(key, make_cache_key("Hello", "en", "es", "gpt-3.5-turbo"))
+        self.assertNotEqual(key, make_cache_key("Hello", "en", "fr", "gpt-3.5-turbo"))
+        self.assertEqual(len(key), 64)
+        # Checks that identical parts produce identical keys and different parts do not
+
+    def test_get_and_set(self):
+        # Tests hits, misses and persistence across instances
+        cache = DiskCache(self.path, 1024)
+        self.assertIsNone(cache.get("missing"))
+        cache.set("key", b"value")
+        self.assertEqual(cache.get("key"), b"value")
+        self.assertEqual(DiskCache(self.path, 1024).get("key"), b"value")
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        # Checks the counters and that the value survives reopening the database
+
+    def test_lru_eviction(self):
+        # Tests that the least recently used entries are evicted when the cache is full
+        cache = DiskCache(self.path, 30)
+        cache.set("a", b"x" * 10)
+        cache.set("b", b"x" * 10)
+        cache.set("c", b"x" * 10)
+        cache.get("a")
+        cache.set("d", b"x" * 10)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertEqual(cache.stats()['size_bytes'], 30)
+        self.assertEqual(cache.evictions, 1)
+        # Checks that "b" was evicted instead of the recently read "a"
+
+    def test_disabled_cache(self):
+        # Tests that a disabled cache never stores or returns values
+        cache = DiskCache(self.path, 1024, enabled=False)
+        cache.set("key", b"value")
+        self.assertIsNone(cache.get("key"))
+        self.assertFalse(os.path.exists(self.path))
+        # Checks that the bypass switch skips the database entirely
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
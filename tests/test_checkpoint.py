@@ -0,0 +1,114 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from src.utils.checkpoint import CheckpointStore, JobCheckpoint, file_digest
+
+# This section imports necessary modules and functions for testing.
+
+class TestCheckpointStore(unittest.TestCase):
+    # This class defines a test case for the job checkpoint store.
+
+    def setUp(self):
+        # Creates a temporary directory for the checkpoint database
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'checkpoints.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_save_and_load_across_instances(self):
+        # Tests that completed chunks survive a restart
+        store = CheckpointStore(self.path)
+        store.save('job', 0, b'first')
+        store.save('job', 2, b'third')
+        store.save('other', 0, b'unrelated')
+        self.assertEqual(CheckpointStore(self.path).load('job'), {0: b'first', 2: b'third'})
+        # Checks that a new instance reads the chunks of the job and only those
+
+    def test_complete_drops_chunks(self):
+        # Tests that completing a job keeps its completion record but not its chunk outputs
+        store = CheckpointStore(self.path)
+        store.save('job', 0, b'first')
+        self.assertFalse(store.is_complete('job'))
+        store.complete('job', 'out.txt')
+        self.assertTrue(store.is_complete('job'))
+        self.assertEqual(store.load('job'), {})
+        store.discard('job')
+        self.assertFalse(store.is_complete('job'))
+        # Checks the completion flag, the dropped chunks and discarding the job
+
+    def test_job_checkpoint(self):
+        # Tests that a job checkpoint is keyed by its parts and resumes recorded chunks
+        store = CheckpointStore(self.path)
+        JobCheckpoint(store, 'translate', 'digest', 'en', 'es').save(1, b'uno')
+        resumed = JobCheckpoint(store, 'translate', 'digest', 'en', 'es')
+        self.assertEqual(resumed.resumed, 1)
+        self.assertEqual(resumed.get(1), b'uno')
+        self.assertIsNone(resumed.get(0))
+        self.assertEqual(JobCheckpoint(store, 'translate', 'digest', 'en', 'fr').resumed, 0)
+        # Checks the resumed chunk and that other parameters make another job
+
+    def test_expire_drops_stale_unfinished_jobs(self):
+        # Tests that jobs without a saved chunk for max_age_days expire when the store is opened
+        store = CheckpointStore(self.path)
+        store.save('stale', 0, b'old' * 10000)
+        store.save('fresh', 0, b'new')
+        store.complete('done')
+        store._conn.execute("UPDATE chunks SET updated_at = 0 WHERE job = 'stale'")
+        store._conn.commit()
+        reopened = CheckpointStore(self.path, max_age_days=7)
+        self.assertEqual(reopened.load('stale'), {})
+        self.assertEqual(reopened.load('fresh'), {0: b'new'})
+        self.assertTrue(reopened.is_complete('done'))
+        self.assertEqual(reopened.expire(), 0)
+        self.assertEqual(CheckpointStore(self.path).expire(7), 0)
+        # Checks that only the stale unfinished job lost its chunks
+
+    def test_dropped_chunks_are_reclaimed(self):
+        # Tests that completing a job returns the pages of its chunks to the file system
+        store = CheckpointStore(self.path)
+        for index in range(20):
+            store.save('job', index, os.urandom(16 * 1024))
+        store.complete('job')
+        conn = store._connect()
+        self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertEqual(conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        # Checks incremental auto_vacuum and that no free pages are left behind
+
+    def test_upgrades_database_without_timestamps(self):
+        # Tests that a database written before chunks were timestamped is upgraded and kept
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE chunks (job TEXT NOT NULL, idx INTEGER NOT NULL, output BLOB NOT NULL, "
+                     "PRIMARY KEY (job, idx))")
+        conn.execute("INSERT INTO chunks (job, idx, output) VALUES ('job', 0, x'6f6c64')")
+        conn.commit()
+        conn.close()
+        store = CheckpointStore(self.path, max_age_days=1)
+        self.assertEqual(store.load('job'), {0: b'old'})
+        self.assertEqual(store._connect().execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        # Checks that the old chunks survive the upgrade and incremental vacuum is enabled
+
+    def test_disabled_store(self):
+        # Tests that a disabled store records nothing
+        store = CheckpointStore(self.path, enabled=False)
+        store.save('job', 0, b'first')
+        store.complete('job')
+        self.assertEqual(store.load('job'), {})
+        self.assertFalse(store.is_complete('job'))
+        self.assertFalse(os.path.exists(self.path))
+        # Checks that no database was created
+
+    def test_file_digest(self):
+        # Tests that the digest follows the file contents
+        path = os.path.join(self.temp_dir, 'input.txt')
+        with open(path, 'wb') as f:
+            f.write(b'hello')
+        digest = file_digest(path, block_size=2)
+        self.assertEqual(digest, '2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824')
+        # Checks the SHA-256 of the contents read in small blocks
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+from src.utils import chunking
+from src.utils.chunking import (
+    split_paragraphs, split_sentences, chunk_text, iter_chunks, join_chunks, estimate_tokens, iter_sentences
+)
+
+# This section imports necessary modules and functions for testing.
+
+class TestChunking(unittest.TestCase):
+    # This class defines a test case for the sentence-aware chunker.
+
+    def test_split_sentences_latin(self):
+        # Tests sentence boundaries, abbreviations, initials and decimal numbers
+        text = 'Dr. Smith paid 3.5 euros at 5 p.m. today. He said "Hello!" Then J. R. left… The end'
+        sentences = [sentence for sentence, _ in split_sentences(text)]
+        self.assertEqual(sentences, ['Dr. Smith paid 3.5 euros at 5 p.m. today.', 'He said "Hello!"',
+                                     'Then J. R. left…', 'The end'])
+
+    def test_split_sentences_other_scripts(self):
+        # Tests CJK, Arabic and Devanagari terminators
+        self.assertEqual([s for s, _ in split_sentences("你好。我很好！谢谢")], ["你好。", "我很好！", "谢谢"])
+        self.assertEqual([s for s, _ in split_sentences("مرحبا؟ نعم.")], ["مرحبا؟", "نعم."])
+        self.assertEqual([s for s, _ in split_sentences("नमस्ते। ठीक है")], ["नमस्ते।", "ठीक है"])
+
+    def test_split_paragraphs(self):
+        # Tests that paragraphs are split at blank lines and keep their separators
+        paragraphs = split_paragraphs("\nFirst line\nsecond line\n\n  \nSecond paragraph\n")
+        self.assertEqual(paragraphs, [("First line\nsecond line", "\n\n  \n"), ("Second paragraph", "\n")])
+
+    def test_chunks_keep_paragraphs(self):
+        # Tests that whole paragraphs are kept together and the structure can be restored
+        text = "Para one first. Para one second.\n\nPara two is here.\n\nPara three."
+        chunks = chunk_text(text, max_chars=40)
+        self.assertEqual([chunk['text'] for chunk in chunks],
+                         ["Para one first. Para one second.", "Para two is here.\n\nPara three."])
+        self.assertEqual(join_chunks([chunk['text'] for chunk in chunks], chunks), text)
+
+    def test_hard_limits(self):
+        # Tests that character, byte and token limits hold even for sentences and words longer than a chunk
+        text = ("A very long sentence without any full stop " * 20 + "\n\n" + "日本語" * 50 + "。" +
+                " " + "x" * 300)
+        for limits in ({'max_chars': 50}, {'max_chars': 500, 'max_bytes': 40}, {'max_chars': 500, 'max_tokens': 12}):
+            chunks = chunk_text(text, **limits)
+            for chunk in chunks:
+                self.assertLessEqual(len(chunk['text']), limits['max_chars'])
+                self.assertLessEqual(len(chunk['text'].encode('utf-8')), limits.get('max_bytes', 10 ** 9))
+                self.assertLessEqual(estimate_tokens(chunk['text']), limits.get('max_tokens', 10 ** 9))
+            self.assertEqual("".join(chunk['text'] + chunk['separator'] for chunk in chunks), text)
+            # Checks every limit and that no text is lost
+
+    def test_iter_chunks_matches_chunk_text(self):
+        # Tests that streamed pieces produce chunks within the limits and lose no text
+        text = " ".join(f"Sentence number {i}." for i in range(400))
+        pieces = [text[i:i + 37] for i in range(0, len(text), 37)]
+        chunks = list(iter_chunks(pieces, max_chars=100))
+        self.assertTrue(all(len(chunk['text']) <= 100 for chunk in chunks))
+        self.assertEqual("".join(chunk['text'] + chunk['separator'] for chunk in chunks), text)
+
+    def test_iter_sentences(self):
+        # Tests that streamed tokens are grouped into sentences as soon as the next sentence starts
+        text = "Hola Sr. García. ¿Cómo está? Bien.\n\nUn párrafo sin punto\n\n中文句子。第二句！ fin"
+        pieces = [text[i:i + 3] for i in range(0, len(text), 3)]
+        self.assertEqual(list(iter_sentences(pieces)),
+                         ["Hola Sr. García.", "¿Cómo está?", "Bien.", "Un párrafo sin punto", "中文句子。", "第二句！", "fin"])
+
+        def tokens():
+            yield "First sentence. "
+            yield "Second"
+            raise AssertionError("read past the second sentence")
+        self.assertEqual(next(iter_sentences(tokens())), "First sentence.")
+        # Checks abbreviations, paragraph breaks and other scripts, and that a sentence is yielded before the stream ends
+
+    def test_iter_sentences_long_stream(self):
+        # Tests that a long stream is split without re-splitting the whole buffer for every piece
+        text = ("word " * 600).strip() + ". " + "Dr. Smith said so. " * 200
+        with patch.object(chunking, '_split_text_sentences', wraps=chunking._split_text_sentences) as split:
+            sentences = list(iter_sentences(text, max_chars=1000))
+        scanned = sum(len(call.args[0]) for call in split.call_args_list)
+        self.assertLess(scanned, 20 * len(text))
+        self.assertLessEqual(max(len(sentence) for sentence in sentences), 1000)
+        self.assertEqual(" ".join(sentences), text.strip())
+        self.assertEqual(sentences[-1], "Dr. Smith said so.")
+        # Checks that only pieces near a sentence end trigger a split, the forced cut at max_chars and that no text is lost
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.utils import clients
+
+# This section imports necessary modules and functions for testing.
+
+class TestClients(unittest.TestCase):
+    # This class defines a test case for the client registry.
+
+    def setUp(self):
+        self.addCleanup(clients.reset_clients)
+        self.addCleanup(clients.register_openai_clients)
+
+    def test_shared_client(self):
+        # Tests that a shared client is built once and used by every thread
+        factory = MagicMock(side_effect=lambda: object())
+        clients.register_client('test_shared', factory)
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(clients.get_client('test_shared'))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(factory.call_count, 1)
+        self.assertEqual(len({id(client) for client in seen}), 1)
+        # Checks a single build and a single instance
+
+    def test_pooled_client(self):
+        # Tests that pooled clients are bounded across thread pools and rebuilt after reset_clients
+        factory = MagicMock(side_effect=lambda: MagicMock())
+        clients.register_client('test_pool', factory, pool_size=2)
+        seen = []
+
+        def use_client():
+            seen.append(clients.get_client('test_pool'))
+            seen.append(clients.get_client('test_pool'))
+
+        for _ in range(3):
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                for _ in range(3):
+                    executor.submit(use_client)
+        self.assertEqual(factory.call_count, 2)
+        self.assertEqual(len({id(client) for client in seen}), 2)
+        self.assertEqual([seen[i] is seen[i + 1] for i in range(0, len(seen), 2)], [True] * 9)
+
+        first = clients.get_client('test_pool')
+        clients.reset_clients()
+        self.assertIsNot(clients.get_client('test_pool'), first)
+        fake = object()
+        clients.set_client('test_pool', fake)
+        self.assertIs(clients.get_client('test_pool'), fake)
+        # Checks that nine threads in three executors share two clients, the rebuild after a reset and that installed clients win
+
+    def test_dropped_clients_are_closed(self):
+        # Tests that reset_clients and register_client close the clients they drop
+        shared = MagicMock()
+        pooled = MagicMock()
+        async_client = MagicMock()
+        async_client.close = AsyncMock()
+        clients.register_client('test_shared', lambda: shared)
+        clients.register_client('test_pool', lambda: pooled, pool_size=1)
+        clients.register_client('test_async', lambda: async_client)
+        for name in ('test_shared', 'test_pool', 'test_async'):
+            clients.get_client(name)
+        clients.reset_clients()
+        shared.close.assert_called_once()
+        pooled.close.assert_called_once()
+        async_client.close.assert_awaited_once()
+
+        clients.get_client('test_shared')
+        clients.register_client('test_shared', MagicMock)
+        self.assertEqual(shared.close.call_count, 2)
+        # Checks that shared, pooled and async clients are closed when dropped
+
+    def test_openai_client_policy(self):
+        # Tests that OPENAI_CLIENT_POLICY selects pooled OpenAI clients and falls back to a shared one
+        with patch.object(clients, 'OPENAI_CLIENT_POLICY', 'thread'), patch.object(clients, 'OPENAI_CLIENT_POOL_SIZE', 3):
+            clients.register_openai_clients()
+            self.assertEqual(clients._pool_sizes.get('openai'), 3)
+        with patch.object(clients, 'OPENAI_CLIENT_POLICY', 'pooled'):
+            clients.register_openai_clients()
+            self.assertNotIn('openai', clients._pool_sizes)
+        # Checks the thread policy and the fallback for an unknown policy
+
+    def test_openai_client_options(self):
+        # Tests that the transport settings are passed to the HTTP client of the OpenAI client
+        httpx = MagicMock()
+        openai = MagicMock()
+        settings = {'OPENAI_MAX_CONNECTIONS': 0, 'OPENAI_MAX_KEEPALIVE_CONNECTIONS': 16, 'OPENAI_KEEPALIVE_EXPIRY': 5.0,
+                    'OPENAI_CONNECT_TIMEOUT': 2.0, 'OPENAI_READ_TIMEOUT': 60.0, 'OPENAI_HTTP2': False,
+                    'OPENAI_BASE_URL': 'http://127.0.0.1:8080/v1'}
+        with patch.dict(sys.modules, {'httpx': httpx, 'openai': openai}), patch.multiple(clients, **settings):
+            options = clients.openai_client_options()
+        httpx.Limits.assert_called_once_with(max_connections=None, max_keepalive_connections=16, keepalive_expiry=5.0)
+        self.assertEqual(httpx.Timeout.call_args.kwargs['connect'], 2.0)
+        self.assertEqual(httpx.Timeout.call_args.kwargs['read'], 60.0)
+        openai.DefaultHttpxClient.assert_called_once_with(limits=httpx.Limits.return_value,
+                                                          timeout=httpx.Timeout.return_value, http2=False)
+        self.assertEqual(options['http_client'], openai.DefaultHttpxClient.return_value)
+        self.assertEqual(options['base_url'], 'http://127.0.0.1:8080/v1')
+        # Checks the pool limits, the per-operation timeouts, the HTTP client and the base URL
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -1,12 +1,16 @@
 import unittest
 from unittest.mock import patch, mock_open, MagicMock
 import os
+import shutil
+import tempfile
 from datetime import datetime
 from src.utils.common import (
     generate_unique_filename, get_language_choice, get_filename,
     load_env_variables, read_file, write_file, split_content,
-    check_text_size, check_audio_duration
+    check_text_size, check_audio_duration, iter_pdf_pages,
+    discover_documents, partial_path, iter_mmap_text, write_stream
 )
+from src.utils import common
 
 # This section imports necessary modules and functions for testing.
 
@@ -15,7 +19,7 @@ class TestCommon(unittest.TestCase):
 
     def test_generate_unique_filename(self):
         # Tests the generate_unique_filename function
-        with patch('utils.common.datetime') as mock_datetime:
+        with patch.object(common, 'datetime') as mock_datetime:
             mock_datetime.now.return_value = datetime(2023, 1, 1, 12, 0, 0)
             result = generate_unique_filename("test", ".txt")
             self.assertEqual(result, "test_20230101_120000.txt")
@@ -36,7 +40,7 @@ class TestCommon(unittest.TestCase):
         self.assertEqual(result, "custom_name.txt")
         # Mocks user input and checks if the correct filename is returned
 
-    @patch('utils.common.load_dotenv')
+    @patch.object(common, 'load_dotenv')
     @patch.dict(os.environ, {
         'OPENAI_API_KEY': 'test_key',
         'GOOGLE_APPLICATION_CREDENTIALS': 'test_creds'
@@ -55,7 +59,7 @@ class TestCommon(unittest.TestCase):
         mock_file.assert_called_once_with("test.txt", 'r', encoding='utf-8')
         # Mocks file opening and checks if content is read correctly
 
-    @patch('utils.common.PdfReader')
+    @patch('PyPDF2.PdfReader')
     def test_read_pdf_file(self, mock_pdf_reader):
         # Tests reading a PDF file
         mock_pdf = MagicMock()
@@ -65,7 +69,7 @@ class TestCommon(unittest.TestCase):
         self.assertEqual(content, "page1page2")
         # Mocks PDF reading and checks if content is extracted correctly
 
-    @patch('utils.common.Document')
+    @patch('docx.Document')
     def test_read_docx_file(self, mock_document):
         # Tests reading a DOCX file
         mock_doc = MagicMock()
@@ -87,9 +91,10 @@ class TestCommon(unittest.TestCase):
         # Tests the split_content function
         content = "This is a test. It has multiple sentences. Let's see how it splits."
         result = split_content(content, max_chars=20)
-        self.assertEqual(len(result), 3)
         self.assertEqual(result[0], "This is a test.")
-        # Checks if content is split correctly based on character limit
+        self.assertTrue(all(len(chunk) <= 20 for chunk in result))
+        self.assertEqual(" ".join(result), content)
+        # Checks that content is split at sentence boundaries, no chunk exceeds the limit and no text is lost
 
     def test_check_text_size(self):
         # Tests the check_text_size function
@@ -115,7 +120,7 @@ class TestCommon(unittest.TestCase):
         self.assertTrue(result)  # 100 seconds, large
         # Mocks WAV file opening and checks if duration is correctly identified
 
-    @patch('utils.common.AudioSegment.from_file')
+    @patch('pydub.AudioSegment.from_file')
     def test_check_audio_duration_mp3(self, mock_audio_segment):
         # Tests checking MP3 audio duration
         mock_audio = MagicMock()
@@ -130,6 +135,98 @@ class TestCommon(unittest.TestCase):
         self.assertTrue(result)
         # Mocks MP3 file reading and checks if duration is correctly identified
 
+    def test_iter_pdf_pages(self):
+        # Tests page-parallel PDF extraction against a generated PDF
+        from reportlab.pdfgen import canvas
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        pdf_path = os.path.join(temp_dir, 'pages.pdf')
+        can = canvas.Canvas(pdf_path)
+        for i in range(7):
+            can.drawString(50, 700, f"Page number {i}")
+            can.showPage()
+        can.save()
+
+        expected = [f"Page number {i}" for i in range(7)]
+        self.assertEqual([page.strip() for page in iter_pdf_pages(pdf_path, workers=1)], expected)
+        self.assertEqual([page.strip() for page in iter_pdf_pages(pdf_path, workers=2, pages_per_task=2)], expected)
+        # Checks that in-process and multi-process extraction yield the pages in order
+
+        with patch('PyPDF2.PdfReader', side_effect=AssertionError("parsed in the calling process")), \
+                patch.dict(common._pdf_pools, clear=True):
+            readers = [iter_pdf_pages(pdf_path, workers=2, pages_per_task=3) for _ in range(3)]
+            results = [[page.strip() for page in reader] for reader in readers]
+            pools = list(common._pdf_pools.values())
+        for pool in pools:
+            pool.shutdown()
+        self.assertEqual(results, [expected] * 3)
+        self.assertEqual(len(pools), 1)
+        self.assertEqual(pools[0]._mp_context.get_start_method(), 'spawn')
+        # Checks that worker processes count the pages and that reads share one spawned pool
+
+        pieces = read_file(pdf_path, stream=True)
+        self.assertEqual(next(pieces).strip(), "Page number 0")
+        pieces.close()
+        # Checks that read_file can stream the pages lazily
+
+    def test_discover_documents(self):
+        # Tests recursive discovery of supported documents
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        for name in ('a.txt', 'b.PDF', 'notes.md', '.c.partial.txt', os.path.join('sub', 'd.docx'), os.path.join('.hidden', 'e.txt')):
+            os.makedirs(os.path.dirname(os.path.join(temp_dir, name)), exist_ok=True)
+            open(os.path.join(temp_dir, name), 'w').close()
+        self.assertEqual(discover_documents(temp_dir), ['a.txt', 'b.PDF', os.path.join('sub', 'd.docx')])
+        # Checks that unsupported formats and hidden files and directories are skipped
+
+    def test_partial_path(self):
+        # Tests that partial outputs sit next to the output, hidden, with the same extension
+        path = partial_path(os.path.join('out', 'book.pdf'))
+        self.assertEqual(os.path.dirname(path), 'out')
+        self.assertTrue(os.path.basename(path).startswith('.book.'))
+        self.assertTrue(path.endswith('.pdf'))
+        # Checks the directory, the hidden name and the extension
+
+    def test_iter_mmap_text(self):
+        # Tests incremental decoding of a memory-mapped text file
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        text_path = os.path.join(temp_dir, 'text.txt')
+        text = "Grüße, 世界! " * 50
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        blocks = list(iter_mmap_text(text_path, block_bytes=7))
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual("".join(blocks), text)
+        # Checks that multi-byte characters split across blocks are decoded intact
+
+        empty_path = os.path.join(temp_dir, 'empty.txt')
+        open(empty_path, 'w').close()
+        self.assertEqual(list(iter_mmap_text(empty_path)), [])
+        # Checks that an empty file yields nothing
+
+        with patch.object(common, 'LARGE_FILE_BYTES', 10):
+            self.assertEqual(read_file(text_path), text)
+        # Checks that large text files are read back as a string
+
+    def test_write_stream(self):
+        # Tests writing text that arrives in pieces
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        pieces = ["First line\nSec", "ond line", "\nThird line"]
+
+        txt_path = os.path.join(temp_dir, 'out.txt')
+        self.assertEqual(write_stream(iter(pieces), txt_path), len("".join(pieces)))
+        with open(txt_path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "".join(pieces))
+        # Checks that text output is written as given
+
+        pdf_path = os.path.join(temp_dir, 'out.pdf')
+        write_stream(iter(pieces), pdf_path)
+        self.assertEqual([line.strip() for line in "".join(iter_pdf_pages(pdf_path, workers=1)).splitlines() if line.strip()],
+                         ["First line", "Second line", "Third line"])
+        # Checks that PDF output keeps lines split across pieces together
+
 if __name__ == '__main__':
     unittest.main()
     # Allows the test file to be run as a script
\ No newline at end of file
@@ -0,0 +1,113 @@
+import unittest
+import asyncio
+import random
+import threading
+import time
+from src.utils.concurrency import imap_ordered, run_ordered
+from src.utils.concurrency import agather_ordered, aimap_ordered, get_semaphore
+
+# This section imports necessary modules and functions for testing.
+
+class TestConcurrency(unittest.TestCase):
+    # This class defines a test case for the concurrency helpers.
+
+    def test_run_ordered_preserves_order(self):
+        # Tests that results come back in input order even when calls finish out of order
+        def slow_double(x):
+            time.sleep(random.uniform(0, 0.02))
+            return x * 2
+
+        results = run_ordered(slow_double, range(20), max_in_flight=8)
+        self.assertEqual([result for result, _ in results], [x * 2 for x in range(20)])
+        self.assertTrue(all(latency >= 0 for _, latency in results))
+        # Checks that the results are ordered and that a latency is reported for every item
+
+    def test_imap_ordered_bounds_concurrency(self):
+        # Tests that no more than max_in_flight calls run at the same time
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def work(x):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.01)
+            with lock:
+                state['active'] -= 1
+            return x
+
+        indexes = [i for i, _, _ in imap_ordered(work, range(30), max_in_flight=3)]
+        self.assertEqual(indexes, list(range(30)))
+        self.assertLessEqual(state['peak'], 3)
+        # Checks the yielded indexes and the peak number of concurrent calls
+
+class TestAsyncConcurrency(unittest.IsolatedAsyncioTestCase):
+    # This class defines a test case for the asyncio concurrency helpers.
+
+    async def test_agather_ordered_preserves_order_and_bounds_concurrency(self):
+        # Tests that results come back in input order and the semaphore bounds the calls in flight
+        state = {'active': 0, 'peak': 0}
+
+        async def work(x):
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            await asyncio.sleep(random.uniform(0, 0.01))
+            state['active'] -= 1
+            return x * 2
+
+        results = await agather_ordered(work, range(20), semaphore=asyncio.Semaphore(3))
+        self.assertEqual([result for result, _ in results], [x * 2 for x in range(20)])
+        self.assertLessEqual(state['peak'], 3)
+        # Checks the order of the results and the peak number of concurrent calls
+
+    async def test_aimap_ordered_reads_items_in_a_bounded_window(self):
+        # Tests that items are read only while the window of pending results has room
+        state = {'read': 0, 'ahead': 0}
+
+        async def items():
+            for x in range(20):
+                state['read'] += 1
+                yield x
+
+        async def work(x):
+            await asyncio.sleep(random.uniform(0, 0.01))
+            return x * 2
+
+        results = []
+        async for i, result, latency in aimap_ordered(work, items(), max_in_flight=2):
+            state['ahead'] = max(state['ahead'], state['read'] - i)
+            results.append(result)
+        self.assertEqual(results, [x * 2 for x in range(20)])
+        self.assertLessEqual(state['ahead'], 4)
+        # Checks the order of the results and that at most twice max_in_flight items were read ahead
+
+    async def test_aimap_ordered_cancels_pending_calls_on_error(self):
+        # Tests that a failing call cancels the calls still in flight
+        cancelled = []
+
+        async def work(x):
+            if x == 0:
+                raise ValueError("boom")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(x)
+                raise
+
+        with self.assertRaises(ValueError):
+            async for _ in aimap_ordered(work, range(10), max_in_flight=2):
+                pass
+        await asyncio.sleep(0)
+        self.assertEqual(sorted(cancelled), [1, 2, 3])
+        # Checks that the other calls of the window were cancelled
+
+    async def test_get_semaphore_is_shared_per_loop(self):
+        # Tests that every caller on the loop gets the same semaphore for a name
+        first = get_semaphore('test', 2)
+        self.assertIs(get_semaphore('test', 5), first)
+        self.assertIsNot(get_semaphore('other', 2), first)
+        # Checks that the limit of the first call is kept and names are independent
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -0,0 +1,26 @@
+import os
+import sys
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+from benchmarks.import_time import HEAVY_MODULES, measure_import
+
+class TestImportTime(unittest.TestCase):
+
+    def test_modules_do_not_load_heavy_dependencies(self):
+        # Tests that importing the application modules defers every heavy SDK until first use
+        for module_name in ('config.settings', 'utils.common', 'text.text_processor', 'speech.speech_processor'):
+            result = measure_import(module_name)
+            self.assertEqual(result['heavy_modules'], [], f"{module_name} loaded {result['heavy_modules']}")
+
+    def test_heavy_module_list_is_checked(self):
+        # Checks that the benchmark actually detects a heavy import
+        result = measure_import('utils.audio_segments')
+        self.assertEqual(result['heavy_modules'], [])
+        result = measure_import('pydub')
+        self.assertIn('pydub', HEAVY_MODULES)
+        self.assertEqual(result['heavy_modules'], ['pydub'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import json
+import queue
+import logging
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from logging_config import JsonFormatter, SampleFilter, LazyQueueHandler, ModuleFileHandler, SAMPLED, log_file_name
+
+# This section imports necessary modules and functions for testing.
+
+def make_record(msg, *args, level=logging.INFO, name='text.text_processor', **extra):
+    # Builds a log record the way Logger.info would
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+class TestLoggingConfig(unittest.TestCase):
+    # This class defines a test case for the logging backend.
+
+    def test_log_file_name(self):
+        # Tests the per-module log file names
+        self.assertEqual(log_file_name('text.text_processor'), 'text.text_processor.log')
+        self.assertEqual(log_file_name('src.utils.common'), 'utils.common.log')
+        self.assertEqual(log_file_name('batch'), 'batch.log')
+        # Checks submodule and top-level module names
+
+    def test_json_formatter(self):
+        # Tests that records are formatted as JSON with their extra fields
+        entry = json.loads(JsonFormatter().format(make_record("Translated chunk %d in %.2fs", 3, 0.5, job='42', **SAMPLED)))
+        self.assertEqual(entry['message'], "Translated chunk 3 in 0.50s")
+        self.assertEqual((entry['level'], entry['logger'], entry['job']), ('INFO', 'text.text_processor', '42'))
+        self.assertNotIn('sampled', entry)
+        # Checks the lazily formatted message, the standard fields and the extra field
+
+    def test_sample_filter(self):
+        # Tests that sampled messages are kept once every N records while others always pass
+        sample_filter = SampleFilter(every=5)
+        kept = [sample_filter.filter(make_record("Translated chunk %d", i, **SAMPLED)) for i in range(12)]
+        self.assertEqual([i for i, keep in enumerate(kept) if keep], [0, 5, 10])
+        self.assertTrue(sample_filter.filter(make_record("Translated chunk %d", 1, level=logging.WARNING, **SAMPLED)))
+        self.assertTrue(all(sample_filter.filter(make_record("Reading file")) for _ in range(3)))
+        # Checks the kept records, that warnings pass and that unsampled messages are not filtered
+
+    def test_queue_handler_never_blocks_on_info(self):
+        # Tests that a full queue drops INFO records instead of blocking, and that records are not formatted by the caller
+        handler = LazyQueueHandler(queue.Queue(1))
+        handler.handle(make_record("first %s", "record"))
+        handler.handle(make_record("second"))
+        self.assertEqual(handler.dropped, 1)
+        record = handler.queue.get_nowait()
+        self.assertEqual((record.msg, record.args), ("first %s", ("record",)))
+        self.assertFalse(hasattr(record, 'message'))
+        # Checks the drop counter and that the queued record still holds its template and arguments
+
+    def test_module_file_handler(self):
+        # Tests that the listener-side handler writes each record to its module's log file
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        with patch('logging_config.LOG_DIR', temp_dir):
+            handler = ModuleFileHandler()
+            handler.handle(make_record("Chunk %d", 1, name='text.text_processor'))
+            handler.handle(make_record("Segment %d", 2, name='speech.speech_processor'))
+            handler.close()
+        with open(os.path.join(temp_dir, 'text.text_processor.log'), encoding='utf-8') as f:
+            self.assertIn("Chunk 1", f.read())
+        with open(os.path.join(temp_dir, 'speech.speech_processor.log'), encoding='utf-8') as f:
+            self.assertIn("Segment 2", f.read())
+        # Checks that both modules got their own file
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -0,0 +1,111 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import patch
+from src.utils.metrics import Histogram, MetricsRegistry, job_metrics, stage, inc, write_prometheus, start_metrics_server
+from src.utils.concurrency import imap_ordered
+from src.utils.throttling import ProviderLimiter
+from src.utils import metrics, throttling
+
+# This section imports necessary modules and functions for testing.
+
+class TestMetrics(unittest.TestCase):
+    # This class defines a test case for the metrics subsystem.
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        patcher = patch.object(metrics, 'METRICS_DIR', self.temp_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_histogram_quantiles(self):
+        # Tests quantile estimates interpolated within the buckets
+        histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+        for value in [0.5] * 90 + [3.0] * 10:
+            histogram.observe(value)
+        summary = histogram.to_dict()
+        self.assertEqual((summary['count'], summary['max']), (100, 3.0))
+        self.assertLessEqual(summary['p50'], 1.0)
+        self.assertGreater(summary['p95'], 2.0)
+        self.assertLessEqual(summary['p99'], 3.0)
+        self.assertEqual(Histogram().quantile(0.95), 0.0)
+        # Checks that p50 falls in the first bucket, p95 in the slow one, and no quantile exceeds the maximum
+
+    def test_prometheus_format(self):
+        # Tests the Prometheus text rendering of counters and histograms
+        metrics = MetricsRegistry()
+        metrics.inc('bytes_processed_total', 10, stage='read')
+        metrics.observe('api_request_seconds', 0.2, provider='tts', operation='Text-to-speech')
+        text = metrics.to_prometheus()
+        self.assertIn('# TYPE bytes_processed_total counter', text)
+        self.assertIn('bytes_processed_total{stage="read"} 10', text)
+        self.assertIn('api_request_seconds_bucket{operation="Text-to-speech",provider="tts",le="0.25"} 1', text)
+        self.assertIn('api_request_seconds_bucket{operation="Text-to-speech",provider="tts",le="+Inf"} 1', text)
+        self.assertIn('api_request_seconds_count{operation="Text-to-speech",provider="tts"} 1', text)
+        # Checks the type lines, labels and cumulative buckets
+
+    def test_job_metrics_collects_worker_threads(self):
+        # Tests that a job summary includes metrics recorded in imap_ordered worker threads
+        def work(item):
+            with stage('translate'):
+                inc('tokens_processed_total', item, stage='translate')
+            return item
+
+        with job_metrics('42', operation='translate_document') as summary:
+            list(imap_ordered(work, [1, 2, 3], max_in_flight=3))
+        inc('tokens_processed_total', 100, stage='translate')
+
+        with open(summary['path'], encoding='utf-8') as f:
+            data = json.load(f)
+        self.assertEqual((data['job'], data['operation']), ('42', 'translate_document'))
+        self.assertEqual(data['counters'], [{'name': 'tokens_processed_total', 'labels': {'stage': 'translate'}, 'value': 6}])
+        self.assertEqual(data['histograms'][0]['count'], 3)
+        # Checks the job fields, that only the job's own counts are included and that every stage was timed
+
+    def test_limiter_records_api_metrics(self):
+        # Tests that API calls are timed and counted by outcome
+        class ServiceUnavailable(Exception):
+            pass
+
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise ServiceUnavailable()
+            return "ok"
+
+        limiter = ProviderLimiter('fake-metrics', max_retries=2, backoff=0, max_backoff=0)
+        with patch.object(throttling, 'metrics', metrics), job_metrics('api') as summary:
+            self.assertEqual(limiter.call(flaky, tokens=5, description="Probe"), "ok")
+        with open(summary['path'], encoding='utf-8') as f:
+            data = json.load(f)
+        counters = {(c['name'], c['labels'].get('outcome')): c['value'] for c in data['counters']}
+        self.assertEqual(counters[('api_requests_total', 'ok')], 1)
+        self.assertEqual(counters[('api_requests_total', 'retried')], 1)
+        self.assertEqual(counters[('api_tokens_total', None)], 5)
+        self.assertEqual(data['histograms'][0]['count'], 2)
+        # Checks the outcome counters, the tokens and that both attempts were timed
+
+    def test_prometheus_export(self):
+        # Tests the Prometheus text file and the /metrics endpoint
+        inc('bytes_processed_total', 1, stage='export-test')
+        path = write_prometheus(os.path.join(self.temp_dir, 'metrics.prom'))
+        with open(path, encoding='utf-8') as f:
+            self.assertIn('stage="export-test"', f.read())
+        # Checks that the text file holds the process metrics
+
+        server = start_metrics_server(0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+            self.assertIn('stage="export-test"', response.read().decode('utf-8'))
+        # Checks that the endpoint serves the same metrics
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
@@ -0,0 +1,96 @@
+import os
+import json
+import struct
+import shutil
+import tempfile
+import unittest
+from src.utils.mp3 import Mp3StreamWriter, id3v2_size, iter_frames, parse_frame_header
+from src.utils.audio_probe import probe_mp3
+
+# This section imports necessary modules and functions for testing.
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding, stereo: 417-byte frames of 1152 samples
+FRAME_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+FRAME_LENGTH = 417
+
+def make_frame(fill=b'\x00', tag=None, main_data_begin=0):
+    # Builds one frame; the side information starts with main_data_begin and a tag ('Xing' or 'Info') follows it
+    body = bytearray(fill * (FRAME_LENGTH - 4))
+    body[:32] = bytes(32)
+    body[0:2] = bytes([main_data_begin >> 1, (main_data_begin & 0x01) << 7])
+    if tag:
+        body[32:36] = tag
+    return FRAME_HEADER + bytes(body)
+
+def make_chunk(frames, fill=b'\x01'):
+    # Builds an MP3 chunk the way TTS services return it: ID3 tag, Info frame, audio frames
+    id3 = b'ID3\x04\x00\x00\x00\x00\x00\x0a' + b'\x00' * 10
+    return id3 + make_frame(tag=b'Info') + b''.join(make_frame(fill) for _ in range(frames))
+
+class TestMp3(unittest.TestCase):
+    # This class defines a test case for the MP3 frame utilities.
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_parse_frame_header(self):
+        # Tests parsing of a known frame header
+        frame = parse_frame_header(FRAME_HEADER)
+        self.assertEqual(frame['bitrate'], 128000)
+        self.assertEqual(frame['sample_rate'], 44100)
+        self.assertEqual(frame['frame_length'], FRAME_LENGTH)
+        self.assertEqual(frame['samples'], 1152)
+        self.assertIsNone(parse_frame_header(b'\x00\x00\x00\x00'))
+        # Checks the decoded fields and that invalid bytes are rejected
+
+    def test_iter_frames_skips_tags(self):
+        # Tests that ID3 tags are skipped when iterating over frames
+        chunk = make_chunk(3)
+        self.assertEqual(id3v2_size(chunk), 20)
+        offsets = [offset for offset, _ in iter_frames(chunk)]
+        self.assertEqual(offsets, [20 + i * FRAME_LENGTH for i in range(4)])
+        # Checks that the frames start right after the ID3 tag
+
+    def test_stream_writer_copies_audio_frames_only(self):
+        # Tests that chunks are concatenated without their tags or Info frames, behind one Info frame for the whole file
+        output = os.path.join(self.temp_dir, 'book.mp3')
+        index = os.path.join(self.temp_dir, 'book.chapters.json')
+        with Mp3StreamWriter(output, index) as writer:
+            writer.append(make_chunk(2, b'\x01'), "Intro")
+            writer.append(make_chunk(3, b'\x02'))
+
+        with open(output, 'rb') as f:
+            data = f.read()
+        self.assertEqual(data[FRAME_LENGTH:], b''.join(make_frame(b'\x01') for _ in range(2)) + b''.join(make_frame(b'\x02') for _ in range(3)))
+        self.assertEqual(data[:4], FRAME_HEADER)
+        self.assertEqual(data[36:52], b'Info' + struct.pack('>III', 3, 5, len(data)))
+        with open(output, 'rb') as f:
+            self.assertAlmostEqual(probe_mp3(f, len(data)), 5 * 1152 / 44100)
+
+        with open(index, encoding='utf-8') as f:
+            chapters = json.load(f)['chapters']
+        self.assertEqual([c['title'] for c in chapters], ["Intro", "Part 2"])
+        self.assertAlmostEqual(chapters[1]['start'], 2 * 1152 / 44100, places=3)
+        self.assertAlmostEqual(writer.duration, 5 * 1152 / 44100)
+        # Checks the output bytes, the Info frame and its duration, the chapter titles and the chapter start times
+
+    def test_stream_writer_drops_frames_borrowing_from_other_chunks(self):
+        # Tests that frames at the start of a chunk whose bit reservoir points before the chunk are dropped
+        output = os.path.join(self.temp_dir, 'book.mp3')
+        cut_chunk = make_frame(b'\x03', main_data_begin=100) + make_frame(b'\x04') + make_frame(b'\x05', main_data_begin=300)
+        with Mp3StreamWriter(output) as writer:
+            writer.append(make_chunk(1, b'\x01'))
+            self.assertEqual(writer.append(cut_chunk), 2)
+
+        with open(output, 'rb') as f:
+            data = f.read()
+        self.assertEqual(data[FRAME_LENGTH:], make_frame(b'\x01') + make_frame(b'\x04') + make_frame(b'\x05', main_data_begin=300))
+        self.assertEqual(writer.total_frames, 3)
+        # Checks that the first frame of the cut chunk is dropped and the frames after it, which borrow from kept frames, are written
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
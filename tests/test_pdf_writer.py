@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+from PyPDF2 import PdfReader
+from src.utils.pdf_writer import PdfStreamWriter
+from src.utils.common import write_pdf
+
+# This section imports necessary modules and functions for testing.
+
+class TestPdfWriter(unittest.TestCase):
+    # This class defines a test case for the streaming PDF writer.
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.pdf_path = os.path.join(self.temp_dir, 'out.pdf')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_write_pdf_keeps_every_page(self):
+        # Tests that content longer than one page is written in full
+        lines = [f"Line number {i}" for i in range(200)]
+        write_pdf("\n".join(lines), self.pdf_path)
+
+        reader = PdfReader(self.pdf_path)
+        self.assertGreater(len(reader.pages), 1)
+        text = "\n".join(page.extract_text() for page in reader.pages)
+        self.assertIn("Line number 0", text)
+        self.assertIn("Line number 199", text)
+        # Checks that the first and last lines survive instead of being truncated to page one
+
+    def test_long_lines_are_wrapped(self):
+        # Tests that a line wider than the page is wrapped onto several lines
+        with PdfStreamWriter(self.pdf_path) as writer:
+            wrapped = writer.wrap("word " * 100)
+            writer.write("word " * 100)
+        self.assertGreater(len(wrapped), 1)
+        for line in wrapped:
+            self.assertLessEqual(writer._canvas.stringWidth(line, writer.font_name, writer.font_size), writer.max_width)
+        # Checks that every wrapped line fits the printable width
+
+    def test_incremental_writes(self):
+        # Tests that repeated writes continue on the same page and add pages as needed
+        with PdfStreamWriter(self.pdf_path) as writer:
+            for i in range(writer.lines_per_page + 1):
+                writer.write(f"Chunk {i}")
+        self.assertEqual(writer.pages, 2)
+        self.assertEqual(len(PdfReader(self.pdf_path).pages), 2)
+        # Checks that the page count matches the lines written
+
+if __name__ == '__main__':
+    unittest.main()
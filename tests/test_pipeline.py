@@ -0,0 +1,95 @@
+import unittest
+import random
+import threading
+import time
+from src.utils.pipeline import PipelineStage, run_pipeline
+
+# This section imports necessary modules and functions for testing.
+
+class TestPipeline(unittest.TestCase):
+    # This class defines a test case for the multi-stage pipeline.
+
+    def test_stages_preserve_order(self):
+        # Tests that items come out in input order through serial, parallel and splitting stages
+        def slow_double(x):
+            time.sleep(random.uniform(0, 0.01))
+            return [x * 2]
+
+        stages = [
+            PipelineStage('double', slow_double, workers=4),
+            PipelineStage('split', lambda x: [x, x + 1]),
+            PipelineStage('drop_odd', lambda x: [x] if x % 2 == 0 else []),
+        ]
+        self.assertEqual(list(run_pipeline(range(20), stages, queue_size=2)), [x * 2 for x in range(20)])
+        # Checks the order and that stages can split and drop items
+
+    def test_stages_overlap(self):
+        # Tests that the second stage starts on the first item before the first stage finishes the next one
+        second_started = threading.Event()
+        overlapped = []
+
+        def first(x):
+            if x == 1:
+                overlapped.append(second_started.wait(5))
+            return [x]
+
+        def second(x):
+            second_started.set()
+            return [x]
+
+        results = list(run_pipeline(range(3), [PipelineStage('first', first), PipelineStage('second', second)]))
+        self.assertEqual(results, [0, 1, 2])
+        self.assertEqual(overlapped, [True])
+        # Checks that item 0 reached the second stage while the first stage was still on item 1
+
+    def test_first_result_before_source_ends(self):
+        # Tests that the first result is yielded while the source is still producing
+        release = threading.Event()
+
+        def source():
+            yield 1
+            release.wait(2)
+            yield 2
+
+        results = run_pipeline(source(), [PipelineStage('identity', lambda x: [x])])
+        self.assertEqual(next(results), 1)
+        release.set()
+        self.assertEqual(list(results), [2])
+        # Checks that the first item did not wait for the rest of the source
+
+    def test_error_propagates(self):
+        # Tests that the error of a stage is raised by the consumer
+        def fail_on_three(x):
+            if x == 3:
+                raise ValueError("bad item")
+            return [x]
+
+        results = []
+        with self.assertRaises(ValueError):
+            for item in run_pipeline(range(10), [PipelineStage('check', fail_on_three, workers=2)]):
+                results.append(item)
+        self.assertEqual(results, [0, 1, 2])
+        # Checks that the items before the failed one were delivered
+
+    def test_early_close_stops_threads(self):
+        # Tests that closing the pipeline early stops the source and the stages
+        produced = []
+
+        def source():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        results = run_pipeline(source(), [PipelineStage('identity', lambda x: [x])], queue_size=1)
+        self.assertEqual(next(results), 0)
+        results.close()
+        threads = [thread for thread in threading.enumerate() if thread.name.startswith('pipeline-')]
+        for thread in threads:
+            thread.join(5)
+        self.assertFalse([thread for thread in threads if thread.is_alive()])
+        self.assertLess(len(produced), 20)
+        # Checks that the bounded queues kept the source from running ahead and that every thread exited
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
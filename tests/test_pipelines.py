@@ -0,0 +1,57 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+from benchmarks.fake_backends import FakeOpenAI, FakeApiError, make_mp3
+from benchmarks.pipelines import compare_results, main
+from src.utils.common import check_audio_duration
+
+class TestPipelines(unittest.TestCase):
+
+    def test_fake_backends(self):
+        # Tests that the fake OpenAI backend answers, fails at the configured rate and records its calls
+        backend = FakeOpenAI(latency=0, output_ratio=2.0)
+        response = backend.chat.completions.create(model='fake', messages=[{'role': 'user', 'content': "abc"}])
+        self.assertEqual(response.choices[0].message.content, "abcabc")
+        with self.assertRaises(FakeApiError):
+            FakeOpenAI(latency=0, error_rate=1.0).chat.completions.create(model='fake', messages=[{'role': 'user', 'content': "abc"}])
+        self.assertEqual(backend.stats(), {'calls': 1, 'failures': 0, 'bytes_in': 3, 'bytes_out': 6})
+        self.assertFalse(check_audio_duration(make_mp3(100)))
+        stream = FakeOpenAI(latency=0).chat.completions.create(model='fake', stream=True, messages=[{'role': 'user', 'content': "a b c"}])
+        self.assertEqual("".join(event.choices[0].delta.content or "" for event in stream), "a b c")
+        # Checks the completion, the failure, the recorded stats, that the fake audio is valid MP3 and the streamed answer
+
+    def test_run_writes_json_results(self):
+        # Runs the fast benchmarks at a small size against fake backends that fail now and then
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        output = os.path.join(temp_dir, 'results.json')
+        with redirect_stdout(StringIO()):
+            status = main(['--only', 'split_content', 'translate_large_text', 'save_large_audio', 'check_audio_duration',
+                           '--sizes', '1', '--repeat', '1', '--latency', '0', '--error-rate', '0.2', '--output', output])
+        self.assertEqual(status, 0)
+        with open(output, encoding='utf-8') as f:
+            results = json.load(f)['results']
+        self.assertEqual([result['name'] for result in results],
+                         ['split_content', 'translate_large_text', 'save_large_audio', 'check_audio_duration'])
+        self.assertGreater(results[1]['openai_calls'], 0)
+        self.assertEqual(results[3]['files'], 50)
+        # Checks that every benchmark ran, retried failed calls and reported its counts
+
+    def test_compare_results(self):
+        # Tests that only rates dropping by more than the tolerance are reported
+        baseline = [{'name': 'write_pdf', 'size': 1, 'chars_per_second': 100.0, 'bytes_per_second': 100.0}]
+        results = [{'name': 'write_pdf', 'size': 1, 'chars_per_second': 70.0, 'bytes_per_second': 90.0},
+                   {'name': 'write_pdf', 'size': 4, 'chars_per_second': 1.0}]
+        self.assertEqual(compare_results(results, baseline, 0.2),
+                         [{'name': 'write_pdf', 'size': 1, 'rate': 'chars_per_second', 'baseline': 100.0, 'current': 70.0}])
+
+if __name__ == '__main__':
+    unittest.main()
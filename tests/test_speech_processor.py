@@ -1,16 +1,39 @@
+import os
+import json
+import shutil
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
-from src.speech.speech_processor import process_audio, process_audio_file, transcribe_audio, transcribe_large_audio, text_to_speech, text_to_speech_large
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.speech.speech_processor import process_audio, process_audio_file, transcribe_audio, transcribe_large_audio, text_to_speech, text_to_speech_large, microphone_chunks, live_transcribe, save_large_audio
+from src.speech.speech_processor import text_to_speech_stream, iter_text_to_speech_large, iter_live_transcripts, iter_audio_transcripts, translate_speech_pipeline
+from src.speech.speech_processor import aprocess_audio, atranscribe_audio, atranscribe_large_audio, atext_to_speech_large
+from src.utils.cache import DiskCache
+from src.utils.checkpoint import CheckpointStore
+from src.utils.throttling import ProviderLimiter
+from src.speech import speech_processor
 
 # This section imports necessary modules and functions for testing.
 
+class ServiceUnavailable(Exception):
+    # Transient error, recognized by its class name like the one of the Google SDK
+    pass
+
 class TestSpeechProcessor(unittest.TestCase):
     # This class defines a test case for the speech processor functions.
 
-    @patch('speech.speech_processor.transcribe_large_audio')
-    @patch('speech.speech_processor.transcribe_audio')
-    @patch('speech.speech_processor.text_to_speech_large')
-    @patch('speech.speech_processor.text_to_speech')
+    def setUp(self):
+        # Bypasses the on-disk audio cache and checkpoints so every test reaches the mocked API
+        patcher = patch.object(speech_processor, 'get_tts_cache', return_value=DiskCache(':memory:', 0, enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(speech_processor, 'get_checkpoint_store', return_value=CheckpointStore(':memory:', enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.object(speech_processor, 'transcribe_large_audio')
+    @patch.object(speech_processor, 'transcribe_audio')
+    @patch.object(speech_processor, 'text_to_speech_large')
+    @patch.object(speech_processor, 'text_to_speech')
     def test_process_audio(self, mock_tts, mock_tts_large, mock_transcribe, mock_transcribe_large):
         # Tests the process_audio function for various scenarios
 
@@ -40,9 +63,9 @@ class TestSpeechProcessor(unittest.TestCase):
         self.assertEqual(result, [b'audio_content1', b'audio_content2'])
         mock_tts_large.assert_called_once()
 
-    @patch('speech.speech_processor.process_audio')
-    @patch('speech.speech_processor.write_file')
-    @patch('speech.speech_processor.save_audio')
+    @patch.object(speech_processor, 'process_audio')
+    @patch.object(speech_processor, 'write_file')
+    @patch.object(speech_processor, 'save_audio')
     def test_process_audio_file(self, mock_save_audio, mock_write_file, mock_process_audio):
         # Tests the process_audio_file function
         mock_process_audio.return_value = "Processed content"
@@ -58,9 +81,10 @@ class TestSpeechProcessor(unittest.TestCase):
         self.assertEqual(result, 'output.mp3')
         mock_save_audio.assert_called_once_with(b'audio_content', 'output')
 
-    @patch('speech.speech_processor.speech_client.recognize')
-    def test_transcribe_audio(self, mock_recognize):
+    @patch.object(speech_processor, 'get_speech_client')
+    def test_transcribe_audio(self, mock_get_client):
         # Tests the transcribe_audio function
+        mock_recognize = mock_get_client.return_value.recognize
         mock_response = MagicMock()
         mock_response.results = [MagicMock(alternatives=[MagicMock(transcript="Transcribed text")])]
         mock_recognize.return_value = mock_response
@@ -69,40 +93,351 @@ class TestSpeechProcessor(unittest.TestCase):
         self.assertEqual(result, "Transcribed text")
         mock_recognize.assert_called_once()
 
-    @patch('speech.speech_processor.speech_client.long_running_recognize')
-    def test_transcribe_large_audio(self, mock_long_recognize):
+    @patch.object(speech_processor, 'get_speech_client')
+    @patch.object(speech_processor, 'split_audio_on_silence')
+    def test_transcribe_large_audio(self, mock_split, mock_get_client):
         # Tests the transcribe_large_audio function
-        mock_operation = MagicMock()
-        mock_operation.result.return_value.results = [
-            MagicMock(alternatives=[MagicMock(transcript="Transcribed large text part 1")]),
-            MagicMock(alternatives=[MagicMock(transcript="Transcribed large text part 2")])
-        ]
-        mock_long_recognize.return_value = mock_operation
+        mock_recognize = mock_get_client.return_value.recognize
+        mock_split.return_value = iter([
+            {'start': 0.0, 'end': 50.0, 'content': b'part1'},
+            {'start': 50.0, 'end': 95.0, 'content': b'part2'},
+        ])
+        transcripts = {b'part1': "Transcribed large text part 1", b'part2': "Transcribed large text part 2"}
+        mock_recognize.side_effect = lambda config, audio: MagicMock(
+            results=[MagicMock(alternatives=[MagicMock(transcript=transcripts[audio.content])])]
+        )
 
         result = transcribe_large_audio(b'large_audio_content', 'en-US')
         self.assertEqual(result, "Transcribed large text part 1 Transcribed large text part 2")
-        mock_long_recognize.assert_called_once()
+        self.assertEqual(mock_recognize.call_count, 2)
+        # Segments are transcribed concurrently through the shared client and stitched back in order
+
+    @patch.object(speech_processor, 'get_speech_client')
+    @patch.object(speech_processor, 'split_audio_on_silence')
+    def test_transcribe_large_audio_with_timestamps(self, mock_split, mock_get_client):
+        # Tests that segment time ranges are included when requested
+        mock_recognize = mock_get_client.return_value.recognize
+        mock_split.return_value = iter([{'start': 0.0, 'end': 55.0, 'content': b'a'}, {'start': 55.0, 'end': 61.5, 'content': b'b'}])
+        mock_recognize.side_effect = lambda config, audio: MagicMock(
+            results=[MagicMock(alternatives=[MagicMock(transcript=audio.content.decode())])]
+        )
 
-    @patch('speech.speech_processor.tts_client.synthesize_speech')
-    def test_text_to_speech(self, mock_synthesize):
+        result = transcribe_large_audio('long.mp3', 'en-US', with_timestamps=True)
+        self.assertEqual(result, "[00:00:00 - 00:00:55] a\n[00:00:55 - 00:01:01] b")
+        # Checks the timestamp prefix of every segment
+
+    @patch.object(speech_processor, 'get_tts_client')
+    def test_text_to_speech(self, mock_get_client):
         # Tests the text_to_speech function
+        mock_synthesize = mock_get_client.return_value.synthesize_speech
         mock_synthesize.return_value = MagicMock(audio_content=b'synthesized_audio')
 
         result = text_to_speech("Test text", 'en-US', 'FEMALE')
         self.assertEqual(result, b'synthesized_audio')
         mock_synthesize.assert_called_once()
 
-    @patch('speech.speech_processor.text_to_speech')
-    @patch('speech.speech_processor.split_content')
+    @patch.object(speech_processor, 'get_tts_client')
+    def test_text_to_speech_uses_cache(self, mock_get_client):
+        # Tests that identical text, language and voice is synthesized only once
+        mock_synthesize = mock_get_client.return_value.synthesize_speech
+        mock_synthesize.return_value = MagicMock(audio_content=b'synthesized_audio')
+        with patch.object(speech_processor, 'get_tts_cache', return_value=DiskCache(':memory:', 1024)):
+            first = text_to_speech("Chapter one", 'en-US', 'FEMALE')
+            second = text_to_speech("Chapter one", 'en-US', 'FEMALE')
+            third = text_to_speech("Chapter one", 'en-US', 'MALE')
+        self.assertEqual(first, b'synthesized_audio')
+        self.assertEqual(second, b'synthesized_audio')
+        self.assertEqual(third, b'synthesized_audio')
+        self.assertEqual(mock_synthesize.call_count, 2)
+        # Checks that the repeated request was served from the cache and the other voice was not
+
+    @patch.object(speech_processor, 'text_to_speech')
+    def test_text_to_speech_stream(self, mock_tts):
+        # Tests that sentences are synthesized one by one as they arrive
+        mock_tts.side_effect = lambda text, language_code, voice_gender: text.encode('utf-8')
+        audio = text_to_speech_stream(iter(["Hola.", "", "Adiós."]), 'es-ES', 'FEMALE')
+        self.assertEqual(next(audio), ("Hola.", b"Hola."))
+        self.assertEqual(mock_tts.call_count, 1)
+        self.assertEqual(list(audio), [("Adiós.", "Adiós.".encode('utf-8'))])
+
+        mock_tts.side_effect = None
+        mock_tts.return_value = None
+        with self.assertRaises(ValueError):
+            list(text_to_speech_stream(["Hola."], 'es-ES', 'FEMALE'))
+        # Checks the lazy synthesis, that empty sentences are skipped and that a failed sentence raises
+
+    @patch.object(speech_processor, 'text_to_speech')
+    @patch.object(speech_processor, 'chunk_text')
     def test_text_to_speech_large(self, mock_split, mock_tts):
         # Tests the text_to_speech_large function
-        mock_split.return_value = ["Chunk1", "Chunk2"]
-        mock_tts.side_effect = [b'audio1', b'audio2']
+        mock_split.return_value = [{'text': "Chunk1", 'separator': " "}, {'text': "Chunk2", 'separator': ""}]
+        mock_tts.side_effect = lambda chunk, language_code, voice_gender: {"Chunk1": b'audio1', "Chunk2": b'audio2'}[chunk]
 
         result = text_to_speech_large("Large text", 'en-US', 'FEMALE')
         self.assertEqual(result, [b'audio1', b'audio2'])
         self.assertEqual(mock_tts.call_count, 2)
-        mock_split.assert_called_once_with("Large text", 5000)
+        mock_split.assert_called_once_with("Large text", 3500, max_bytes=5000)
+
+    @patch.object(speech_processor, 'get_tts_client')
+    @patch.object(speech_processor, 'chunk_text')
+    def test_text_to_speech_large_retries_failed_chunk(self, mock_split, mock_get_client):
+        # Tests that a chunk failing with a transient error is retried on its own by the limiter, and only by it
+        mock_split.return_value = [{'text': text, 'separator': " "} for text in ("Chunk1", "Chunk2", "Chunk3")]
+        attempts = {}
+
+        def synthesize(input, voice, audio_config):
+            attempts[input.text] = attempts.get(input.text, 0) + 1
+            if input.text == "Chunk2" and attempts[input.text] == 1:
+                raise ServiceUnavailable("unavailable")
+            if input.text == "Chunk3":
+                raise ValueError("invalid input")
+            return MagicMock(audio_content=input.text.encode())
+
+        mock_get_client.return_value.synthesize_speech.side_effect = synthesize
+        with patch.object(speech_processor, 'get_tts_limiter', return_value=ProviderLimiter('tts', backoff=0, max_backoff=0)):
+            self.assertIsNone(text_to_speech_large("Large text", 'en-US', 'FEMALE', max_in_flight=3))
+        self.assertEqual(attempts, {"Chunk1": 1, "Chunk2": 2, "Chunk3": 1})
+        # Checks that the transient error was retried once and the permanent one not at all
+
+    @patch.object(speech_processor, 'text_to_speech')
+    @patch.object(speech_processor, 'chunk_text')
+    def test_text_to_speech_large_resumes_from_checkpoint(self, mock_split, mock_tts):
+        # Tests that a re-run after a failed chunk only synthesizes the chunks that were missing
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        store = CheckpointStore(os.path.join(temp_dir, 'checkpoints.sqlite3'))
+        mock_split.return_value = [{'text': text, 'separator': " "} for text in ("Chunk1", "Chunk2", "Chunk3")]
+        calls = []
+
+        def flaky_tts(chunk, language_code, voice_gender):
+            calls.append(chunk)
+            return None if chunk == "Chunk2" and calls.count(chunk) == 1 else chunk.encode()
+
+        mock_tts.side_effect = flaky_tts
+        with patch.object(speech_processor, 'get_checkpoint_store', return_value=store):
+            self.assertIsNone(text_to_speech_large("Large text", 'en-US', 'FEMALE'))
+            result = text_to_speech_large("Large text", 'en-US', 'FEMALE')
+        self.assertEqual(result, [b'Chunk1', b'Chunk2', b'Chunk3'])
+        self.assertEqual(sorted(calls), ["Chunk1", "Chunk2", "Chunk2", "Chunk3"])
+        # Checks that only the failed chunk was synthesized again and the order is preserved
+
+    @patch.object(speech_processor, 'text_to_speech')
+    @patch.object(speech_processor, 'chunk_text')
+    def test_iter_text_to_speech_large_streams_segments(self, mock_split, mock_tts):
+        # Tests that the generator variant yields segments lazily and raises on a failed chunk
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        store = CheckpointStore(os.path.join(temp_dir, 'checkpoints.sqlite3'))
+        mock_split.return_value = [{'text': text, 'separator': " "} for text in ("Chunk1", "Chunk2", "Chunk3")]
+        calls = []
+
+        def flaky_tts(chunk, language_code, voice_gender):
+            calls.append(chunk)
+            return None if chunk == "Chunk3" and calls.count(chunk) == 1 else chunk.encode()
+
+        mock_tts.side_effect = flaky_tts
+        with patch.object(speech_processor, 'get_checkpoint_store', return_value=store):
+            segments = iter_text_to_speech_large("Large text", 'en-US', 'FEMALE', max_in_flight=1)
+            self.assertEqual(calls, [])
+            self.assertEqual(next(segments), b'Chunk1')
+            with self.assertRaises(ValueError):
+                list(segments)
+            result = list(iter_text_to_speech_large("Large text", 'en-US', 'FEMALE'))
+        self.assertEqual(result, [b'Chunk1', b'Chunk2', b'Chunk3'])
+        self.assertEqual(sorted(calls), ["Chunk1", "Chunk2", "Chunk3", "Chunk3"])
+        # Checks the lazy start, the error on the failed chunk and that the re-run resumed from the checkpoint
+
+    def test_save_large_audio_discards_partial_output(self):
+        # Tests that a failure while the chunks are produced leaves no truncated MP3 behind
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        frame = b'\xff\xfb\x90\x64' + b'\x00' * 413
+
+        def failing_chunks():
+            yield frame
+            raise RuntimeError("synthesis failed")
+
+        with patch.object(speech_processor, 'AUDIO_OUTPUT_DIR', temp_dir):
+            self.assertIsNone(save_large_audio(failing_chunks(), 'book', use_unique_name=False, write_chapter_index=True))
+            self.assertEqual(os.listdir(temp_dir), [])
+            path = save_large_audio(iter([frame, frame]), 'book', use_unique_name=False, write_chapter_index=True)
+        self.assertEqual(path, os.path.join(temp_dir, 'book.mp3'))
+        self.assertEqual(sorted(os.listdir(temp_dir)), ['book.chapters.json', 'book.mp3'])
+        self.assertEqual(os.path.getsize(path), 3 * len(frame))
+        with open(os.path.join(temp_dir, 'book.chapters.json'), encoding='utf-8') as index_file:
+            self.assertEqual(json.load(index_file)['file'], 'book.mp3')
+        # Checks that the failed run left no file and that a complete run moves the MP3 into place under its final name
+
+    def test_live_transcribe(self):
+        # Tests live transcription with a fake audio source and a fake streaming client
+        consumed = []
+
+        def fake_source():
+            for chunk in [b'chunk1', b'chunk2', b'chunk3']:
+                consumed.append(chunk)
+                yield chunk
+
+        hypotheses = [("hello", False), ("hello wor", False), ("hello world", True)]
+
+        class FakeStreamingClient:
+            def streaming_recognize(self, config, requests):
+                for request, (text, is_final) in zip(requests, hypotheses):
+                    alternative = MagicMock(transcript=text)
+                    yield MagicMock(results=[MagicMock(alternatives=[alternative], is_final=is_final, stability=0.9)])
+
+        updates = []
+        result = live_transcribe('en-US', audio_chunks=fake_source(), client=FakeStreamingClient(),
+                                 on_update=lambda text, is_final: updates.append((text, is_final, len(consumed))))
+        self.assertEqual(result, "hello world")
+        self.assertEqual(updates, [("hello", False, 1), ("hello wor", False, 2), ("hello world", True, 3)])
+        # Each hypothesis is reported as soon as its audio chunk has been sent, not after the whole recording
+
+    @patch.object(speech_processor, 'text_to_speech')
+    @patch.object(speech_processor, 'translate_text_chunk_stream')
+    def test_translate_speech_pipeline(self, mock_translate_stream, mock_tts):
+        # Tests that transcripts are translated sentence by sentence and synthesized in order
+        mock_translate_stream.side_effect = lambda text, source_lang, target_lang: iter([text.upper(), ". ", "Fin."])
+        mock_tts.side_effect = lambda text, language_code, voice_gender: text.encode('utf-8')
+        results = list(translate_speech_pipeline(iter(["uno", "dos"]), 'es', 'en', 'en-US', 'FEMALE'))
+        self.assertEqual(results, [("UNO.", b"UNO."), ("Fin.", b"Fin."), ("DOS.", b"DOS."), ("Fin.", b"Fin.")])
+
+        mock_tts.side_effect = None
+        mock_tts.return_value = None
+        with self.assertRaises(ValueError):
+            list(translate_speech_pipeline(["uno"], 'es', 'en', 'en-US', 'FEMALE'))
+        # Checks the sentence order across transcripts and that a failed synthesis raises
+
+    @patch.object(speech_processor, 'text_to_speech')
+    @patch.object(speech_processor, 'translate_text_chunk')
+    def test_translate_speech_pipeline_by_segment(self, mock_translate, mock_tts):
+        # Tests that whole transcripts are translated concurrently and synthesized in order
+        mock_translate.side_effect = lambda text, source_lang, target_lang: f"[{text}]"
+        mock_tts.side_effect = lambda text, language_code, voice_gender: text.encode('utf-8')
+        transcripts = [f"segment {i}" for i in range(6)]
+        results = list(translate_speech_pipeline(transcripts, 'es', 'en', 'en-US', 'MALE', by_sentence=False))
+        self.assertEqual([audio for _, audio in results], [f"[segment {i}]".encode('utf-8') for i in range(6)])
+
+        mock_translate.side_effect = None
+        mock_translate.return_value = None
+        with self.assertRaises(ValueError):
+            list(translate_speech_pipeline(transcripts, 'es', 'en', 'en-US', 'MALE', by_sentence=False))
+        # Checks the order of the audio and that a failed translation raises
+
+    @patch.object(speech_processor, 'split_audio_on_silence')
+    @patch.object(speech_processor, 'transcribe_segment')
+    @patch.object(speech_processor, 'check_audio_duration')
+    def test_iter_audio_transcripts(self, mock_duration, mock_transcribe_segment, mock_split):
+        # Tests that long audio is transcribed segment by segment, in order, skipping silent segments
+        mock_duration.return_value = True
+        mock_split.return_value = [{'start': i, 'end': i + 1, 'content': f"seg{i}".encode()} for i in range(3)]
+        mock_transcribe_segment.side_effect = lambda content, language_code: "" if content == b"seg1" else content.decode()
+        self.assertEqual(list(iter_audio_transcripts(b"audio", 'en-US')), ["seg0", "seg2"])
+        # Checks the transcripts yielded for the segments
+
+    def test_iter_live_transcripts(self):
+        # Tests that final live results are yielded one by one as they are recognized
+        hypotheses = [("hola", False), ("hola", True), ("adiós", True)]
+
+        class FakeStreamingClient:
+            def streaming_recognize(self, config, requests):
+                for request, (text, is_final) in zip(requests, hypotheses):
+                    alternative = MagicMock(transcript=text)
+                    yield MagicMock(results=[MagicMock(alternatives=[alternative], is_final=is_final, stability=0.9)])
+
+        transcripts = iter_live_transcripts('es-ES', audio_chunks=iter([b'a', b'b', b'c']), client=FakeStreamingClient())
+        self.assertEqual(list(transcripts), ["hola", "adiós"])
+        # Checks that only final results are yielded
+
+    @patch.dict('sys.modules', {'pyaudio': MagicMock()})
+    def test_microphone_chunks(self):
+        # Tests that microphone chunks are yielded one by one and the stream is released
+        audio_interface = MagicMock()
+        stream = audio_interface.open.return_value
+        stream.read.side_effect = [b'a', b'b', b'c']
+        chunks = list(microphone_chunks(duration=3, sample_rate=1024, chunk_size=1024, audio_interface=audio_interface))
+        self.assertEqual(chunks, [b'a', b'b', b'c'])
+        stream.close.assert_called_once()
+        audio_interface.terminate.assert_called_once()
+        # Checks the captured chunks and the cleanup of the PyAudio stream
+
+class TestSpeechProcessorAsync(unittest.IsolatedAsyncioTestCase):
+    # This class defines a test case for the asyncio counterparts of the speech processor functions.
+
+    def setUp(self):
+        # Bypasses the on-disk audio cache and checkpoints so every test reaches the mocked API
+        patcher = patch.object(speech_processor, 'get_tts_cache', return_value=DiskCache(':memory:', 0, enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(speech_processor, 'get_checkpoint_store', return_value=CheckpointStore(':memory:', enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def recognition(transcript):
+        return MagicMock(results=[MagicMock(alternatives=[MagicMock(transcript=transcript)])])
+
+    @patch.object(speech_processor, 'get_async_speech_client')
+    async def test_atranscribe_audio(self, mock_get_client):
+        # Tests the atranscribe_audio function
+        mock_recognize = AsyncMock(return_value=self.recognition("Transcribed text"))
+        mock_get_client.return_value.recognize = mock_recognize
+
+        result = await atranscribe_audio(b'audio_content', 'en-US')
+        self.assertEqual(result, "Transcribed text")
+        mock_recognize.assert_awaited_once()
+
+    @patch.object(speech_processor, 'get_speech_client')
+    @patch.object(speech_processor, 'get_async_speech_client')
+    @patch.object(speech_processor, 'split_audio_on_silence')
+    async def test_atranscribe_large_audio_matches_sync(self, mock_split, mock_get_async_client, mock_get_client):
+        # Tests that the async segmented transcription returns the same text as the sync one
+        segments = [{'start': 0.0, 'end': 55.0, 'content': b'a'}, {'start': 55.0, 'end': 61.5, 'content': b'b'}]
+        mock_split.side_effect = lambda *args: iter(segments)
+        mock_get_client.return_value.recognize.side_effect = lambda config, audio: self.recognition(audio.content.decode())
+        mock_get_async_client.return_value.recognize = AsyncMock(
+            side_effect=lambda config, audio: self.recognition(audio.content.decode())
+        )
+
+        expected = transcribe_large_audio('long.mp3', 'en-US', with_timestamps=True)
+        result = await atranscribe_large_audio('long.mp3', 'en-US', with_timestamps=True)
+        self.assertEqual(result, expected)
+        self.assertEqual(result, "[00:00:00 - 00:00:55] a\n[00:00:55 - 00:01:01] b")
+        # Checks the stitched transcript and the timestamp prefix of every segment
+
+    @patch.object(speech_processor, 'get_async_tts_client')
+    @patch.object(speech_processor, 'chunk_text')
+    async def test_atext_to_speech_large_retries_failed_chunk(self, mock_split, mock_get_client):
+        # Tests that chunks are synthesized in order and a chunk which fails once is retried on its own
+        mock_split.return_value = [{'text': text, 'separator': " "} for text in ("Chunk1", "Chunk2", "Chunk3")]
+        attempts = {}
+
+        def synthesize(input, voice, audio_config):
+            attempts[input.text] = attempts.get(input.text, 0) + 1
+            if input.text == "Chunk2" and attempts[input.text] == 1:
+                raise ServiceUnavailable("unavailable")
+            return MagicMock(audio_content=input.text.encode())
+
+        mock_get_client.return_value.synthesize_speech = AsyncMock(side_effect=synthesize)
+        with patch.object(speech_processor, 'get_tts_limiter', return_value=ProviderLimiter('tts', backoff=0, max_backoff=0)):
+            result = await atext_to_speech_large("Large text", 'en-US', 'FEMALE')
+        self.assertEqual(result, [b'Chunk1', b'Chunk2', b'Chunk3'])
+        self.assertEqual(attempts, {"Chunk1": 1, "Chunk2": 2, "Chunk3": 1})
+        # Checks that only the failed chunk was synthesized again and the order is preserved
+
+    @patch.object(speech_processor, 'aprocess_text', new_callable=AsyncMock)
+    @patch.object(speech_processor, 'atranscribe_audio', new_callable=AsyncMock)
+    @patch.object(speech_processor, 'check_audio_duration', return_value=False)
+    async def test_aprocess_audio_translate(self, mock_duration, mock_transcribe, mock_process_text):
+        # Tests that translation transcribes the audio and translates the transcript
+        mock_transcribe.return_value = "Hello"
+        mock_process_text.return_value = "Hola"
+
+        result = await aprocess_audio('input.mp3', 'translate', source_lang='en-US', target_lang='es-ES')
+        self.assertEqual(result, "Hola")
+        mock_transcribe.assert_awaited_once_with('input.mp3', 'en-US')
+        mock_process_text.assert_awaited_once_with("Hello", 'translate', source_lang='en-US', target_lang='es-ES')
+        self.assertIsNone(await aprocess_audio('input.mp3', 'unknown'))
+        # Checks the translated result and that unsupported operations return None
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,15 +1,33 @@
+import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock, ANY
 from src.text.text_processor import translate_text_chunk, translate_large_text, translate_text, analyze_sentiment, summarize_text, process_text, process_file
+from src.text.text_processor import batch_translate_files
+from src.text.text_processor import translate_text_chunk_stream, summarize_text_stream, process_text_stream
+from src.text.text_processor import atranslate_large_text, atranslate_chunks, aprocess_text
+from src.utils.cache import DiskCache
+from src.utils.checkpoint import CheckpointStore
+from src.text import text_processor
 
 # This line imports the unittest module and necessary functions from unittest.mock and the module being tested.
 
 class TestTextProcessor(unittest.TestCase):
     # This class defines a test case for the text_processor module. It inherits from unittest.TestCase.
 
-    @patch('text.text_processor.translate_text')
-    @patch('text.text_processor.analyze_sentiment')
-    @patch('text.text_processor.summarize_text')
+    def setUp(self):
+        # Bypasses the on-disk translation cache and checkpoints so every test reaches the mocked API
+        patcher = patch.object(text_processor, 'get_translation_cache', return_value=DiskCache(':memory:', 0, enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(text_processor, 'get_checkpoint_store', return_value=CheckpointStore(':memory:', enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.object(text_processor, 'translate_text')
+    @patch.object(text_processor, 'analyze_sentiment')
+    @patch.object(text_processor, 'summarize_text')
     def test_process_text(self, mock_summarize, mock_analyze, mock_translate):
         # This test method checks the process_text function with different operations.
         # It uses patch decorators to mock the translate_text, analyze_sentiment, and summarize_text functions.
@@ -34,9 +52,9 @@ class TestTextProcessor(unittest.TestCase):
         self.assertIsNone(result)
         # Tests process_text with an invalid operation and asserts that it returns None.
 
-    @patch('text.text_processor.read_file')
-    @patch('text.text_processor.process_text')
-    @patch('text.text_processor.write_file')
+    @patch.object(text_processor, 'read_file')
+    @patch.object(text_processor, 'process_text')
+    @patch.object(text_processor, 'write_file')
     def test_process_file(self, mock_write, mock_process, mock_read):
         # This test method checks the process_file function.
         # It mocks read_file, process_text, and write_file functions.
@@ -60,10 +78,46 @@ class TestTextProcessor(unittest.TestCase):
         self.assertIsNone(result)
         # Tests the case where processing fails (returns None) and asserts that the result is None.
 
-    @patch('text.text_processor.openai_client.chat.completions.create')
-    def test_translate_text_chunk(self, mock_create):
+    @patch.object(text_processor, 'read_file')
+    @patch.object(text_processor, 'translate_text_chunk')
+    def test_process_file_streams_pdf(self, mock_translate_chunk, mock_read):
+        # Tests that PDF translation consumes the pages as a stream and writes the translation as it arrives
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        output_file = os.path.join(temp_dir, "output.txt")
+        mock_read.return_value = iter(["Page one. ", "Page two."])
+        mock_translate_chunk.side_effect = lambda chunk, *args: chunk.upper()
+
+        result = process_file("input.pdf", output_file, 'translate', source_lang='en', target_lang='es')
+
+        mock_read.assert_called_once_with("input.pdf", stream=True)
+        self.assertEqual(result, output_file)
+        with open(output_file, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "PAGE ONE. PAGE TWO.")
+        self.assertEqual(os.listdir(temp_dir), ["output.txt"])
+        # Checks that the streamed pages were chunked, translated and written in order, with no partial file left
+
+    @patch.object(text_processor, 'read_file')
+    @patch.object(text_processor, 'translate_text_chunk')
+    def test_process_file_stream_failure_leaves_no_output(self, mock_translate_chunk, mock_read):
+        # Tests that a failed chunk aborts a streamed translation without leaving a truncated output
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        output_file = os.path.join(temp_dir, "output.txt")
+        mock_read.return_value = iter(["Page one. ", "Page two."])
+        mock_translate_chunk.return_value = None
+
+        result = process_file("input.pdf", output_file, 'translate', source_lang='en', target_lang='es')
+
+        self.assertIsNone(result)
+        self.assertEqual(os.listdir(temp_dir), [])
+        # Checks that neither the output nor its partial file exists
+
+    @patch.object(text_processor, 'get_openai_client')
+    def test_translate_text_chunk(self, mock_get_client):
         # This test method checks the translate_text_chunk function.
         # It mocks the OpenAI API call.
+        mock_create = mock_get_client.return_value.chat.completions.create
 
         mock_create.return_value.choices[0].message.content = "Translated text"
         # Sets up the mock to return a specific translation.
@@ -75,33 +129,99 @@ class TestTextProcessor(unittest.TestCase):
         mock_create.assert_called_once()
         # Asserts that the mocked API was called once.
 
-    @patch('text.text_processor.translate_text_chunk')
-    @patch('text.text_processor.split_content')
-    def test_translate_large_text(self, mock_split, mock_translate_chunk):
+    @patch.object(text_processor, 'translation_chunk_tokens', return_value=3000)
+    @patch.object(text_processor, 'translate_text_chunk')
+    @patch.object(text_processor, 'chunk_text')
+    def test_translate_large_text(self, mock_split, mock_translate_chunk, mock_budget):
         # This test method checks the translate_large_text function.
-        # It mocks split_content and translate_text_chunk functions.
+        # It mocks chunk_text and translate_text_chunk functions.
 
-        mock_split.return_value = ["Chunk1", "Chunk2"]
-        mock_translate_chunk.side_effect = ["Translated1", "Translated2"]
-        # Sets up the mocks to return specific values.
+        mock_split.return_value = [{'text': "Chunk1", 'separator': " "}, {'text': "Chunk2", 'separator': ""}]
+        mock_translate_chunk.side_effect = lambda chunk, source, target: chunk.replace("Chunk", "Translated")
+        # Sets up the mocks to return specific values. Chunks are translated concurrently, so the
+        # translation is derived from the chunk instead of the call order.
 
         result = translate_large_text("Large text", "en", "es")
         self.assertEqual(result, "Translated1 Translated2")
         # Calls translate_large_text and asserts that it returns the expected combined translation.
 
-        mock_split.assert_called_once_with("Large text", 4000)
+        mock_split.assert_called_once_with("Large text", None, max_tokens=3000, count_tokens=ANY)
         self.assertEqual(mock_translate_chunk.call_count, 2)
-        # Asserts that split_content was called once and translate_text_chunk was called twice.
-
-    @patch('text.text_processor.check_text_size')
-    @patch('text.text_processor.translate_large_text')
-    @patch('text.text_processor.translate_text_chunk')
-    def test_translate_text(self, mock_chunk, mock_large, mock_check_size):
+        # Asserts that chunk_text was called once and translate_text_chunk was called twice.
+
+        mock_split.return_value = [{'text': "Chunk1", 'separator': "\n\n"}, {'text': "Chunk2", 'separator': ""}]
+        self.assertEqual(translate_large_text("Large text", "en", "es"), "Translated1\n\nTranslated2")
+        # Checks that paragraph breaks between chunks are kept in the translation
+
+    @patch.object(text_processor, 'translation_chunk_tokens', return_value=3000)
+    @patch.object(text_processor, 'translate_text_chunk')
+    @patch.object(text_processor, 'chunk_text')
+    def test_translate_large_text_resumes_from_checkpoint(self, mock_split, mock_translate_chunk, mock_budget):
+        # Tests that a re-run after a failed chunk only translates the chunks that were missing
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        store = CheckpointStore(os.path.join(temp_dir, 'checkpoints.sqlite3'))
+        mock_split.return_value = [{'text': f"Chunk{i}", 'separator': " "} for i in range(1, 4)]
+        calls = []
+
+        def translate(chunk, source, target):
+            calls.append(chunk)
+            return None if chunk == "Chunk3" and calls.count(chunk) == 1 else chunk.replace("Chunk", "Translated")
+
+        mock_translate_chunk.side_effect = translate
+        with patch.object(text_processor, 'get_checkpoint_store', return_value=store):
+            self.assertIsNone(translate_large_text("Large text", "en", "es"))
+            result = translate_large_text("Large text", "en", "es")
+        self.assertEqual(result, "Translated1 Translated2 Translated3")
+        self.assertEqual(sorted(calls), ["Chunk1", "Chunk2", "Chunk3", "Chunk3"])
+        # Checks that only the failed chunk was translated again and the result is complete
+
+    @patch.object(text_processor, 'process_file')
+    def test_batch_translate_files(self, mock_process_file):
+        # Tests recursive discovery, atomic outputs, throughput reporting and skipping completed files on a re-run
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        input_dir, output_dir = os.path.join(temp_dir, 'in'), os.path.join(temp_dir, 'out')
+        os.makedirs(os.path.join(input_dir, 'nested'))
+        for name in ('a.txt', 'b.txt', os.path.join('nested', 'c.pdf'), 'notes.md'):
+            with open(os.path.join(input_dir, name), 'w', encoding='utf-8') as f:
+                f.write(f"Contents of {name}")
+        written = []
+
+        def process_file(input_file, output_file, operation, **kwargs):
+            if input_file.endswith('b.txt') and not any(path.endswith('b.txt') for path in written):
+                written.append(input_file)
+                return None
+            written.append(input_file)
+            self.assertTrue(os.path.basename(output_file).startswith('.'))
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write("translated")
+            return output_file
+
+        mock_process_file.side_effect = process_file
+        store = CheckpointStore(os.path.join(temp_dir, 'checkpoints.sqlite3'))
+        with patch.object(text_processor, 'get_checkpoint_store', return_value=store):
+            first = batch_translate_files(input_dir, output_dir, 'en', 'es', workers=2)
+            second = batch_translate_files(input_dir, output_dir, 'en', 'es', workers=2)
+
+        self.assertEqual((first['files'], first['translated'], first['failed']), (3, 2, 1))
+        self.assertEqual((second['translated'], second['skipped']), (1, 2))
+        self.assertIn('files_per_second', first)
+        self.assertTrue(os.path.exists(os.path.join(output_dir, 'nested', 'translated_c.pdf')))
+        self.assertEqual(sorted(os.listdir(output_dir)), ['nested', 'translated_a.txt', 'translated_b.txt'])
+        self.assertEqual(sorted(os.path.basename(path) for path in written), ['a.txt', 'b.txt', 'b.txt', 'c.pdf'])
+        # Checks the counts of both runs, the mirrored output tree without partial files, and that only the failed file was retried
+
+    @patch.object(text_processor, 'translation_chunk_tokens', return_value=3000)
+    @patch.object(text_processor, 'count_tokens')
+    @patch.object(text_processor, 'translate_large_text')
+    @patch.object(text_processor, 'translate_text_chunk')
+    def test_translate_text(self, mock_chunk, mock_large, mock_count_tokens, mock_budget):
         # This test method checks the translate_text function.
-        # It tests both small and large text scenarios.
+        # It tests both small and large text scenarios against the request token budget.
 
         # Test small text
-        mock_check_size.return_value = False
+        mock_count_tokens.return_value = 3000
         mock_chunk.return_value = "Translated small"
 
         result = translate_text("Small text", "en", "es")
@@ -111,7 +231,7 @@ class TestTextProcessor(unittest.TestCase):
         # Tests small text scenario and asserts that only translate_text_chunk was called.
 
         # Test large text
-        mock_check_size.return_value = True
+        mock_count_tokens.return_value = 3001
         mock_large.return_value = "Translated large"
 
         result = translate_text("Large text", "en", "es")
@@ -119,10 +239,11 @@ class TestTextProcessor(unittest.TestCase):
         mock_large.assert_called_once()
         # Tests large text scenario and asserts that translate_large_text was called.
 
-    @patch('text.text_processor.openai_client.chat.completions.create')
-    def test_analyze_sentiment(self, mock_create):
+    @patch.object(text_processor, 'get_openai_client')
+    def test_analyze_sentiment(self, mock_get_client):
         # This test method checks the analyze_sentiment function.
         # It mocks the OpenAI API call.
+        mock_create = mock_get_client.return_value.chat.completions.create
 
         mock_create.return_value.choices[0].message.content = "Positive"
 
@@ -132,10 +253,11 @@ class TestTextProcessor(unittest.TestCase):
         mock_create.assert_called_once()
         # Calls analyze_sentiment and asserts that it returns the expected sentiment and that the API was called once.
 
-    @patch('text.text_processor.openai_client.chat.completions.create')
-    def test_summarize_text(self, mock_create):
+    @patch.object(text_processor, 'get_openai_client')
+    def test_summarize_text(self, mock_get_client):
         # This test method checks the summarize_text function.
         # It mocks the OpenAI API call.
+        mock_create = mock_get_client.return_value.chat.completions.create
 
         mock_create.return_value.choices[0].message.content = "Summary"
 
@@ -145,6 +267,123 @@ class TestTextProcessor(unittest.TestCase):
         mock_create.assert_called_once()
         # Calls summarize_text and asserts that it returns the expected summary and that the API was called once.
 
+    @staticmethod
+    def stream_events(*pieces, finish_reason='stop'):
+        # Builds the chunks of a streamed chat completion, ending with an empty delta and the finish reason
+        events = [MagicMock(choices=[MagicMock(delta=MagicMock(content=piece), finish_reason=None)]) for piece in pieces]
+        events.append(MagicMock(choices=[MagicMock(delta=MagicMock(content=None), finish_reason=finish_reason)]))
+        return iter(events)
+
+    @patch.object(text_processor, 'get_openai_client')
+    def test_translate_text_chunk_stream(self, mock_get_client):
+        # Tests that the translation is yielded token by token and cached once complete
+        mock_create = mock_get_client.return_value.chat.completions.create
+        mock_create.return_value = self.stream_events(" Hola", " mundo", ".")
+        cache = DiskCache(':memory:', 1024)
+        with patch.object(text_processor, 'get_translation_cache', return_value=cache):
+            pieces = list(translate_text_chunk_stream("Hello world.", "en", "es"))
+            cached = list(translate_text_chunk_stream("Hello world.", "en", "es"))
+        self.assertEqual(pieces, ["Hola", " mundo", "."])
+        self.assertEqual(cached, ["Hola mundo."])
+        self.assertTrue(mock_create.call_args.kwargs['stream'])
+        mock_create.assert_called_once()
+        # Checks the streamed pieces without leading whitespace, the streaming request and the cached second call
+
+    @patch.object(text_processor, 'get_openai_client')
+    def test_summarize_text_stream(self, mock_get_client):
+        # Tests the streamed summary and that a failed request is raised to the caller
+        mock_create = mock_get_client.return_value.chat.completions.create
+        mock_create.return_value = self.stream_events("Short", " summary")
+        self.assertEqual("".join(process_text_stream("Long text", 'summarize', max_words=10)), "Short summary")
+        self.assertIn("10 words", mock_create.call_args.kwargs['messages'][0]['content'])
+
+        error = ValueError("bad request")
+        mock_create.side_effect = error
+        with self.assertRaises(ValueError):
+            list(summarize_text_stream("Long text"))
+        with self.assertRaises(ValueError):
+            process_text_stream("Text", 'unknown')
+        # Checks the joined summary, the prompt, the raised error and the unsupported operation
+
+class TestTextProcessorAsync(unittest.IsolatedAsyncioTestCase):
+    # This class defines a test case for the asyncio counterparts of the text_processor functions.
+
+    def setUp(self):
+        # Bypasses the on-disk translation cache and checkpoints so every test reaches the mocked API
+        patcher = patch.object(text_processor, 'get_translation_cache', return_value=DiskCache(':memory:', 0, enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(text_processor, 'get_checkpoint_store', return_value=CheckpointStore(':memory:', enabled=False))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def completion(content):
+        response = MagicMock()
+        response.choices[0].message.content = content
+        response.choices[0].finish_reason = 'stop'
+        return response
+
+    @patch.object(text_processor, 'get_openai_client')
+    @patch.object(text_processor, 'get_async_openai_client')
+    async def test_atranslate_large_text_matches_sync(self, mock_get_async_client, mock_get_client):
+        # Tests that the async translation returns the same text as the sync one
+        text = "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
+
+        def translate(model, messages, **kwargs):
+            return self.completion(messages[-1]['content'].upper())
+
+        async def atranslate(model, messages, **kwargs):
+            return translate(model, messages)
+
+        mock_get_client.return_value.chat.completions.create.side_effect = translate
+        mock_get_async_client.return_value.chat.completions.create = AsyncMock(side_effect=atranslate)
+
+        expected = translate_large_text(text, "English", "Spanish", chunk_size=20)
+        result = await atranslate_large_text(text, "English", "Spanish", chunk_size=20)
+        self.assertEqual(result, expected)
+        self.assertEqual(result, text.upper())
+        self.assertEqual(mock_get_async_client.return_value.chat.completions.create.await_count, 3)
+        # Checks that every chunk was awaited and the translations were joined in order
+
+    @patch.object(text_processor, 'translation_chunk_tokens', return_value=3000)
+    @patch.object(text_processor, 'atranslate_text_chunk')
+    @patch.object(text_processor, 'chunk_text')
+    async def test_atranslate_large_text_resumes_from_checkpoint(self, mock_split, mock_translate_chunk, mock_budget):
+        # Tests that an async re-run after a failed chunk only translates the chunks that were missing
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        store = CheckpointStore(os.path.join(temp_dir, 'checkpoints.sqlite3'))
+        chunks = [{'text': f"Chunk{i}", 'separator': " "} for i in range(1, 4)]
+        mock_split.return_value = chunks
+        calls = []
+
+        async def translate(chunk, source, target):
+            calls.append(chunk)
+            return None if chunk == "Chunk3" and calls.count(chunk) == 1 else chunk.replace("Chunk", "Translated")
+
+        mock_translate_chunk.side_effect = translate
+        with patch.object(text_processor, 'get_checkpoint_store', return_value=store):
+            self.assertIsNone(await atranslate_large_text("Large text", "en", "es"))
+            result = await atranslate_large_text("Large text", "en", "es")
+            streamed = await atranslate_chunks(iter(chunks), "en", "es")
+        self.assertEqual(result, "Translated1 Translated2 Translated3")
+        self.assertEqual(sorted(calls[:4]), ["Chunk1", "Chunk2", "Chunk3", "Chunk3"])
+        self.assertEqual(streamed, result)
+        # Checks that only the failed chunk was translated again and that a generator of chunks is translated in order
+
+    @patch.object(text_processor, 'get_async_openai_client')
+    async def test_aprocess_text(self, mock_get_async_client):
+        # Tests the summarize and sentiment operations and an unsupported operation
+        mock_create = AsyncMock(side_effect=[self.completion("Summary"), self.completion("Positive")])
+        mock_get_async_client.return_value.chat.completions.create = mock_create
+
+        self.assertEqual(await aprocess_text("Some text", 'summarize', max_words=10), "Summary")
+        self.assertEqual(await aprocess_text("Some text", 'analyze_sentiment'), "Positive")
+        self.assertIsNone(await aprocess_text("Some text", 'unknown'))
+        self.assertEqual(mock_create.await_count, 2)
+        # Checks the results of each operation and that unsupported operations make no request
+
 if __name__ == '__main__':
     unittest.main()
     # This block allows the test file to be run as a script, executing all the tests.
\ No newline at end of file
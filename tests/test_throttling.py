@@ -0,0 +1,239 @@
+import unittest
+import asyncio
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from src.utils.throttling import TokenBucket, AdaptiveConcurrency, ProviderLimiter
+from src.utils.throttling import backoff_delay, is_retryable, is_throttled, retry_after
+from src.utils import throttling
+
+# This section imports necessary modules and functions for testing.
+
+class FakeProvider:
+    # Local HTTP server answering 429 with a Retry-After header for the first `throttled` requests, then 200.
+
+    def __init__(self, throttled, retry_after_header='0'):
+        self.requests = 0
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                provider.requests += 1
+                if provider.requests <= throttled:
+                    self.send_response(429)
+                    self.send_header('Retry-After', retry_after_header)
+                    self.end_headers()
+                    return
+                body = b"ok"
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def fetch(self):
+        with urllib.request.urlopen(self.url, timeout=5) as response:
+            return response.read()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestThrottling(unittest.TestCase):
+    # This class defines a test case for the rate limiting layer.
+
+    def test_token_bucket_reserves_into_debt(self):
+        # Tests that the bucket hands out its capacity, then reports how long a caller must wait
+        bucket = TokenBucket(60)
+        with patch('src.utils.throttling.time.monotonic', return_value=bucket._updated):
+            self.assertEqual(bucket.reserve(60), 0)
+            self.assertAlmostEqual(bucket.reserve(1), 1.0)
+            self.assertAlmostEqual(bucket.reserve(1), 2.0)
+        self.assertEqual(TokenBucket(0).reserve(10 ** 6), 0)
+        # Checks the refill rate of one token per second and that a rate of 0 never waits
+
+    def test_adaptive_concurrency_shrinks_and_grows(self):
+        # Tests that throttling halves the limit and a round of successes raises it again
+        concurrency = AdaptiveConcurrency(8)
+        for _ in range(4):
+            concurrency.acquire()
+        concurrency.record_throttle()
+        self.assertEqual(concurrency.limit, 2)
+        for _ in range(4):
+            concurrency.release()
+        concurrency.record_throttle()
+        self.assertEqual(concurrency.limit, 1)
+        concurrency.record_success()
+        self.assertEqual(concurrency.limit, 2)
+        concurrency.record_success()
+        concurrency.record_success()
+        self.assertEqual(concurrency.limit, 3)
+        # Checks the limit after each throttle and after rounds of successful calls
+
+    def test_error_classification_and_retry_after(self):
+        # Tests that throttling and transient errors are recognized from status codes and class names
+        class RateLimitError(Exception):
+            pass
+
+        class ApiError(Exception):
+            def __init__(self, status_code, headers=None):
+                self.status_code = status_code
+                self.headers = headers or {}
+
+        self.assertTrue(is_throttled(RateLimitError()))
+        self.assertTrue(is_throttled(ApiError(429)))
+        self.assertTrue(is_retryable(ApiError(503)))
+        self.assertFalse(is_retryable(ApiError(400)))
+        self.assertFalse(is_retryable(ValueError("bad input")))
+        self.assertEqual(retry_after(ApiError(429, {'retry-after': '3'})), 3.0)
+        self.assertEqual(retry_after(ApiError(429, {'retry-after-ms': '250'})), 0.25)
+        self.assertIsNone(retry_after(ApiError(429)))
+        # Checks the classification and the parsed Retry-After delays
+
+    def test_backoff_delay(self):
+        # Tests that Retry-After is honoured up to the cap and otherwise the delay is jittered exponentially
+        self.assertGreaterEqual(backoff_delay(0, base=1.0, cap=60.0, server_delay=5.0), 5.0)
+        self.assertLessEqual(backoff_delay(0, base=1.0, cap=60.0, server_delay=500.0), 61.0)
+        for attempt in range(10):
+            self.assertLessEqual(backoff_delay(attempt, base=1.0, cap=8.0), 8.0)
+        # Checks the bounds of the computed delays
+
+    def test_call_retries_throttled_requests_against_fake_server(self):
+        # Tests that requests throttled by a local fake provider are retried until they succeed
+        provider = FakeProvider(throttled=2)
+        self.addCleanup(provider.close)
+        limiter = ProviderLimiter('fake', max_concurrency=4, max_retries=3, backoff=0, max_backoff=0)
+
+        self.assertEqual(limiter.call(provider.fetch), b"ok")
+        self.assertEqual(provider.requests, 3)
+        self.assertEqual(limiter.retries, 2)
+        self.assertEqual(limiter.concurrency.throttles, 2)
+        self.assertEqual(limiter.concurrency.active, 0)
+        # Checks the number of requests, retries and throttles, and that every slot was released
+
+    def test_call_gives_up_after_max_retries(self):
+        # Tests that the last error is raised when the provider keeps throttling
+        provider = FakeProvider(throttled=10)
+        self.addCleanup(provider.close)
+        limiter = ProviderLimiter('fake', max_retries=1, backoff=0, max_backoff=0)
+
+        with self.assertRaises(urllib.error.HTTPError):
+            limiter.call(provider.fetch)
+        self.assertEqual(provider.requests, 2)
+        with self.assertRaises(ValueError):
+            limiter.call(lambda: (_ for _ in ()).throw(ValueError("bad request")))
+        # Checks that throttling is retried once and that other errors are raised immediately
+
+    def test_stream_holds_slot_and_reports_errors(self):
+        # Tests that a stream keeps its concurrency slot until it ends and that stream errors reach the limiter
+        class RateLimitError(Exception):
+            status_code = 429
+
+        limiter = ProviderLimiter('fake-stream', max_concurrency=4, max_retries=2, backoff=0, max_backoff=0)
+        opened = []
+
+        def open_stream(fail_after):
+            opened.append(fail_after)
+            if len(opened) == 1:
+                raise RateLimitError()
+            for i in range(3):
+                if i == fail_after:
+                    raise RateLimitError()
+                yield i
+
+        stream = limiter.stream(lambda: open_stream(None))
+        self.assertEqual(next(stream), 0)
+        self.assertEqual(limiter.concurrency.active, 1)
+        self.assertEqual(list(stream), [1, 2])
+        self.assertEqual((limiter.concurrency.active, limiter.retries, len(opened)), (0, 1, 2))
+        # A failure before the first item is retried and the slot is held for the whole stream
+
+        with self.assertRaises(RateLimitError):
+            list(limiter.stream(lambda: open_stream(1)))
+        self.assertEqual((limiter.concurrency.active, limiter.retries, limiter.concurrency.throttles), (0, 1, 2))
+        # A failure after the first item is raised without a retry but still counted as a throttle
+
+        stream = limiter.stream(lambda: open_stream(None))
+        next(stream)
+        stream.close()
+        self.assertEqual(limiter.concurrency.active, 0)
+        # Checks that closing the stream early gives the slot back
+
+    def test_deprecated_settings_warn(self):
+        # Tests that a provider's limiter warns about the deprecated settings it replaces
+        self.addCleanup(throttling.reset_provider_limiters)
+        throttling.reset_provider_limiters()
+        deprecated = {'TRANSLATION_REQUESTS_PER_MINUTE': ('openai', 'OPENAI_REQUESTS_PER_MINUTE'),
+                      'TTS_MAX_RETRIES': ('tts', 'RATE_LIMIT_MAX_RETRIES')}
+        with patch.object(throttling, 'DEPRECATED_SETTINGS', deprecated), \
+                self.assertLogs(throttling.logger, 'WARNING') as logs:
+            limiter = throttling.get_provider_limiter('openai', 'test-model')
+        self.assertIs(throttling.get_provider_limiter('openai', 'test-model'), limiter)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('TRANSLATION_REQUESTS_PER_MINUTE', logs.output[0])
+        # Checks that only the OpenAI setting is reported and that the OpenAI limiter is still shared
+
+class TestAsyncThrottling(unittest.IsolatedAsyncioTestCase):
+    # This class defines a test case for the asyncio side of the rate limiting layer.
+
+    async def test_acall_retries_throttled_requests_against_fake_server(self):
+        # Tests that concurrent coroutines share the limiter and all succeed despite throttling
+        provider = FakeProvider(throttled=3)
+        self.addCleanup(provider.close)
+        limiter = ProviderLimiter('fake', max_concurrency=4, max_retries=5, backoff=0, max_backoff=0)
+
+        results = await asyncio.gather(*(limiter.acall(lambda: asyncio.to_thread(provider.fetch)) for _ in range(6)))
+        self.assertEqual(results, [b"ok"] * 6)
+        self.assertEqual(provider.requests, 9)
+        self.assertEqual(limiter.concurrency.throttles, 3)
+        self.assertEqual(limiter.concurrency.active, 0)
+        # Checks the results, the total number of requests and that every throttle was recorded
+
+    async def test_acall_releases_slot_when_cancelled(self):
+        # Tests that tasks cancelled while sending or while waiting for the rate limit give their slot back
+        limiter = ProviderLimiter('fake', max_concurrency=2, max_retries=0)
+        never = asyncio.Event()
+        tasks = [asyncio.ensure_future(limiter.acall(never.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        self.assertEqual(limiter.concurrency.active, 2)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertEqual(limiter.concurrency.active, 0)
+
+        with patch.object(limiter, '_reserve', return_value=60):
+            waiting = asyncio.ensure_future(limiter.acall(never.wait))
+            await asyncio.sleep(0.01)
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+        self.assertEqual(limiter.concurrency.active, 0)
+
+        async def ok():
+            return "ok"
+
+        self.assertEqual(await asyncio.wait_for(limiter.acall(ok), 1), "ok")
+        # Checks that no slot is left taken and that the next call does not hang
+
+    async def test_aacquire_waits_for_a_free_slot(self):
+        # Tests that a coroutine waits until another caller releases its slot
+        concurrency = AdaptiveConcurrency(1)
+        await concurrency.aacquire()
+        waiter = asyncio.ensure_future(concurrency.aacquire())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+        concurrency.release()
+        await asyncio.wait_for(waiter, 1)
+        self.assertEqual(concurrency.active, 1)
+        # Checks that the waiting coroutine takes the released slot
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
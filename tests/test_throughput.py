@@ -0,0 +1,33 @@
+import unittest
+import threading
+from src.utils.throughput import ThroughputMeter, throughput_report, format_throughput
+
+# This section imports necessary modules and functions for testing.
+
+class TestThroughput(unittest.TestCase):
+    # This class defines a test case for the throughput counters.
+
+    def test_meter_counts_across_threads(self):
+        # Tests that concurrent workers can add to the same counters
+        meter = ThroughputMeter()
+        threads = [threading.Thread(target=lambda: [meter.add(chunks=1, tokens=10) for _ in range(100)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(meter.snapshot(), {'chunks': 400, 'tokens': 4000})
+        # Checks that no increment was lost
+
+    def test_report_against_baseline(self):
+        # Tests rates computed from the difference with an earlier snapshot
+        report = throughput_report({'files': 12, 'chunks': 50}, 4.0, baseline={'chunks': 10})
+        self.assertEqual(report['files_per_second'], 3.0)
+        self.assertEqual(report['chunks'], 40)
+        self.assertEqual(report['chunks_per_second'], 10.0)
+        self.assertEqual(format_throughput(report, ('files', 'chunks')), "12 files (3.00/s), 40 chunks (10.00/s)")
+        self.assertEqual(throughput_report({'files': 1}, 0)['files_per_second'], 0.0)
+        # Checks the counts, the rates, the log format and a zero elapsed time
+
+if __name__ == '__main__':
+    unittest.main()
+    # Allows the test file to be run as a script
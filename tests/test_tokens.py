@@ -0,0 +1,50 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from src.utils.tokens import get_model_limits, count_tokens, chunk_token_budget, get_encoding
+from src.utils.chunking import estimate_tokens
+
+# This section imports necessary modules and functions for testing.
+
+class TestTokens(unittest.TestCase):
+    # This class defines a test case for token counting and chunk budgets.
+
+    def setUp(self):
+        get_encoding.cache_clear()
+        self.addCleanup(get_encoding.cache_clear)
+
+    def test_get_model_limits(self):
+        # Tests exact names, dated snapshots and unknown models
+        self.assertEqual(get_model_limits('gpt-3.5-turbo'), {'context_tokens': 16385, 'max_output_tokens': 4096})
+        self.assertEqual(get_model_limits('gpt-4o-mini-2024-07-18')['max_output_tokens'], 16384)
+        self.assertEqual(get_model_limits('gpt-4-0613'), {'context_tokens': 8192, 'max_output_tokens': 8192})
+        self.assertEqual(get_model_limits('some-other-model'), {'context_tokens': 8192, 'max_output_tokens': 4096})
+
+    def test_count_tokens_uses_tokenizer(self):
+        # Tests that the model's tokenizer is used when it is available
+        encoding = MagicMock()
+        encoding.encode.return_value = [1, 2, 3]
+        with patch.dict('sys.modules', {'tiktoken': MagicMock(encoding_for_model=MagicMock(return_value=encoding))}):
+            self.assertEqual(count_tokens("any text", 'gpt-4o'), 3)
+
+    def test_count_tokens_falls_back_to_estimate(self):
+        # Tests the estimate used when the tokenizer cannot be loaded (e.g. no network for its encoding files)
+        tiktoken = MagicMock()
+        tiktoken.encoding_for_model.side_effect = OSError("offline")
+        with patch.dict('sys.modules', {'tiktoken': tiktoken}):
+            self.assertEqual(count_tokens("Hello world", 'gpt-4o'), estimate_tokens("Hello world"))
+
+    def test_chunk_token_budget(self):
+        # Tests that the budget leaves room for the prompt and the expected output
+        budget = chunk_token_budget("", 1.5, 'gpt-3.5-turbo')
+        self.assertEqual(budget, int(4096 / 1.5))
+        # Limited by the 4096-token completion limit
+        budget = chunk_token_budget("", 1.0, 'gpt-4')
+        self.assertEqual(budget, int((8192 - 8) / 2))
+        # Limited by the context window shared by input, message overhead and output
+        budget = chunk_token_budget("", 0, 'gpt-4')
+        self.assertEqual(budget, 8192 - 8)
+        self.assertEqual(chunk_token_budget("", -1.0, 'gpt-4'), budget)
+        # A zero or negative output ratio reserves no completion tokens and only the context window applies
+
+if __name__ == '__main__':
+    unittest.main()